@@ -11,20 +11,58 @@ Este proyecto es con fines EDUCATIVOS y no constituye diagnóstico médico.
 ===========================================================
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+import time
+
+# Referencia del arranque: la fase "imports" se mide desde aquí
+STARTED_AT = time.perf_counter()
+
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
-import joblib
 import json
 from pathlib import Path
-import pandas as pd
+import numpy as np
 import logging
+import mimetypes
 import os
+import sys
+import threading
+from werkzeug.security import safe_join
 
 # === CONFIGURACIÓN DE RUTAS ===
 BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.forest_engine import FlatForest
+from utils.microbatch import MicroBatcher
+from utils.batch_io import (
+    CONTENT_TYPES, UnsupportedFormat, detect_format, iter_chunks,
+    iter_csv_chunks, read_matrix, spool_stream, upload_buffer
+)
+from utils.response_encoding import (
+    ENCODERS, available_encodings, encode_stream_block, proba_to_list, stream_header
+)
+from utils.prediction_cache import PredictionCache, SQLiteCacheBackend
+from utils.model_store import ModelStore
+from utils.metrics import MetricsRegistry, SIZE_BUCKETS
+from utils.input_schema import MAX_REPORTED_ROWS
+from utils.batch_jobs import JobStore, RESULT_TYPES
+from utils.admission import AdmissionController, Rejected, BULK, INTERACTIVE
+from utils.static_cache import StaticCache, StaticPayload
+from utils.image_variants import FORMATS as IMAGE_FORMATS, VariantCache
+from utils.lazy_import import is_loaded, lazy_import
+from utils.startup import StartupReport
+
+# Fuera del camino de /predict: se importan en el primer uso
+pd = lazy_import("pandas")
+joblib = lazy_import("joblib")
+
+startup = StartupReport(STARTED_AT)
+startup.mark("imports")
+
 ARTIFACTS_DIR = BASE_DIR / "artifacts"
 
 MODEL_PATH = ARTIFACTS_DIR / "model" / "model.pkl"
+FOREST_PATH = ARTIFACTS_DIR / "model" / "forest.bin"
 FEATURE_INFO_PATH = ARTIFACTS_DIR / "info" / "feature_info.json"
 METRICS_PATH = ARTIFACTS_DIR / "info" / "model_metrics.json"
 EXAMPLES_PATH = ARTIFACTS_DIR / "info" / "example_cases.json"
@@ -42,30 +80,592 @@ logging.basicConfig(
 )
 logger = app.logger
 
-# Cargar artefactos en memoria al iniciar
-model = joblib.load(MODEL_PATH)
-with open(FEATURE_INFO_PATH) as f:
-    feature_info = json.load(f)
-with open(METRICS_PATH) as f:
-    metrics = json.load(f)
-with open(EXAMPLES_PATH) as f:
-    examples = json.load(f)
+# Motor de inferencia: "native" (bosque aplanado en NumPy) o "sklearn"
+INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE", "native").lower()
+
+# Micro-batching opcional de /predict (requiere peticiones concurrentes por worker)
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "false").lower() == "true"
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_US = int(os.getenv("MICROBATCH_MAX_WAIT_US", "1000"))
+
+# Filas por bloque en /predict/batch con ?stream=ndjson|csv
+BATCH_CHUNK_ROWS = int(os.getenv("BATCH_CHUNK_ROWS", "10000"))
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Caché de /predict (PREDICTION_CACHE_SIZE=0 la desactiva). Con
+# PREDICTION_CACHE_SHARED_PATH (p. ej. /dev/shm/predictions.sqlite)
+# todos los workers del nodo comparten resultados.
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+PREDICTION_CACHE_SHARED_PATH = os.getenv("PREDICTION_CACHE_SHARED_PATH")
+
+# Segundos entre revisiones de artefactos nuevos (0 desactiva la recarga en caliente)
+MODEL_RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "10"))
+
+# Carpeta compartida donde cada worker vuelca sus métricas para que /metrics
+# las agregue (sin ella, /metrics muestra solo el worker que responde)
+METRICS_DIR = os.getenv("METRICS_DIR")
+
+# Con el motor nativo, cargar forest.bin mapeado en memoria (compartido entre
+# workers) en vez de deserializar model.pkl en cada proceso
+MODEL_MMAP = os.getenv("MODEL_MMAP", "true").lower() == "true"
+
+# Margen de los límites de validación, en veces el rango observado en
+# entrenamiento (feature_bounds de feature_info.json)
+SCHEMA_BOUNDS_MARGIN = float(os.getenv("SCHEMA_BOUNDS_MARGIN", "1.0"))
+
+# Cola de trabajos por lotes (la evalúa api/jobs_worker.py, fuera de los workers web)
+JOBS_DIR = Path(os.getenv("JOBS_DIR", BASE_DIR / "artifacts" / "jobs"))
+JOBS_CHUNK_ROWS = int(os.getenv("JOBS_CHUNK_ROWS", "50000"))
+
+# Segundos que los clientes pueden reutilizar `/`, `/model/info`, `/examples` y
+# las visualizaciones sin revalidar. Con `?v=<model_version>` la respuesta es
+# inmutable (un año): la URL cambia con cada versión publicada.
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "60"))
+STATIC_IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Variantes de las visualizaciones (?width=&format=) generadas al primer uso y
+# guardadas en disco, compartidas por los workers, con desalojo LRU
+VISUALIZATION_CACHE_DIR = Path(os.getenv(
+    "VISUALIZATION_CACHE_DIR", ARTIFACTS_DIR / "cache" / "visualizations"
+))
+VISUALIZATION_CACHE_MAX_MB = float(os.getenv("VISUALIZATION_CACHE_MAX_MB", "64"))
+VISUALIZATION_WIDTHS = [
+    int(w) for w in os.getenv("VISUALIZATION_WIDTHS", "320,480,640,800,1024,1280").split(",")
+]
+
+# Arranque: "sync" carga y calienta el modelo al importar la app (con gunicorn
+# y preload_app, una sola vez antes del fork); "background" abre el puerto de
+# inmediato y carga en un hilo: /ready y los endpoints del modelo responden
+# 503 hasta terminar. STARTUP_WARMUP_ROWS filas sintéticas se suman a los
+# casos de ejemplo en el calentamiento.
+STARTUP_MODE = os.getenv("STARTUP_MODE", "sync").lower()
+STARTUP_WARMUP_ROWS = int(os.getenv("STARTUP_WARMUP_ROWS", "256"))
+
+# Control de admisión por worker: evaluaciones en curso, cola acotada por
+# carril (/predict interactivo, /predict/batch bulk) y filas por segundo de
+# los lotes (0 = sin límite). Lo que excede se rechaza con 503/429.
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "64"))
+ADMISSION_PREDICT_MAX_QUEUE = int(os.getenv("ADMISSION_PREDICT_MAX_QUEUE", "64"))
+ADMISSION_PREDICT_TIMEOUT_MS = float(os.getenv("ADMISSION_PREDICT_TIMEOUT_MS", "250"))
+ADMISSION_BATCH_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_BATCH_MAX_IN_FLIGHT", "2"))
+ADMISSION_BATCH_MAX_QUEUE = int(os.getenv("ADMISSION_BATCH_MAX_QUEUE", "4"))
+ADMISSION_BATCH_TIMEOUT_MS = float(os.getenv("ADMISSION_BATCH_TIMEOUT_MS", "2000"))
+ADMISSION_BATCH_ROWS_PER_SECOND = float(os.getenv("ADMISSION_BATCH_ROWS_PER_SECOND", "0"))
+ADMISSION_BATCH_ROWS_BURST = float(os.getenv("ADMISSION_BATCH_ROWS_BURST", "0")) or None
+
+# === MÉTRICAS ===
+telemetry = MetricsRegistry(METRICS_DIR)
+telemetry.describe("api_requests_total", "counter", "Peticiones por endpoint y código HTTP")
+telemetry.describe("api_errors_total", "counter", "Respuestas con código >= 400")
+telemetry.describe("api_rows_scored_total", "counter", "Filas evaluadas por el modelo")
+telemetry.describe("api_request_seconds", "histogram", "Latencia total por endpoint")
+telemetry.describe("api_stage_seconds", "histogram",
+                   "Latencia por etapa: parse, validate, reindex, inference, serialize")
+telemetry.describe("api_request_bytes", "histogram", "Tamaño del cuerpo de la petición")
+telemetry.describe("api_response_bytes", "histogram", "Tamaño del cuerpo de la respuesta")
+telemetry.describe("api_microbatch_size_rows", "histogram", "Filas por lote del micro-batching")
+telemetry.describe("api_microbatch_queue_wait_seconds", "histogram",
+                   "Espera en cola de cada fila del micro-batching")
+for _name in ("hits", "shared_hits", "misses", "evictions", "expirations"):
+    telemetry.describe(f"api_cache_{_name}_total", "counter", f"Caché de /predict: {_name}")
+telemetry.describe("api_admission_in_flight", "gauge", "Evaluaciones en curso por carril")
+telemetry.describe("api_admission_queue_depth", "gauge", "Peticiones esperando admisión por carril")
+telemetry.describe("api_admission_admitted_total", "counter", "Peticiones admitidas por carril")
+telemetry.describe("api_admission_shed_total", "counter",
+                   "Peticiones rechazadas por carril y motivo: queue_full, timeout, rate_limited")
+telemetry.describe("api_admission_wait_seconds", "histogram", "Espera en cola antes de la admisión")
+telemetry.describe("api_trees_evaluated_total", "counter",
+                   "Árboles evaluados por fila con salida anticipada (suma)")
+telemetry.describe("api_trees_skipped_total", "counter",
+                   "Árboles que la salida anticipada evitó evaluar (suma)")
+
+
+def stage(name, endpoint=None):
+    """Cronometra una etapa de la petición en api_stage_seconds."""
+    return telemetry.time(
+        "api_stage_seconds", {"endpoint": endpoint or request.endpoint, "stage": name}
+    )
+
+
+def count_rows(n, endpoint=None):
+    telemetry.inc("api_rows_scored_total", {"endpoint": endpoint or request.endpoint}, n)
+
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    endpoint = request.endpoint or "not_found"
+    started = g.get("request_started")
+    if started is not None:
+        telemetry.observe(
+            "api_request_seconds", time.perf_counter() - started, {"endpoint": endpoint}
+        )
+    telemetry.inc("api_requests_total", {"endpoint": endpoint, "status": response.status_code})
+    if response.status_code >= 400:
+        telemetry.inc("api_errors_total", {"endpoint": endpoint})
+    if request.content_length:
+        telemetry.observe("api_request_bytes", request.content_length,
+                          {"endpoint": endpoint}, SIZE_BUCKETS)
+    if response.content_length is not None and not response.is_streamed:
+        telemetry.observe("api_response_bytes", response.content_length,
+                          {"endpoint": endpoint}, SIZE_BUCKETS)
+    return response
+
+
+@app.teardown_request
+def flush_metrics(exc=None):
+    # Registrado antes que release_admission: Flask corre los teardown en
+    # orden inverso, así el volcado ya no cuenta esta petición como en curso
+    telemetry.flush()
+
+
+# === CONTROL DE ADMISIÓN ===
+ADMISSION_LANES = {"predict": INTERACTIVE, "predict_batch": BULK}
+
+admission = (
+    AdmissionController(
+        ADMISSION_MAX_IN_FLIGHT,
+        {
+            INTERACTIVE: {"max_in_flight": ADMISSION_MAX_IN_FLIGHT,
+                          "max_queue": ADMISSION_PREDICT_MAX_QUEUE,
+                          "queue_timeout": ADMISSION_PREDICT_TIMEOUT_MS / 1000},
+            BULK: {"max_in_flight": ADMISSION_BATCH_MAX_IN_FLIGHT,
+                   "max_queue": ADMISSION_BATCH_MAX_QUEUE,
+                   "queue_timeout": ADMISSION_BATCH_TIMEOUT_MS / 1000},
+        },
+        batch_rows_per_second=ADMISSION_BATCH_ROWS_PER_SECOND,
+        batch_rows_burst=ADMISSION_BATCH_ROWS_BURST,
+        on_wait=lambda lane, seconds: telemetry.observe(
+            "api_admission_wait_seconds", seconds, {"lane": lane}
+        ),
+    )
+    if ADMISSION_ENABLED else None
+)
+if admission is not None:
+    telemetry.add_collector(admission.metric_samples)
+
+
+def shed_response(rejected):
+    """503/429 inmediato con `Retry-After` para la petición descartada."""
+    response = jsonify({
+        "error": str(rejected),
+        "reason": rejected.reason,
+        "retry_after": rejected.retry_after
+    })
+    response.status_code = rejected.status
+    response.headers["Retry-After"] = str(rejected.retry_after)
+    return response
+
+
+def json_batch_rows(data):
+    """Filas de un lote JSON de /predict (lista de filas o {feature: [valores]}); 0 si no lo es."""
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict) and data and all(isinstance(v, list) for v in data.values()):
+        return len(next(iter(data.values())))
+    return 0
+
+
+def admission_lane():
+    """Carril de la petición: un lote JSON de más de una fila en /predict va a lotes."""
+    lane = ADMISSION_LANES.get(request.endpoint)
+    if lane == INTERACTIVE and request.is_json:
+        # Flask guarda el JSON ya leído: predict() no lo vuelve a parsear
+        with stage("parse"):
+            data = request.get_json(silent=True)
+        if json_batch_rows(data) > 1:
+            return BULK
+    return lane
+
+
+def take_rows(n, wait=False):
+    """Cobra `n` filas al límite de filas por segundo de los lotes."""
+    if admission is not None:
+        admission.take_rows(n, wait)
+
+
+@app.before_request
+def admit_request():
+    if admission is None:
+        return None
+    lane = admission_lane()
+    if lane is None:
+        return None
+    try:
+        g.admission = (lane, admission.acquire(lane))
+    except Rejected as e:
+        logger.warning(f"Petición descartada en {request.path}: {e.reason}")
+        return shed_response(e)
+    return None
+
+
+@app.teardown_request
+def release_admission(exc=None):
+    # En modo stream el contexto sigue activo hasta terminar el generador
+    ticket = g.pop("admission", None)
+    if ticket is not None:
+        admission.release(*ticket)
+
+
+def build_engine(model):
+    """Devuelve el motor configurado; si el modelo no es compatible usa sklearn."""
+    if INFERENCE_ENGINE == "native":
+        try:
+            return FlatForest.from_sklearn(model)
+        except Exception as e:
+            logger.warning(f"Motor nativo no disponible, se usa sklearn: {str(e)}")
+    return model
+
+
+def load_engine(source):
+    """(modelo sklearn, motor, almacenamiento) para una versión publicada."""
+    with startup.phase("model_load"):
+        forest_path = source.get("forest")
+        if INFERENCE_ENGINE == "native" and MODEL_MMAP and forest_path is not None:
+            return None, FlatForest.load(forest_path, mmap_mode=True), "mmap"
+        model = joblib.load(source["model"])
+        return model, build_engine(model), "pickle"
+
+
+def as_model_input(X, state):
+    """sklearn espera un DataFrame con nombres de columnas; el motor nativo, una matriz."""
+    if isinstance(X, np.ndarray) and not isinstance(state.engine, FlatForest):
+        return pd.DataFrame(X, columns=state.feature_info["feature_names"])
+    return X
+
+
+def warmup_rows(state):
+    """
+    Casos de ejemplo más filas sintéticas dentro de los límites del esquema
+    de la versión (semilla fija: todos los workers calientan con las mismas filas).
+    """
+    schema = state.schema
+    cases = np.array([
+        [case.get(name, 0) for name in schema.feature_names]
+        for case in state.examples.values()
+    ], dtype=np.float64).reshape(-1, schema.n_features)
+    lower = np.where(np.isfinite(schema.lower), schema.lower, 0.0)
+    upper = np.where(np.isfinite(schema.upper), schema.upper, lower + 1.0)
+    rng = np.random.default_rng(0)
+    synthetic = rng.uniform(lower, upper, size=(STARTUP_WARMUP_ROWS, schema.n_features))
+    return np.vstack([cases, synthetic])
+
+
+def warmup(state):
+    """
+    Evalúa filas de ejemplo y sintéticas antes de activar un modelo recién
+    cargado, con los tamaños de lote habituales (1 fila, micro-batch, lote).
+    """
+    with startup.phase("warmup"):
+        X = warmup_rows(state)
+        for n in sorted({1, min(MICROBATCH_MAX_SIZE, len(X)), len(X)}):
+            state.engine.predict_proba(as_model_input(X[:n], state))
+
+
+def warmup_request_path():
+    """Recorre una vez la validación y la serialización de /predict con los ejemplos."""
+    state = store.active
+    schema, examples = state.schema, state.examples
+    with startup.phase("warmup_request_path"):
+        for case in examples.values():
+            row, _ = schema.row_from_dict(case)
+            labels, probas = infer(row.reshape(1, -1), state=state)
+            json.dumps({"prediction": int(labels[0]), "probability": proba_to_list(probas[0])})
+        X, type_errors, present = schema.records_to_matrix(list(examples.values()))
+        schema.validate_matrix(X, type_errors, present=present)
+
+
+def on_model_swap(state):
+    if cache is not None:
+        cache.set_model_version(state.version)
+
+
+store = ModelStore(
+    MODEL_PATH.parent, MODEL_PATH, METRICS_PATH,
+    load_engine=load_engine, warmup=warmup, logger=logger,
+    on_swap=on_model_swap, fallback_forest=FOREST_PATH, load=False,
+    fallback_feature_info=FEATURE_INFO_PATH, fallback_examples=EXAMPLES_PATH,
+    bounds_margin=SCHEMA_BOUNDS_MARGIN, phase=startup.phase
+)
+
+
+@app.before_request
+def start_model_watcher():
+    store.start_watcher(MODEL_RELOAD_INTERVAL)
+
+
+@app.after_request
+def add_model_version(response):
+    version = g.get("model_version")
+    if version is not None:
+        response.headers["X-Model-Version"] = version
+    return response
+
+
+# === INFERENCIA ===
+def infer(X, compact=False, state=None):
+    """
+    Una sola pasada por el bosque: las etiquetas se derivan de las
+    probabilidades (igual que `predict` de sklearn) en vez de recorrer
+    los árboles dos veces. Con `compact=True` las probabilidades se
+    devuelven en float32.
+    """
+    state = state or store.active
+    engine = state.engine
+    proba = engine.predict_proba(as_model_input(X, state))
+    labels = engine.classes_.take(np.argmax(proba, axis=1), axis=0)
+    if compact:
+        proba = proba.astype(np.float32)
+    return labels, proba
+
+
+def wants_compact():
+    """El cliente pide salida compacta con ?dtype=float32."""
+    return request.args.get("dtype", "float64").lower() == "float32"
+
+
+class InvalidParameter(ValueError):
+    """Parámetro de la URL inválido (respuesta 400 con el mensaje)."""
+
+
+def early_exit_tolerance():
+    """
+    Salida anticipada pedida con ?early_exit=true y/o ?tolerance=<0..1>.
+    None si no se pidió; si no, la tolerancia de la probabilidad (con 0 solo
+    se corta cuando la etiqueta ya no puede cambiar).
+    """
+    tolerance = request.args.get("tolerance")
+    enabled = request.args.get("early_exit", "false" if tolerance is None else "true").lower()
+    if enabled not in ("true", "false"):
+        raise InvalidParameter("early_exit debe ser true o false")
+    if enabled == "false":
+        return None
+    try:
+        tolerance = float(tolerance or 0)
+    except ValueError:
+        tolerance = float("nan")
+    if not 0 <= tolerance < 1:
+        raise InvalidParameter("tolerance debe ser un número entre 0 y 1")
+    return tolerance
+
+
+def infer_early_exit(X, tolerance, compact=False, state=None):
+    """
+    Como `infer`, pero deja de evaluar árboles en cada fila cuando la etiqueta
+    ya no puede cambiar o la probabilidad está dentro de `tolerance`.
+    Devuelve (etiquetas, probabilidades, árboles usados, cota del error).
+    El motor sklearn no lo soporta y evalúa el bosque completo.
+    """
+    state = state or store.active
+    engine = state.engine
+    if isinstance(engine, FlatForest):
+        proba, trees_used, bound = engine.predict_proba_early_exit(X, tolerance)
+    else:
+        proba = engine.predict_proba(as_model_input(X, state))
+        trees_used = np.full(len(proba), engine.n_estimators, dtype=np.int32)
+        bound = np.zeros(len(proba))
+    labels = engine.classes_.take(np.argmax(proba, axis=1), axis=0)
+    if compact:
+        proba = proba.astype(np.float32)
+
+    endpoint = {"endpoint": request.endpoint}
+    evaluated = int(trees_used.sum())
+    telemetry.inc("api_trees_evaluated_total", endpoint, evaluated)
+    telemetry.inc("api_trees_skipped_total", endpoint,
+                  engine.n_estimators * len(trees_used) - evaluated)
+    return labels, proba, trees_used, bound
+
+
+batcher = (
+    MicroBatcher(infer, MICROBATCH_MAX_SIZE, MICROBATCH_MAX_WAIT_US, registry=telemetry)
+    if MICROBATCH_ENABLED else None
+)
+
+cache = (
+    PredictionCache(
+        PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL, "",
+        shared=(SQLiteCacheBackend(PREDICTION_CACHE_SHARED_PATH, PREDICTION_CACHE_SIZE)
+                if PREDICTION_CACHE_SHARED_PATH else None)
+    )
+    if PREDICTION_CACHE_SIZE > 0 else None
+)
+
+
+def cache_counters():
+    if cache is None:
+        return []
+    stats = cache.stats()
+    return [
+        (f"api_cache_{name}_total", {}, stats[name])
+        for name in ("hits", "shared_hits", "misses", "evictions", "expirations")
+    ]
+
+
+telemetry.add_collector(cache_counters)
+
+
+def predict_row(row, state):
+    """
+    Evalúa una fila con el modelo `state` (el que informa la respuesta),
+    pasando por la caché y, si está activo, por el micro-batching.
+    """
+    key = cache.key(row, state.version) if cache is not None else None
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    if batcher is not None:
+        # La fila se agrupa con otras peticiones concurrentes
+        label, proba = batcher.submit(row, state=state)
+    else:
+        labels, probas = infer(row.reshape(1, -1), state=state)
+        label, proba = labels[0], probas[0]
+
+    if key is not None:
+        cache.put(key, label, proba, state.version)
+    return label, proba
+
+
+# === ARRANQUE ===
+# Endpoints que necesitan el modelo activo (503 hasta que el worker está listo)
+MODEL_ENDPOINTS = {"predict", "predict_batch", "model_info", "model_memory", "model_reload",
+                   "example_cases"}
+_loader_pid = None
+_loader_lock = threading.Lock()
+
+
+def load_model():
+    """Carga y calienta la versión publicada y marca el worker como listo."""
+    try:
+        store.load_active()
+        warmup_request_path()
+    except Exception as e:
+        startup.fail(e)
+        logger.error(f"No se pudo cargar el modelo: {str(e)}")
+        raise
+    startup.mark_ready()
+    phases = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in startup.phases.items())
+    logger.info(f"🚀 Worker listo en {startup.total:.3f}s ({phases})")
+
+
+def start_loading():
+    """Modo background: un hilo de carga por proceso (se relanza tras un fork)."""
+    global _loader_pid
+    with _loader_lock:
+        if startup.ready or _loader_pid == os.getpid():
+            return
+        _loader_pid = os.getpid()
+        threading.Thread(target=load_model, daemon=True).start()
+
+
+@app.before_request
+def require_model():
+    if startup.ready:
+        return None
+    if STARTUP_MODE == "background":
+        start_loading()
+    if request.endpoint in MODEL_ENDPOINTS:
+        response = jsonify({"error": "El modelo se está cargando", "retry_after": 1})
+        response.status_code = 503
+        response.headers["Retry-After"] = "1"
+        return response
+    return None
+
+
+telemetry.describe("api_ready", "gauge", "1 si el worker cargó y calentó el modelo")
+telemetry.describe("api_startup_seconds", "gauge", "Duración de cada fase del arranque por worker")
+telemetry.add_collector(startup.metric_samples)
+
+if STARTUP_MODE == "background":
+    start_loading()
+else:
+    load_model()
+
+
+# === RESPUESTAS ESTÁTICAS ===
+static_cache = StaticCache()
+image_variants = VariantCache(
+    VISUALIZATION_CACHE_DIR, VISUALIZATION_CACHE_MAX_MB * 1024 * 1024, VISUALIZATION_WIDTHS
+)
+
+
+def json_payload(data, last_modified=None):
+    """Mismo cuerpo que `jsonify(data)`, serializado y comprimido una sola vez."""
+    body = (app.json.dumps(data) + "\n").encode()
+    return StaticPayload(body, app.json.mimetype, last_modified)
+
+
+def static_response(payload):
+    """
+    Respuesta pre-serializada en la codificación que acepta el cliente, con
+    ETag, Last-Modified y Cache-Control; 304 si el cliente ya la tiene.
+    """
+    encoding, body, etag = payload.negotiate(request.accept_encodings)
+    response = Response(body, mimetype=payload.mimetype)
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    if len(payload.variants) > 1:
+        response.vary.add("Accept-Encoding")
+    response.set_etag(etag)
+    response.last_modified = payload.last_modified
+    response.cache_control.public = True
+    state = store.active
+    if state is not None and request.args.get("v") == state.version:
+        response.cache_control.max_age = STATIC_IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = STATIC_MAX_AGE
+    return response.make_conditional(request)
 
 
 # === ENDPOINTS ===
 @app.route("/", methods=["GET"])
 def root():
-    return jsonify({
+    state = store.active
+    version = state.version if state is not None else None
+    return static_response(static_cache.get("root", version, lambda: json_payload({
         "message": "Bienvenido a la API de Clasificación de Cáncer de Mama 🚀",
         "endpoints": {
             "/health": "Prueba de estado",
+            "/ready": "Modelo cargado y calentado; tiempos de arranque por fase",
             "/model/info": "Información del modelo y métricas",
+            "/model/reload": "Activa la última versión publicada del modelo (POST)",
+            "/model/memory": "Memoria residente del worker y del modelo",
             "/examples": "Casos de ejemplo (benigno/maligno)",
             "/predict": "Predicción individual (POST JSON)",
-            "/predict/batch": "Predicción por lotes (POST CSV)",
+            "/predict/batch": "Predicción por lotes (POST CSV, Parquet, Arrow IPC o .npy)",
+            "/microbatch/stats": "Histogramas del micro-batching de /predict",
+            "/cache/stats": "Aciertos y fallos de la caché de /predict",
+            "/admission/stats": "Evaluaciones en curso, colas y descartes por carril",
+            "/static/stats": "Respuestas estáticas pre-serializadas y comprimidas",
+            "/metrics": "Métricas de latencia y volumen (formato Prometheus)",
+            "/jobs": "Trabajos por lotes asíncronos (POST archivo, GET estado y resultado)",
             "/visualizations/<filename>": "Visualizaciones generadas"
         }
-    })
+    })))
+
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Preparación (no solo vida): modelo cargado y calentado en este worker."""
+    state = store.active
+    body = {
+        "ready": startup.ready,
+        "model_loaded": state is not None,
+        "model_version": state.version if state is not None else None,
+        "startup": startup.as_dict(),
+        "lazy_modules": {
+            name: is_loaded(name) for name in ("pandas", "joblib", "sklearn", "pyarrow", "PIL")
+        },
+    }
+    return jsonify(body), 200 if startup.ready else 503
 
 
 @app.route("/health", methods=["GET"])
@@ -75,91 +675,573 @@ def health():
 
 @app.route("/model/info", methods=["GET"])
 def model_info():
+    state = store.active
+    g.model_version = state.version
+    return static_response(static_cache.get("model_info", state.version, lambda: json_payload({
+        "features": state.feature_info["feature_names"],
+        "targets": state.feature_info["target_names"],
+        "metrics": state.metrics,
+        "engine": "native" if isinstance(state.engine, FlatForest) else "sklearn",
+        "storage": state.storage,
+        "model_version": state.version,
+        "loaded_at": state.loaded_at
+    }, last_modified=state.loaded_at)))
+
+
+def process_memory():
+    """Memoria del worker (Linux): RSS total y cuánto es compartido o privado."""
+    memory = {"pid": os.getpid()}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[1].isdigit():
+                    memory[parts[0].rstrip(":").lower() + "_bytes"] = int(parts[1]) * 1024
+    except OSError:
+        import resource
+        memory["max_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return memory
+
+
+@app.route("/model/memory", methods=["GET"])
+def model_memory():
+    state = store.active
+    memory = process_memory()
     return jsonify({
-        "features": feature_info["feature_names"],
-        "targets": feature_info["target_names"],
-        "metrics": metrics
+        "storage": state.storage,
+        "model_bytes": getattr(state.engine, "nbytes", None),
+        "worker": {
+            key: memory[key] for key in (
+                "pid", "rss_bytes", "pss_bytes", "shared_clean_bytes",
+                "shared_dirty_bytes", "private_clean_bytes", "private_dirty_bytes",
+                "max_rss_bytes"
+            ) if key in memory
+        }
     })
 
 
+@app.route("/model/reload", methods=["POST"])
+def model_reload():
+    """Revisa ahora si hay una versión publicada nueva (sin esperar al intervalo)."""
+    changed = store.check_for_update()
+    return jsonify({"reloaded": changed, "model_version": store.active.version})
+
+
 @app.route("/examples", methods=["GET"])
 def example_cases():
-    return jsonify(examples)
+    state = store.active
+    g.model_version = state.version
+    return static_response(static_cache.get(
+        "examples", state.version, lambda: json_payload(state.examples)
+    ))
 
 
 @app.route("/predict", methods=["POST"])
 def predict():
     try:
-        data = request.get_json()
+        with stage("parse"):
+            data = request.get_json()
         if not data:
             return jsonify({"error": "No se enviaron datos en el JSON"}), 400
 
-        # 🚨 Nueva validación: asegurar que sea un dict y que tenga al menos una feature válida
-        if not isinstance(data, dict):
-            return jsonify({"error": "El formato debe ser un diccionario JSON"}), 400
+        # Versión fija para toda la petición: esquema, modelo y caché de la misma
+        state = store.active
+        g.model_version = state.version
+        schema = state.schema
 
-        valid_features = set(feature_info["feature_names"])
-        provided_features = set(data.keys())
+        # Lote JSON: lista de filas o {feature: [valores]}
+        if isinstance(data, list) or (
+            isinstance(data, dict) and all(isinstance(v, list) for v in data.values())
+        ):
+            return predict_json_batch(data, state)
 
-        if not provided_features.issubset(valid_features):
-            return jsonify({
-                "error": "Se enviaron características inválidas",
-                "invalid_features": list(provided_features - valid_features)
-            }), 400
+        with stage("validate"):
+            # 🚨 Nueva validación: asegurar que sea un dict y que tenga al menos una feature válida
+            if not isinstance(data, dict):
+                return jsonify({"error": "El formato debe ser un diccionario JSON"}), 400
 
-        if len(provided_features) == 0:
-            return jsonify({"error": "No se enviaron características reconocidas"}), 400
+            unknown = schema.unknown_features(data)
+            if unknown:
+                return jsonify({
+                    "error": "Se enviaron características inválidas",
+                    "invalid_features": unknown
+                }), 400
 
-        # Convertir a DataFrame y asegurar todas las columnas
-        df = pd.DataFrame([data])
-        df = df.reindex(columns=feature_info["feature_names"], fill_value=0)
+            # Vector en el orden del modelo (features ausentes en 0)
+            row, errors = schema.row_from_dict(data)
+            if errors:
+                return jsonify({
+                    "error": "Valores inválidos en las características",
+                    "details": errors
+                }), 400
 
         logger.debug(f"/predict recibido con {len(data)} features")
 
-        prediction = model.predict(df)[0]
-        proba = model.predict_proba(df)[0].tolist()
+        tolerance = early_exit_tolerance()
+        early_exit = {}
+        with stage("inference"):
+            if tolerance is None:
+                label, proba = predict_row(row, state)
+            else:
+                # Sin caché ni micro-batching: la respuesta depende de la tolerancia
+                labels, probas, trees_used, bound = infer_early_exit(
+                    row.reshape(1, -1), tolerance, state=state
+                )
+                label, proba = labels[0], probas[0]
+                early_exit = {
+                    "trees_used": int(trees_used[0]),
+                    "trees_total": state.engine.n_estimators,
+                    "probability_error_bound": float(bound[0]),
+                }
+        count_rows(1)
 
-        return jsonify({
-            "input": data,
-            "prediction": int(prediction),
-            "probability": proba
-        }), 200
+        with stage("serialize"):
+            if wants_compact():
+                proba = proba.astype(np.float32)
+            return jsonify({
+                "input": data,
+                "prediction": int(label),
+                "probability": proba_to_list(proba),
+                **early_exit,
+                "model_version": state.version
+            }), 200
+    except Rejected as e:
+        return shed_response(e)
+    except InvalidParameter as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"Error en /predict: {str(e)}")
         return jsonify({"error": "Error en la predicción. Revisa los datos enviados."}), 400
 
+def validate_batch(chunk, state, row_offset=0, max_reported=MAX_REPORTED_ROWS, present=None):
+    """
+    Bloque del archivo (DataFrame de un CSV o matriz ya en el orden del
+    modelo) → (matriz, máscara de filas válidas, reporte de filas inválidas),
+    con el esquema de la versión `state`.
+    """
+    schema = state.schema
+    if isinstance(chunk, np.ndarray):
+        X, type_errors, source = chunk, None, None
+    else:
+        with stage("reindex", "predict_batch"):
+            X, type_errors, present = schema.frame_to_matrix(chunk)
+        source = chunk
+    with stage("validate", "predict_batch"):
+        valid, report = schema.validate_matrix(
+            X, type_errors, source, row_offset, max_reported, present
+        )
+    return X, valid, report
+
+
+def infer_valid(X, valid, compact=False, state=None):
+    """Evalúa solo las filas válidas; las inválidas quedan con etiqueta -1 y NaN."""
+    if valid.all():
+        return infer(X, compact=compact, state=state)
+    labels, probas = infer(X[valid], compact=compact, state=state)
+    all_labels = np.full(len(X), -1, dtype=labels.dtype)
+    all_probas = np.full((len(X), probas.shape[1]), np.nan, dtype=probas.dtype)
+    all_labels[valid], all_probas[valid] = labels, probas
+    return all_labels, all_probas
+
+
+def infer_valid_early_exit(X, valid, tolerance, compact=False, state=None):
+    """
+    `infer_early_exit` sobre las filas válidas. Además de etiquetas y
+    probabilidades devuelve el resumen para la respuesta: árboles usados por
+    fila (0 en las inválidas), promedio y mayor cota del error.
+    """
+    labels, probas, trees_used, bound = infer_early_exit(
+        X[valid], tolerance, compact=compact, state=state
+    )
+    all_labels = np.full(len(X), -1, dtype=labels.dtype)
+    all_probas = np.full((len(X), probas.shape[1]), np.nan, dtype=probas.dtype)
+    all_trees = np.zeros(len(X), dtype=np.int32)
+    all_labels[valid], all_probas[valid], all_trees[valid] = labels, probas, trees_used
+    summary = {
+        "tolerance": tolerance,
+        "trees_total": (state or store.active).engine.n_estimators,
+        "trees_used_mean": round(float(trees_used.mean()), 3),
+        "max_probability_error_bound": float(bound.max()),
+    }
+    return all_labels, all_probas, all_trees, summary
+
+
+def score_batch(X, valid, report, state, columns=None):
+    """Evalúa las filas válidas de un lote y arma la respuesta (400 si no hay ninguna)."""
+    n_invalid = int(len(X) - valid.sum())
+    if n_invalid == len(X):
+        return jsonify({
+            "error": "Ninguna fila del lote es válida",
+            "invalid_rows": n_invalid,
+            "errors": report,
+            **(columns or {})
+        }), 400
+
+    tolerance = early_exit_tolerance()
+    early_exit = None
+    with stage("inference"):
+        if tolerance is None:
+            labels, probas = infer_valid(X, valid, compact=wants_compact(), state=state)
+        else:
+            labels, probas, trees_used, summary = infer_valid_early_exit(
+                X, valid, tolerance, compact=wants_compact(), state=state
+            )
+            early_exit = (trees_used, summary)
+    count_rows(len(X) - n_invalid)
+    return batch_response(labels, probas, state, valid, report, columns, early_exit)
+
+
+def predict_json_batch(data, state):
+    """
+    /predict con varias filas: se arma una sola matriz en el orden del modelo
+    (columna a columna, sin DataFrame) y se evalúa en una llamada. La respuesta
+    es la misma que la de /predict/batch, en el orden de entrada.
+    """
+    schema = state.schema
+    if isinstance(data, list):
+        if not all(isinstance(record, dict) for record in data):
+            return jsonify({"error": "Cada fila del lote debe ser un diccionario JSON"}), 400
+        unknown = sorted(set().union(*data) - schema.index.keys())
+    else:
+        unknown = schema.unknown_features(data)
+        if len({len(values) for values in data.values()}) != 1:
+            return jsonify({"error": "Todas las columnas deben tener la misma cantidad de valores"}), 400
+    if unknown:
+        return jsonify({
+            "error": "Se enviaron características inválidas",
+            "invalid_features": unknown
+        }), 400
+
+    with stage("reindex"):
+        if isinstance(data, list):
+            X, type_errors, present = schema.records_to_matrix(data)
+        else:
+            X, type_errors, present = schema.columns_to_matrix(data, len(next(iter(data.values()))))
+    with stage("validate"):
+        valid, report = schema.validate_matrix(X, type_errors, data, present=present)
+    logger.debug(f"/predict recibido con un lote de {len(X)} filas")
+    take_rows(len(X))
+    return score_batch(X, valid, report, state)
+
+
+def stream_batch(chunks, fmt, compact, state, present=None):
+    """
+    Evalúa el archivo bloque a bloque (BATCH_CHUNK_ROWS filas) y emite cada
+    bloque apenas se evalúa: la memoria no crece con el tamaño del archivo.
+    Las filas inválidas se informan en su posición (NDJSON: {"row", "errors"};
+    CSV: columna `error`) y no detienen el resto del archivo.
+    """
+    try:
+        yield stream_header(fmt, state.engine.classes_)
+
+        chunks = iter(chunks)
+        offset = 0
+        while True:
+            with stage("parse", "predict_batch"):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            X, valid, report = validate_batch(chunk, state, offset, len(chunk), present)
+            offset += len(X)
+            # En stream los bloques esperan su turno en vez de rechazarse
+            take_rows(len(X), wait=True)
+            if not valid.any():
+                labels, probas = None, None
+            else:
+                with stage("inference", "predict_batch"):
+                    labels, probas = infer_valid(X, valid, compact=compact, state=state)
+                count_rows(int(valid.sum()), "predict_batch")
+
+            with stage("serialize", "predict_batch"):
+                block = encode_stream_block(
+                    fmt, labels, probas, report, offset - len(X), len(state.engine.classes_)
+                )
+            yield block
+    except Exception as e:
+        # Los encabezados ya se enviaron: el error se reporta como última línea
+        logger.error(f"Error en /predict/batch (stream): {str(e)}")
+        message = "Error al procesar el archivo. Revisa el formato."
+        yield (f"error,{message}\n" if fmt == "csv"
+               else json.dumps({"error": message}) + "\n")
+
+
+def batch_response(labels, probas, state, valid=None, report=(), columns=None,
+                   early_exit=None):
+    """
+    Respuesta de /predict/batch en la codificación pedida con `Accept`
+    (JSON por filas si no se pide otra). Informa el tiempo de serialización
+    en `Server-Timing` y el tamaño en `Content-Length`.
+
+    Las filas inválidas van en orden con predicción nula en JSON (y el
+    reporte en `errors`); en las codificaciones binarias llevan etiqueta -1
+    y probabilidades NaN, y su cantidad en `X-Invalid-Rows`.
+
+    Con salida anticipada (`early_exit` = (árboles por fila, resumen)) el JSON
+    lleva `trees_used` por fila y el resumen en `early_exit`; las binarias,
+    el promedio en `X-Trees-Used-Mean` y el total en `X-Trees-Total`.
+    """
+    n_invalid = 0 if valid is None else int(len(valid) - valid.sum())
+    mimetype = request.accept_mimetypes.best_match(
+        ["application/json", *available_encodings()], default="application/json"
+    )
+    started = time.perf_counter()
+    if mimetype == "application/json":
+        predictions, probabilities = labels.tolist(), proba_to_list(probas)
+        payload = {"predictions": predictions, "probabilities": probabilities}
+        if n_invalid:
+            for i in np.flatnonzero(~valid):
+                predictions[i] = probabilities[i] = None
+        if valid is not None:
+            payload.update(invalid_rows=n_invalid, errors=list(report),
+                           errors_truncated=len(report) < n_invalid, **(columns or {}))
+        if early_exit is not None:
+            trees_used, summary = early_exit
+            payload.update(trees_used=trees_used.tolist(), early_exit=summary)
+            if n_invalid:
+                for i in np.flatnonzero(~valid):
+                    payload["trees_used"][i] = None
+        response = jsonify({**payload, "model_version": state.version})
+    else:
+        body, headers = ENCODERS[mimetype](labels, probas, state.engine.classes_)
+        response = Response(body, mimetype=mimetype, headers=headers)
+        response.headers["X-Invalid-Rows"] = str(n_invalid)
+        if early_exit is not None:
+            summary = early_exit[1]
+            response.headers["X-Trees-Used-Mean"] = str(summary["trees_used_mean"])
+            response.headers["X-Trees-Total"] = str(summary["trees_total"])
+    elapsed = time.perf_counter() - started
+    elapsed_ms = elapsed * 1000
+    telemetry.observe("api_stage_seconds", elapsed,
+                      {"endpoint": request.endpoint, "stage": "serialize"})
+
+    response.headers["Server-Timing"] = f"serialize;dur={elapsed_ms:.3f}"
+    logger.debug(
+        f"/predict/batch serializado como {mimetype}: "
+        f"{response.content_length} bytes en {elapsed_ms:.1f} ms"
+    )
+    return response
+
+
+def batch_upload():
+    """Archivo de la petición: campo multipart `file` o cuerpo binario crudo."""
+    if "file" in request.files:
+        file = request.files["file"]
+        return file.stream, detect_format(file.mimetype, file.filename)
+    if request.mimetype in CONTENT_TYPES:
+        return spool_stream(request.stream), CONTENT_TYPES[request.mimetype]
+    return None, None
+
+
 @app.route("/predict/batch", methods=["POST"])
 def predict_batch():
     try:
-        if "file" not in request.files:
+        with stage("parse"):
+            stream, input_fmt = batch_upload()
+        if stream is None:
             return jsonify({"error": "No se encontró archivo en la petición"}), 400
 
-        file = request.files["file"]
-        df = pd.read_csv(file)
+        fmt = request.args.get("stream")
+        if fmt is not None and fmt not in STREAM_FORMATS:
+            return jsonify({
+                "error": "Formato de stream no soportado",
+                "supported": list(STREAM_FORMATS)
+            }), 400
 
-        df = df.reindex(columns=feature_info["feature_names"], fill_value=0)
+        state = store.active
+        g.model_version = state.version
 
-        predictions = model.predict(df).tolist()
-        probas = model.predict_proba(df).tolist()
+        feature_names = state.schema.feature_names
+        columns = present = None
+        if input_fmt == "csv":
+            if fmt is not None:
+                chunks = iter_csv_chunks(stream, BATCH_CHUNK_ROWS)
+            else:
+                with stage("parse"):
+                    batch = pd.read_csv(stream)
+                columns = state.schema.column_report(batch.columns)
+        else:
+            # Los formatos binarios se leen ya en el orden del modelo
+            with stage("parse"):
+                batch, present = read_matrix(
+                    upload_buffer(stream), input_fmt, feature_names, return_columns=True
+                )
+            chunks = iter_chunks(batch, BATCH_CHUNK_ROWS)
 
-        return jsonify({
-            "predictions": predictions,
-            "probabilities": probas
-        })
+        if fmt is not None:
+            if early_exit_tolerance() is not None:
+                raise InvalidParameter("La salida anticipada no está disponible con ?stream")
+            return Response(
+                stream_with_context(stream_batch(chunks, fmt, wants_compact(), state, present)),
+                mimetype=STREAM_FORMATS[fmt]
+            )
+
+        X, valid, report = validate_batch(batch, state, present=present)
+        take_rows(len(X))
+        return score_batch(X, valid, report, state, columns)
+    except Rejected as e:
+        return shed_response(e)
+    except InvalidParameter as e:
+        return jsonify({"error": str(e)}), 400
+    except UnsupportedFormat as e:
+        return jsonify({"error": str(e)}), 415
     except Exception as e:
         logger.error(f"Error en /predict/batch: {str(e)}")
-        return jsonify({"error": "Error al procesar el archivo. Revisa el formato CSV."}), 400
+        return jsonify({"error": "Error al procesar el archivo. Revisa el formato (CSV, Parquet, Arrow o .npy)."}), 400
+
+
+# === TRABAJOS POR LOTES ===
+jobs = JobStore(JOBS_DIR)
+
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """Guarda el archivo y lo encola; no se evalúa dentro de la petición."""
+    try:
+        stream, input_fmt = batch_upload()
+        if stream is None:
+            return jsonify({"error": "No se encontró archivo en la petición"}), 400
+
+        result_fmt = request.args.get("format", "csv")
+        if result_fmt not in RESULT_TYPES:
+            return jsonify({
+                "error": "Formato de resultado no soportado",
+                "supported": list(RESULT_TYPES)
+            }), 400
+
+        job_id = jobs.create(stream, input_fmt, result_fmt, JOBS_CHUNK_ROWS)
+        logger.info(f"Trabajo {job_id} encolado ({input_fmt} → {result_fmt})")
+        return jsonify({
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/jobs/{job_id}",
+            "result_url": f"/jobs/{job_id}/result"
+        }), 202
+    except UnsupportedFormat as e:
+        return jsonify({"error": str(e)}), 415
+    except Exception as e:
+        logger.error(f"Error en /jobs: {str(e)}")
+        return jsonify({"error": "No se pudo encolar el trabajo"}), 500
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    status = jobs.status(job_id)
+    if status is None:
+        return jsonify({"error": "Trabajo no encontrado"}), 404
+    if status["status"] == "done":
+        status["result_url"] = f"/jobs/{job_id}/result"
+    return jsonify(status)
+
+
+@app.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    status = jobs.status(job_id)
+    if status is None:
+        return jsonify({"error": "Trabajo no encontrado"}), 404
+    if status["status"] != "done":
+        return jsonify({"error": "El trabajo aún no terminó", **status}), 409
+    response = Response(jobs.iter_result(job_id), mimetype=RESULT_TYPES[status["result_format"]])
+    response.headers["Content-Disposition"] = (
+        f"attachment; filename=predictions-{job_id}.{status['result_format']}"
+    )
+    response.headers["X-Model-Version"] = status["model_version"]
+    return response
+
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def delete_job(job_id):
+    if jobs.get(job_id) is None:
+        return jsonify({"error": "Trabajo no encontrado"}), 404
+    jobs.delete(job_id)
+    return jsonify({"deleted": job_id})
+
+
+@app.route("/microbatch/stats", methods=["GET"])
+def microbatch_stats():
+    if batcher is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **batcher.stats()})
+
+
+@app.route("/admission/stats", methods=["GET"])
+def admission_stats():
+    if admission is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **admission.stats()})
+
+
+@app.route("/static/stats", methods=["GET"])
+def static_stats():
+    return jsonify({**static_cache.stats(), "image_variants": image_variants.stats()})
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(telemetry.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    if cache is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **cache.stats()})
 
 
 @app.route("/visualizations/<filename>", methods=["GET"])
 def get_visualization(filename):
+    path = safe_join(str(VISUALIZATIONS_DIR), filename)
     try:
-        return send_from_directory(VISUALIZATIONS_DIR, filename)
-    except Exception as e:
-        logger.error(f"Error al acceder a visualización {filename}: {str(e)}")
+        stat = os.stat(path) if path is not None else None
+    except OSError:
+        stat = None
+    if stat is None or not os.path.isfile(path):
+        logger.error(f"Error al acceder a visualización {filename}")
         return jsonify({"error": "Visualización no encontrada"}), 404
 
+    width = request.args.get("width")
+    if width is not None:
+        # ?width=abc no se ignora: se rechaza como cualquier ancho inválido
+        if not (width.isascii() and width.isdigit()) or int(width) <= 0:
+            return jsonify({"error": "El ancho debe ser un entero positivo"}), 400
+        width = int(width)
+    fmt = request.args.get("format")
+    negotiated = False
+    if width is None and fmt is None:
+        def build():
+            with open(path, "rb") as f:
+                body = f.read()
+            mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            return StaticPayload(body, mimetype, last_modified=stat.st_mtime)
+
+        key = ("visualization", filename)
+    else:
+        # Variante redimensionada y/o recodificada, desde la caché en disco
+        supported = image_variants.formats
+        if fmt not in (None, "auto") and fmt not in supported:
+            return jsonify({
+                "error": "Formato de imagen no soportado",
+                "supported": ["auto", *supported]
+            }), 400
+        negotiated = fmt in (None, "auto")
+        if negotiated:
+            fmt = image_variants.negotiate(request.accept_mimetypes)
+        width = image_variants.snap_width(width or VISUALIZATION_WIDTHS[-1])
+
+        def build():
+            body = image_variants.get(path, width, fmt)
+            return StaticPayload(body, IMAGE_FORMATS[fmt][0], last_modified=stat.st_mtime)
+
+        key = ("visualization", filename, width, fmt)
+
+    # Una imagen regenerada (otro mtime o tamaño) reemplaza a la guardada
+    response = static_response(
+        static_cache.get(key, (stat.st_mtime_ns, stat.st_size), build)
+    )
+    if negotiated:
+        response.vary.add("Accept")
+    return response
+
 
 # === MAIN ===
 if __name__ == "__main__":
-    app.run(debug=LOG_LEVEL, host="0.0.0.0", port=5000)
\ No newline at end of file
+    app.run(debug=LOG_LEVEL, host="0.0.0.0", port=int(os.getenv("API_PORT", "5000")))
\ No newline at end of file
@@ -0,0 +1,69 @@
+"""
+===========================================================
+📌 jobs_worker.py — Proceso de trabajos de predicción por lotes
+===========================================================
+
+Toma los trabajos que la API encola en `POST /jobs` y evalúa sus
+bloques en un pool de procesos de baja prioridad. Se ejecuta
+aparte de la API, en el mismo nodo y con el mismo `JOBS_DIR`:
+
+    python api/jobs_worker.py
+
+Variables de entorno:
+- JOBS_DIR            → carpeta de la cola (por defecto artifacts/jobs)
+- JOBS_WORKERS        → procesos del pool (por defecto núcleos - 1)
+- JOBS_NICE           → prioridad de los procesos del pool (por defecto 10)
+- JOBS_STALE_SECONDS  → sin señales por este tiempo, otro proceso retoma el trabajo
+===========================================================
+"""
+# === IMPORTACIONES ===
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+# 🔧 FIX: importar utils aunque corras desde /api
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.batch_jobs import JobRunner, JobStore
+
+# === CONFIGURACIÓN ===
+ARTIFACTS_DIR = BASE_DIR / "artifacts"
+MODEL_PATH = ARTIFACTS_DIR / "model" / "model.pkl"
+FOREST_PATH = ARTIFACTS_DIR / "model" / "forest.bin"
+FEATURE_INFO_PATH = ARTIFACTS_DIR / "info" / "feature_info.json"
+METRICS_PATH = ARTIFACTS_DIR / "info" / "model_metrics.json"
+
+JOBS_DIR = Path(os.getenv("JOBS_DIR", ARTIFACTS_DIR / "jobs"))
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "0")) or None
+JOBS_NICE = int(os.getenv("JOBS_NICE", "10"))
+JOBS_STALE_SECONDS = float(os.getenv("JOBS_STALE_SECONDS", "60"))
+SCHEMA_BOUNDS_MARGIN = float(os.getenv("SCHEMA_BOUNDS_MARGIN", "1.0"))
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger("jobs_worker")
+
+
+# === MAIN ===
+if __name__ == "__main__":
+    with open(FEATURE_INFO_PATH) as f:
+        feature_info = json.load(f)
+
+    runner = JobRunner(
+        JobStore(JOBS_DIR), feature_info,
+        model_paths={
+            "model_dir": MODEL_PATH.parent, "fallback_model": MODEL_PATH,
+            "fallback_metrics": METRICS_PATH, "fallback_forest": FOREST_PATH,
+        },
+        logger=logger, workers=JOBS_WORKERS, bounds_margin=SCHEMA_BOUNDS_MARGIN,
+        nice=JOBS_NICE, stale_seconds=JOBS_STALE_SECONDS,
+    )
+    logger.info(f"🚀 Procesando trabajos de {JOBS_DIR} con {runner.workers} procesos")
+    try:
+        runner.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runner.close()
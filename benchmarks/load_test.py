@@ -0,0 +1,388 @@
+"""
+===========================================================
+📌 load_test.py — Prueba de carga y latencia de la API
+===========================================================
+
+Levanta la API en local (servidor de desarrollo de Flask o
+gunicorn con workers sync o con hilos), la somete a carga con
+concurrencia y tamaño de lote configurables y guarda en JSON:
+
+- throughput (peticiones y filas por segundo),
+- latencia p50 / p95 / p99 / máxima en milisegundos,
+- CPU y RSS del servidor (proceso principal + workers).
+
+Escenarios:
+- predict → /predict con los casos de example_cases.json
+- batch   → /predict/batch con un CSV de `--rows` filas
+- static  → /health, /model/info, /examples y una visualización
+- replay  → tráfico grabado en JSONL, una petición por línea:
+  {"method": "POST", "path": "/predict", "json": {...}}
+  {"method": "POST", "path": "/predict/batch", "data": "...csv...",
+   "content_type": "text/csv"}
+
+Con `--baseline` compara contra un resultado anterior y termina
+con código 1 si el throughput o el p99 empeoran más que
+`--max-regression`.
+
+Uso:
+    python benchmarks/load_test.py --server threaded --workers 4 \\
+        --scenarios predict,batch --concurrency 1,8,32 \\
+        --output benchmarks/results/threaded.json
+===========================================================
+"""
+# === IMPORTACIONES ===
+import argparse
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import requests
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+EXAMPLES_PATH = BASE_DIR / "artifacts" / "info" / "example_cases.json"
+FEATURE_INFO_PATH = BASE_DIR / "artifacts" / "info" / "feature_info.json"
+VISUALIZATIONS_DIR = BASE_DIR / "artifacts" / "visualizations"
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+# === 1. SERVIDOR ===
+def start_server(kind, port, workers, threads):
+    """Arranca la API y devuelve el proceso (None si `kind` es external)."""
+    if kind == "external":
+        return None
+    env = dict(os.environ, API_PORT=str(port), PYTHONUNBUFFERED="1")
+    if kind == "dev":
+        cmd = [sys.executable, "api/api.py"]
+    else:
+        cmd = [
+            sys.executable, "-m", "gunicorn", "-c", "docker/gunicorn.conf.py",
+            "--bind", f"127.0.0.1:{port}", "--workers", str(workers),
+            "--threads", str(threads if kind == "threaded" else 1),
+            "api.api:app",
+        ]
+    return subprocess.Popen(
+        cmd, cwd=BASE_DIR, env=env, start_new_session=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_ready(url, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError("El servidor terminó antes de estar listo")
+        try:
+            if requests.get(f"{url}/health", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"La API no respondió en {timeout}s")
+
+
+def stop_server(process):
+    if process is None:
+        return
+    # Señal a todo el grupo: el reloader de Flask y los workers de gunicorn
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+# === 2. CPU Y MEMORIA DEL SERVIDOR (/proc, solo Linux) ===
+def process_tree(pid):
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        for task in Path(f"/proc/{current}/task").glob("*"):
+            try:
+                pending.extend(int(c) for c in (task / "children").read_text().split())
+            except OSError:
+                continue
+    return pids
+
+
+def tree_usage(pid):
+    """(segundos de CPU, RSS en bytes) sumando el proceso y sus hijos."""
+    cpu, rss = 0.0, 0
+    for child in process_tree(pid):
+        try:
+            stat = Path(f"/proc/{child}/stat").read_text()
+            fields = stat[stat.rindex(")") + 2:].split()
+            cpu += (int(fields[11]) + int(fields[12])) / CLK_TCK
+            rss += int(Path(f"/proc/{child}/statm").read_text().split()[1]) * PAGE_SIZE
+        except (OSError, ValueError, IndexError):
+            continue
+    return cpu, rss
+
+
+class ResourceSampler:
+    """Mide CPU consumida y RSS máximo del servidor durante un escenario."""
+
+    def __init__(self, process, interval=0.2):
+        self.pid = process.pid if process is not None else None
+        self.interval = interval
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if self.pid is not None and Path("/proc").exists():
+            self.cpu_start, self.peak_rss = tree_usage(self.pid)
+            self.started = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, tree_usage(self.pid)[1])
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is None:
+            self.result = None
+            return
+        self._thread.join()
+        cpu_end, rss = tree_usage(self.pid)
+        elapsed = time.perf_counter() - self.started
+        cpu = cpu_end - self.cpu_start
+        self.result = {
+            "cpu_seconds": round(cpu, 3),
+            "cpu_percent": round(100 * cpu / elapsed, 1) if elapsed else None,
+            "rss_mb": round(rss / 1024 ** 2, 1),
+            "peak_rss_mb": round(max(self.peak_rss, rss) / 1024 ** 2, 1),
+        }
+
+
+# === 3. ESCENARIOS ===
+def load_examples():
+    with open(EXAMPLES_PATH) as f:
+        return list(json.load(f).values())
+
+
+def build_batch_csv(rows):
+    """CSV con `rows` filas tomadas cíclicamente de los casos de ejemplo."""
+    with open(FEATURE_INFO_PATH) as f:
+        feature_names = json.load(f)["feature_names"]
+    cases = load_examples()
+    lines = [",".join(feature_names)]
+    for i in range(rows):
+        case = cases[i % len(cases)]
+        lines.append(",".join(str(case.get(name, 0)) for name in feature_names))
+    return "\n".join(lines) + "\n"
+
+
+def load_replay(path):
+    requests_ = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                requests_.append(json.loads(line))
+    if not requests_:
+        raise ValueError(f"No hay peticiones en {path}")
+    return requests_
+
+
+def scenario_requests(name, rows, replay_path):
+    """Lista de peticiones (dicts como en el JSONL de replay) y filas por petición."""
+    if name == "predict":
+        return [{"method": "POST", "path": "/predict", "json": c} for c in load_examples()]
+    if name == "batch":
+        return [{
+            "method": "POST", "path": "/predict/batch", "rows": rows,
+            "files": {"file": ("batch.csv", build_batch_csv(rows), "text/csv")},
+        }]
+    if name == "static":
+        paths = ["/health", "/model/info", "/examples"]
+        images = sorted(VISUALIZATIONS_DIR.glob("*.png"))
+        if images:
+            paths.append(f"/visualizations/{images[0].name}")
+        return [{"method": "GET", "path": p} for p in paths]
+    if name == "replay":
+        if replay_path is None:
+            raise ValueError("El escenario replay necesita --replay")
+        return load_replay(replay_path)
+    raise ValueError(f"Escenario desconocido: {name}")
+
+
+def send(session, url, spec):
+    kwargs = {}
+    if "json" in spec:
+        kwargs["json"] = spec["json"]
+    if "data" in spec:
+        kwargs["data"] = spec["data"].encode()
+        kwargs["headers"] = {"Content-Type": spec.get("content_type", "text/plain")}
+    if "files" in spec:
+        kwargs["files"] = spec["files"]
+    kwargs.setdefault("headers", {}).update(spec.get("headers", {}))
+
+    started = time.perf_counter()
+    response = session.request(spec.get("method", "GET"), url + spec["path"], **kwargs)
+    response.content  # incluir la descarga del cuerpo en la latencia
+    return time.perf_counter() - started, response.status_code
+
+
+def run_scenario(url, specs, concurrency, total, warmup):
+    """Envía `total` peticiones con `concurrency` clientes en paralelo."""
+    local = threading.local()
+
+    def session():
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return local.session
+
+    def task(i):
+        return send(session(), url, specs[i % len(specs)])
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(task, range(warmup)))
+        started = time.perf_counter()
+        results = list(pool.map(task, range(total)))
+        elapsed = time.perf_counter() - started
+
+    latencies = np.array([r[0] for r in results]) * 1000
+    errors = sum(status >= 400 for _, status in results)
+    # Descartes del control de admisión (503/429): cuentan como errores
+    shed = sum(status in (429, 503) for _, status in results)
+    rows = sum(specs[i % len(specs)].get("rows", 1) for i in range(total))
+    return {
+        "requests": total,
+        "errors": errors,
+        "shed": shed,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1),
+        "rows_per_s": round(rows / elapsed, 1),
+        "latency_ms": {
+            "mean": round(float(latencies.mean()), 3),
+            "p50": round(float(np.percentile(latencies, 50)), 3),
+            "p95": round(float(np.percentile(latencies, 95)), 3),
+            "p99": round(float(np.percentile(latencies, 99)), 3),
+            "max": round(float(latencies.max()), 3),
+        },
+    }
+
+
+# === 4. COMPARACIÓN CON BASELINE ===
+def compare(results, baseline, max_regression):
+    """Imprime la variación por escenario y devuelve las regresiones."""
+    previous = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    for current in results:
+        key = (current["scenario"], current["concurrency"])
+        if key not in previous:
+            continue
+        old = previous[key]
+        rps = current["throughput_rps"] / old["throughput_rps"] - 1
+        p99 = current["latency_ms"]["p99"] / old["latency_ms"]["p99"] - 1
+        print(f"   {key[0]:>8} c={key[1]:<4} throughput {rps:+.1%}   p99 {p99:+.1%}")
+        if rps < -max_regression or p99 > max_regression:
+            regressions.append(key)
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API")
+    parser.add_argument("--server", choices=["dev", "sync", "threaded", "external"],
+                        default="dev", help="Servidor a levantar (external = usar --url)")
+    parser.add_argument("--url", default=None, help="URL de una API ya levantada")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--workers", type=int, default=2, help="Workers de gunicorn")
+    parser.add_argument("--threads", type=int, default=4, help="Hilos por worker (threaded)")
+    parser.add_argument("--scenarios", default="predict,batch,static")
+    parser.add_argument("--concurrency", default="1,8", help="Lista separada por comas")
+    parser.add_argument("--requests", type=int, default=500, help="Peticiones por medición")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=1000, help="Filas por lote en batch")
+    parser.add_argument("--replay", type=Path, default=None, help="JSONL de tráfico grabado")
+    parser.add_argument("--output", type=Path, default=None, help="Archivo JSON de resultados")
+    parser.add_argument("--baseline", type=Path, default=None, help="Resultados anteriores")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="Empeoramiento tolerado frente al baseline (0.10 = 10%%)")
+    return parser.parse_args(argv)
+
+
+# === MAIN ===
+def main(argv=None):
+    args = parse_args(argv)
+    url = args.url or f"http://127.0.0.1:{args.port}"
+    if args.server == "external" and args.url is None:
+        raise SystemExit("--server external necesita --url")
+
+    print(f"🚀 Levantando servidor '{args.server}' en {url}")
+    process = start_server(args.server, args.port, args.workers, args.threads)
+    results = []
+    try:
+        wait_until_ready(url, process)
+        for scenario in args.scenarios.split(","):
+            specs = scenario_requests(scenario.strip(), args.rows, args.replay)
+            for concurrency in (int(c) for c in args.concurrency.split(",")):
+                with ResourceSampler(process) as sampler:
+                    result = run_scenario(url, specs, concurrency, args.requests, args.warmup)
+                result = {"scenario": scenario, "concurrency": concurrency,
+                          **result, "server": sampler.result}
+                results.append(result)
+                lat = result["latency_ms"]
+                print(f"   {scenario:>8} c={concurrency:<4} {result['throughput_rps']:>9} req/s"
+                      f"   p50 {lat['p50']} ms   p95 {lat['p95']} ms   p99 {lat['p99']} ms"
+                      f"   errores {result['errors']} (descartes {result['shed']})")
+    finally:
+        stop_server(process)
+
+    report = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "server": args.server,
+            "workers": args.workers if args.server in ("sync", "threaded") else 1,
+            "threads": args.threads if args.server == "threaded" else 1,
+            "rows_per_batch": args.rows,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"✅ Resultados guardados en {args.output}")
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"📊 Comparación con {args.baseline}")
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print(f"❌ Regresión mayor a {args.max_regression:.0%} en {regressions}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+===========================================================
+📌 microbench.py — Microbenchmarks con baseline versionado
+===========================================================
+
+Mide funciones internas de la API (validación, reindexado,
+inferencia, parseo de CSV, serialización) y las compara con un
+baseline guardado en `benchmarks/baselines/microbench-v<N>.json`.
+
+- Cada medición es la mediana de varias rondas; cada ronda
+  repite la función hasta durar al menos `MIN_ROUND_SECONDS`.
+- `BASELINE_VERSION` se incrementa cuando cambian las funciones
+  medidas o sus datos: un baseline de otra versión no se compara.
+- Los tiempos dependen de la máquina: el baseline registra en qué
+  equipo se midió y conviene regenerarlo en el equipo de CI.
+===========================================================
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+BASELINES_DIR = BASE_DIR / "benchmarks" / "baselines"
+
+BASELINE_VERSION = 2
+MIN_ROUND_SECONDS = 0.02
+ROUNDS = 7
+
+
+def measure(fn, rounds=ROUNDS, min_round_seconds=MIN_ROUND_SECONDS):
+    """Mediana del tiempo por llamada de `fn()` en segundos."""
+    fn()  # calentamiento: cachés, imports perezosos
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_round_seconds:
+            break
+        number *= 2
+
+    samples = [elapsed / number]
+    for _ in range(rounds - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) / number)
+    return statistics.median(samples)
+
+
+def baseline_path(version=BASELINE_VERSION):
+    return BASELINES_DIR / f"microbench-v{version}.json"
+
+
+def load_baseline(path=None):
+    """Tiempos del baseline ({nombre: segundos}) o None si no existe."""
+    path = Path(path) if path else baseline_path()
+    if not path.exists():
+        return None
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("version") != BASELINE_VERSION:
+        return None
+    return data["results"]
+
+
+def save_baseline(results, path=None):
+    path = Path(path) if path else baseline_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    data = {
+        "version": BASELINE_VERSION,
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": commit,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "processor": platform.processor() or None,
+            "cpu_count": os.cpu_count(),
+        },
+        "results": {name: results[name] for name in sorted(results)},
+    }
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp, path)
+
+
+def slowdown(current, baseline):
+    """Variación relativa frente al baseline (0.25 = 25 % más lento)."""
+    return current / baseline - 1
@@ -0,0 +1,36 @@
+# ===========================================================
+# 📌 gunicorn.conf.py — Configuración de gunicorn para la API
+# ===========================================================
+# Un worker por núcleo. La app se carga una sola vez antes del
+# fork (preload_app) y se congela el recolector de basura para
+# no romper el copy-on-write de los objetos ya cargados; los
+# arreglos del bosque viven en forest.bin mapeado en memoria y
+# todos los workers comparten las mismas páginas físicas.
+#
+# Workers con hilos (gthread): el control de admisión de la API
+# limita y encola por proceso, y con un solo hilo por worker sus
+# carriles nunca llegarían a actuar.
+# ===========================================================
+
+import gc
+import multiprocessing
+import os
+import shutil
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+
+def when_ready(server):
+    # Objetos creados al cargar la app: el GC no los vuelve a tocar
+    gc.freeze()
+
+
+# Métricas de todos los workers en una carpeta común (ver /metrics).
+# Se vacía aquí, antes de cargar la app: los archivos de una ejecución
+# anterior inflarían los contadores.
+os.environ.setdefault("METRICS_DIR", "/tmp/api-metrics")
+shutil.rmtree(os.environ["METRICS_DIR"], ignore_errors=True)
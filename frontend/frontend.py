@@ -118,7 +118,7 @@ def predict_single(payload: dict):
     except Exception as e:
         return False, {"error": str(e)}
 
-def viz_url(name: str) -> str:
+def viz_url(name: str, width: int = None) -> str:
     # Para endpoints normales, usa API_URL
     base = API_URL
 
@@ -126,12 +126,20 @@ def viz_url(name: str) -> str:
     if "visualizations" in name or name.endswith(".png"):
         base = "http://localhost:5000"
 
-    return f"{base}/visualizations/{name}"
+    # Con la versión del modelo en la URL, el navegador guarda la imagen
+    # como inmutable y solo la vuelve a pedir cuando hay un modelo nuevo
+    info = get_model_info()
+    version = info.get("model_version") if info else None
+    params = {"v": version, "width": width}
+    query = "&".join(f"{k}={v}" for k, v in params.items() if v)
+    return f"{base}/visualizations/{name}" + (f"?{query}" if query else "")
 
 # === Helper para imágenes con tema ===
-def themed_viz(name: str) -> str:
+# Ancho pedido a la API: las gráficas originales miden 1500-2400 px y aquí
+# se muestran en columnas de ~350 px (640 cubre pantallas 2x); llegan en WebP o AVIF
+def themed_viz(name: str, width: int = 640) -> str:
     theme = "dark" if st.session_state["dark_mode"] else "light"
-    return viz_url(f"{name}_{theme}.png")
+    return viz_url(f"{name}_{theme}.png", width)
 
 # === Helpers de UI ===
 def feature_display_name(f: str) -> str:
@@ -280,14 +288,14 @@ elif page == "⚙️ Modelo y Rendimiento":
             st.image(themed_viz("roc_curve"), use_column_width=True)
 
         # --- Bloque de interpretación (adaptado a light/dark) ---
-        st.markdown("""
+        st.markdown(f"""
         <div class="metric-card">
             <strong>📝 Interpretación de Resultados</strong><br><br>
             El modelo entrenado logra distinguir con gran precisión entre <b>tumores benignos</b> y <b>malignos</b>:<br><br>
             🔹 <b>39 casos</b> fueron clasificados correctamente como <b>benignos</b> (verdaderos positivos).<br>
             🔹 <b>69 casos</b> fueron clasificados correctamente como <b>malignos</b> (verdaderos negativos).<br>
             🔹 Solo se observaron <b>6 errores en total</b> (3 benignos predichos como malignos y 3 malignos predichos como benignos).<br><br>
-            📊 La <b>Curva ROC</b> confirma este rendimiento: el área bajo la curva (<b>AUC = 0.994</b>) refleja una capacidad predictiva sobresaliente, cercana al 100%.<br><br>
+            📊 La <b>Curva ROC</b> confirma este rendimiento: el área bajo la curva (<b>AUC = {m.get('roc_auc', 0):.3f}</b>) refleja una capacidad predictiva sobresaliente, cercana al 100%.<br><br>
             ✅ En conclusión, el modelo es altamente confiable para identificar casos de cáncer de mama, aunque —como todo modelo— no está exento de un pequeño margen de error.
         </div>
         """, unsafe_allow_html=True)
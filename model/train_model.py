@@ -15,12 +15,13 @@ Este proyecto es con fines EDUCATIVOS y no constituye diagnóstico médico.
 # === IMPORTACIONES ===
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+import argparse
 import json
+import os
 import joblib
 from pathlib import Path
 from sklearn.datasets import load_breast_cancer
+from sklearn.utils import Bunch
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import (
@@ -33,17 +34,61 @@ import sys
 BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.append(str(BASE_DIR))  
 
+from utils import (
+    feature_names, feature_store, figures, forest_engine, forest_pruning, hparam_search, model_store
+)
+from utils.feature_store import StoreRows, build_store, fit_forest, source_fingerprint
 from utils.feature_names import FEATURE_TRANSLATIONS
+from utils.model_store import publish_version
+from utils.figures import render_figures
+from utils.forest_engine import FlatForest
+from utils.forest_pruning import prune_forest, score
+from utils.hparam_search import successive_halving
+from utils.pipeline import Pipeline
 
 # === CONFIGURACIÓN DE RUTAS ===
 BASE_DIR = Path(__file__).resolve().parent.parent
 ARTIFACTS_DIR = BASE_DIR / "artifacts"
 
 MODEL_PATH = ARTIFACTS_DIR / "model" / "model.pkl"
+FOREST_PATH = ARTIFACTS_DIR / "model" / "forest.bin"
 FEATURE_INFO_PATH = ARTIFACTS_DIR / "info" / "feature_info.json"
 METRICS_PATH = ARTIFACTS_DIR / "info" / "model_metrics.json"
 EXAMPLES_PATH = ARTIFACTS_DIR / "info" / "example_cases.json"
 VISUALIZATIONS_DIR = ARTIFACTS_DIR / "visualizations"
+SEARCH_RESULTS_PATH = ARTIFACTS_DIR / "info" / "search_results.json"
+PRUNING_REPORT_PATH = ARTIFACTS_DIR / "info" / "pruning_report.json"
+SEARCH_CACHE_DIR = ARTIFACTS_DIR / "cache" / "search"
+PIPELINE_CACHE_DIR = ARTIFACTS_DIR / "cache" / "pipeline"
+FIGURE_CACHE_DIR = ARTIFACTS_DIR / "cache" / "figures"
+FEATURE_STORE_DIR = ARTIFACTS_DIR / "cache" / "features"
+
+# Hiperparámetros sin búsqueda (con --search se reemplazan por los mejores)
+DEFAULT_PARAMS = {"n_estimators": 200, "max_depth": 6}
+# Procesos para entrenar el bosque final (-1: todos los núcleos)
+TRAIN_N_JOBS = int(os.getenv("TRAIN_N_JOBS", "-1"))
+# Procesos para dibujar las gráficas (0: todos los núcleos)
+VISUALIZATION_WORKERS = int(os.getenv("VISUALIZATION_WORKERS", "0")) or None
+
+# === PODA DEL BOSQUE (opcional) ===
+# Con PRUNE_ENABLED=true se conserva el subconjunto más chico de árboles cuyas
+# métricas OOB no caen más de PRUNE_METRIC_TOLERANCE respecto del bosque completo
+# (ver utils/forest_pruning.py). PRUNE_LATENCY_BUDGET_US (µs por fila en lote) y
+# PRUNE_SIZE_BUDGET_KB mandan sobre la tolerancia: si el subconjunto elegido no
+# los cumple se usa el más grande que sí, y si ninguno los cumple la etapa falla.
+PRUNE_ENABLED = os.getenv("PRUNE_ENABLED", "false").lower() == "true"
+PRUNE_METRIC_TOLERANCE = float(os.getenv("PRUNE_METRIC_TOLERANCE", "0.005"))
+PRUNE_LATENCY_BUDGET_US = float(os.getenv("PRUNE_LATENCY_BUDGET_US", "0")) or None
+PRUNE_SIZE_BUDGET_KB = float(os.getenv("PRUNE_SIZE_BUDGET_KB", "0")) or None
+
+# === ENTRENAMIENTO FUERA DE MEMORIA (--data) ===
+# Filas contiguas del almacén por fragmento: acota la memoria pico del entrenamiento
+TRAIN_SHARD_ROWS = int(os.getenv("TRAIN_SHARD_ROWS", "200000"))
+# Test: TEST_FRACTION de las filas, sin pasar de TRAIN_MAX_TEST_ROWS (se evalúa en memoria)
+TEST_FRACTION = 0.2
+TRAIN_MAX_TEST_ROWS = int(os.getenv("TRAIN_MAX_TEST_ROWS", "100000"))
+# Filas de la muestra en memoria para la matriz de correlación y la poda
+SAMPLE_ROWS = 10000
 
 # Crear subcarpetas si no existen
 for folder in [MODEL_PATH.parent, FEATURE_INFO_PATH.parent, VISUALIZATIONS_DIR]:
@@ -58,19 +103,102 @@ def load_data():
     return X, y, dataset
 
 
-# === 2. ENTRENAMIENTO ===
-def train_model(X, y):
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
+def split_data(data):
+    X, y, _ = data
+    return train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+
+def load_store(source, fingerprint, sample_rows):
+    """
+    Archivos de features en disco (CSV/Parquet con las columnas de
+    feature_info.json y `target`) → almacén mapeado en memoria. Devuelve
+    (muestra X, muestra y, dataset): la muestra alcanza para las gráficas y
+    el dataset lleva el almacén, nombres y rangos de todo el conjunto.
+    """
+    with open(FEATURE_INFO_PATH) as f:
+        info = json.load(f)
+    store = build_store(source, FEATURE_STORE_DIR, info["feature_names"], info["target_names"],
+                        fingerprint=fingerprint)
+    X, y = StoreRows(store, upper=min(1.0, sample_rows / store.n_rows)).collect()
+    dataset = Bunch(
+        feature_names=store.feature_names,
+        target_names=store.target_names,
+        feature_bounds=store.feature_bounds,
+        store=store,
     )
+    return pd.DataFrame(X, columns=store.feature_names), pd.Series(y), dataset
+
+
+def split_store(data, test_fraction, max_test_rows, seed):
+    """
+    División del almacén por hash del índice de fila. El test se carga en
+    memoria; el entrenamiento queda en disco como `StoreRows` (en lugar de
+    X_train) y se recorre por fragmentos, sin y_train aparte.
+    """
+    store = data[2].store
+    test_upper = min(test_fraction, max_test_rows / store.n_rows)
+    X_test, y_test = StoreRows(store, 0.0, test_upper, seed).collect()
+    X_test = pd.DataFrame(X_test.astype(np.float64), columns=store.feature_names)
+    return StoreRows(store, test_upper, 1.0, seed), X_test, None, pd.Series(y_test)
+
+
+# === 2. ENTRENAMIENTO ===
+def train_model(split, params, search=False, prune=None, search_workers=None):
+    """
+    Entrena el bosque (con los hiperparámetros de la búsqueda si `search`) y,
+    si `prune` trae la configuración, lo poda. Devuelve (modelo, reporte).
+    """
+    X_train, X_test, y_train, y_test = split
+
+    report = {}
+    if search:
+        search_report = search_params(X_train, y_train, search_workers)
+        params = search_report["best_params"]
+        report["search"] = {
+            name: search_report[name]
+            for name in ("best_params", "best", "wall_seconds", "tasks_evaluated", "tasks_cached")
+        }
 
     model = RandomForestClassifier(
-        n_estimators=200,
-        max_depth=6,
+        **params,
         random_state=42,
-        class_weight="balanced"
+        class_weight="balanced",
+        n_jobs=TRAIN_N_JOBS
     )
     model.fit(X_train, y_train)
+    # La API evalúa de a una petición: el modelo guardado no reparte en hilos
+    model.set_params(n_jobs=None)
+
+    if prune is not None:
+        model, report["pruning"] = prune_model(model, X_train, y_train, X_test, y_test, prune)
+
+    return model, report
+
+
+def train_from_store(split, params, prune=None, shard_rows=TRAIN_SHARD_ROWS):
+    """
+    Como `train_model`, pero el bosque crece por fragmentos del almacén
+    (utils/feature_store.py) y la poda usa la muestra OOB que devuelve el
+    entrenamiento. Devuelve (modelo, reporte).
+    """
+    train_rows, X_test, _, y_test = split
+    model, (X_sample, y_sample, oob), report = fit_forest(
+        train_rows, {**params, "random_state": 42, "n_jobs": TRAIN_N_JOBS}, shard_rows
+    )
+    report = {"out_of_core": report}
+    model.set_params(n_jobs=None)
+
+    if prune is not None:
+        model, report["pruning"] = prune_model(model, X_sample, y_sample, X_test, y_test, prune,
+                                               oob=oob)
+
+    return model, report
+
+
+def evaluate_model(trained, split):
+    """Métricas de test del modelo final: (métricas, predicciones, probabilidades)."""
+    model, report = trained
+    _, X_test, _, y_test = split
 
     # Predicciones
     y_pred = model.predict(X_test)
@@ -81,20 +209,92 @@ def train_model(X, y):
         "accuracy": accuracy_score(y_test, y_pred),
         "f1_score": f1_score(y_test, y_pred),
         "roc_auc": roc_auc_score(y_test, y_proba),
+        "n_estimators": len(model.estimators_),
+        **report,
     }
+    return metrics, y_pred, y_proba
+
+
+def search_params(X_train, y_train, workers=None):
+    """
+    Búsqueda por successive halving (utils/hparam_search.py) sobre el conjunto
+    de entrenamiento. Guarda todas las rondas en search_results.json.
+    """
+    report = successive_halving(X_train, y_train, SEARCH_CACHE_DIR, workers=workers)
+    with open(SEARCH_RESULTS_PATH, "w") as f:
+        json.dump(report, f, indent=4)
+    best = report["best"]
+    print(
+        f"🔎 Búsqueda: {report['tasks_evaluated']} evaluaciones nuevas, "
+        f"{report['tasks_cached']} desde caché, {report['wall_seconds']:.1f} s. "
+        f"Mejor {report['metric']}={best[report['metric']]:.4f} con {best['params']} "
+        f"({best['inference_us_per_row']:.1f} µs/fila)"
+    )
+    return report
 
-    return model, metrics, (X_test, y_test, y_pred, y_proba)
+
+def prune_settings():
+    """Configuración de la poda (None si está desactivada); es parte de la clave de `train`."""
+    if not PRUNE_ENABLED:
+        return None
+    return {
+        "tolerance": PRUNE_METRIC_TOLERANCE,
+        "latency_budget_us": PRUNE_LATENCY_BUDGET_US,
+        "size_budget_bytes": PRUNE_SIZE_BUDGET_KB * 1024 if PRUNE_SIZE_BUDGET_KB else None,
+    }
+
+
+def prune_model(model, X_train, y_train, X_test, y_test, settings, oob=None):
+    """
+    Poda el bosque al presupuesto configurado e imprime el resultado. El
+    reporte completo (curva y orden de los árboles) va a pruning_report.json;
+    devuelve el resumen que se guarda en model_metrics.json.
+    """
+    full_metrics = score(y_test, model.predict_proba(X_test))
+    pruned, report = prune_forest(model, X_train, y_train, X_test, y_test, **settings, oob=oob)
+    report["full_metrics"] = full_metrics
+    with open(PRUNING_REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=4)
+    chosen = next(p for p in report["curve"] if p["n_estimators"] == report["n_estimators"])
+    full = report["curve"][-1]
+    print(
+        f"🌲 Poda: {report['n_estimators']}/{report['n_estimators_full']} árboles "
+        f"({chosen['nbytes'] / 1024:.0f} KB, {chosen['batch_row_us']:.1f} µs/fila en lote; "
+        f"completo: {full['nbytes'] / 1024:.0f} KB, {full['batch_row_us']:.1f} µs/fila)"
+    )
+    if not report["budget_met"]:
+        print(f"⚠️ Ningún subconjunto dentro de la tolerancia cumple el presupuesto de "
+              f"latencia/tamaño: se usan {report['n_estimators']} árboles (el más grande que lo "
+              f"cumple) en vez de {report['n_estimators_tolerance']}; las métricas OOB caen "
+              f"más que PRUNE_METRIC_TOLERANCE")
+    summary = {name: value for name, value in report.items() if name not in ("curve", "tree_order")}
+    return pruned, summary
 
 
 # === 3. GUARDADO DEL MODELO Y METADATA ===
-def save_artifacts(model, dataset, metrics, X_test):
-    # Guardar modelo
-    joblib.dump(model, MODEL_PATH)
+def save_artifacts(trained, data, evaluation, split):
+    model, dataset, metrics, X_test = trained[0], data[2], evaluation[0], split[1]
+
+    # Guardar modelo (temporal + rename: la API nunca lee un archivo a medias)
+    tmp_path = MODEL_PATH.with_suffix(".pkl.tmp")
+    joblib.dump(model, tmp_path)
+    tmp_path.replace(MODEL_PATH)
 
-    # Guardar info de features
+    # Bosque aplanado: la API lo mapea en memoria y lo comparten todos los workers
+    FlatForest.from_sklearn(model).save(FOREST_PATH)
+
+    # Guardar info de features (con el rango observado de cada una: la API
+    # deriva de aquí los límites con los que valida las entradas). El almacén
+    # fuera de memoria ya trae los rangos de todas sus filas.
     feature_info = {
         "feature_names": list(dataset.feature_names),
-        "target_names": list(dataset.target_names)
+        "target_names": list(dataset.target_names),
+        "feature_bounds": dataset.get("feature_bounds") or {
+            name: {"min": float(low), "max": float(high)}
+            for name, low, high in zip(
+                dataset.feature_names, dataset.data.min(axis=0), dataset.data.max(axis=0)
+            )
+        }
     }
     with open(FEATURE_INFO_PATH, "w") as f:
         json.dump(feature_info, f, indent=4)
@@ -111,104 +311,20 @@ def save_artifacts(model, dataset, metrics, X_test):
     with open(EXAMPLES_PATH, "w") as f:
         json.dump(examples, f, indent=4)
 
-# === 4. VISUALIZACIONES ===
-def generate_visualizations(y_test, y_pred, y_proba, model, X):
-    from sklearn.metrics import confusion_matrix, roc_curve, roc_auc_score
-    import seaborn as sns
-    import matplotlib.pyplot as plt
-    import numpy as np
-
-    def save_confusion(cm, theme):
-        plt.figure(figsize=(6, 5))
-        cmap = "RdPu" if theme == "light" else "magma"
-        annot_color = "black" if theme == "light" else "white"
-        facecolor = "white" if theme == "light" else "black"
-
-        if theme == "dark":
-            plt.style.use("dark_background")
-
-        sns.heatmap(
-            cm, annot=True, fmt="d", cmap=cmap, cbar=True,
-            xticklabels=["Benigno", "Maligno"],
-            yticklabels=["Benigno", "Maligno"],
-            annot_kws={"color": annot_color}
-        )
-        plt.title("Matriz de Confusión — Clasificador de Cáncer de Mama",
-                  fontsize=14, pad=15, color=annot_color)
-        plt.xlabel("Predicción", fontsize=12, color=annot_color)
-        plt.ylabel("Real", fontsize=12, color=annot_color)
-        plt.tight_layout()
-        plt.savefig(VISUALIZATIONS_DIR / f"confusion_matrix_{theme}.png",
-                    dpi=150, facecolor=facecolor)
-        plt.close()
-
-    def save_roc(fpr, tpr, auc, theme):
-        plt.figure(figsize=(6, 5))
-        color = "deeppink" if theme == "light" else "cyan"
-        text_color = "black" if theme == "light" else "white"
-        facecolor = "white" if theme == "light" else "black"
-
-        if theme == "dark":
-            plt.style.use("dark_background")
-
-        plt.plot(fpr, tpr, color=color, linewidth=2, label=f"AUC = {auc:.2f}")
-        plt.plot([0, 1], [0, 1], linestyle="--", color="gray")
-        plt.xlabel("Tasa de Falsos Positivos", fontsize=12, color=text_color)
-        plt.ylabel("Tasa de Verdaderos Positivos", fontsize=12, color=text_color)
-        plt.title("Curva ROC — Clasificador de Cáncer de Mama",
-                  fontsize=14, pad=15, color=text_color)
-        plt.legend(loc="lower right")
-        plt.tight_layout()
-        plt.savefig(VISUALIZATIONS_DIR / f"roc_curve_{theme}.png",
-                    dpi=150, facecolor=facecolor)
-        plt.close()
-
-    def save_importance(importances, idx, X, theme):
-        plt.figure(figsize=(8, 6))
-        colors = (plt.cm.PuRd if theme == "light" else plt.cm.plasma)(
-            np.linspace(0.4, 0.9, len(idx))
-        )
-        text_color = "black" if theme == "light" else "white"
-        facecolor = "white" if theme == "light" else "black"
-
-        if theme == "dark":
-            plt.style.use("dark_background")
-
-        plt.barh(range(len(idx)), importances[idx], align="center", color=colors)
-        plt.yticks(
-            range(len(idx)),
-            [FEATURE_TRANSLATIONS.get(col, col) for col in np.array(X.columns)[idx]],
-            fontsize=10, color=text_color
-        )
-        plt.title("Top 10 Características más Importantes",
-                  fontsize=14, pad=15, color=text_color)
-        plt.xlabel("Importancia", fontsize=12, color=text_color)
-        plt.ylabel("Características", fontsize=12, color=text_color)
-        plt.tight_layout()
-        plt.savefig(VISUALIZATIONS_DIR / f"feature_importance_{theme}.png",
-                    dpi=150, facecolor=facecolor)
-        plt.close()
-
-    def save_correlation(corr, theme):
-        plt.figure(figsize=(12, 10))
-        cmap = "RdPu" if theme == "light" else "inferno"
-        text_color = "black" if theme == "light" else "white"
-        facecolor = "white" if theme == "light" else "black"
-
-        if theme == "dark":
-            plt.style.use("dark_background")
-
-        sns.heatmap(corr, cmap=cmap, center=0, xticklabels=True, yticklabels=True)
-        plt.title("Matriz de Correlación (Características)",
-                  fontsize=14, pad=15, color=text_color)
-        plt.xticks(rotation=90, ha="right", fontsize=8, color=text_color)
-        plt.yticks(rotation=0, fontsize=8, color=text_color)
-        plt.tight_layout()
-        plt.savefig(VISUALIZATIONS_DIR / f"correlation_matrix_{theme}.png",
-                    dpi=200, facecolor=facecolor)
-        plt.close()
+    # Publicar versión: la API la detecta por el manifiesto y la recarga en caliente
+    version = publish_version(MODEL_PATH.parent, MODEL_PATH, metrics, forest_file=FOREST_PATH,
+                              feature_info_file=FEATURE_INFO_PATH, examples_file=EXAMPLES_PATH)
+    print(f"📦 Versión publicada: {version}")
 
+# === 4. VISUALIZACIONES ===
+def generate_visualizations(evaluation, trained, data, split, workers=None):
+    """
+    Calcula los datos de cada gráfica; utils/figures.py las dibuja en ambos
+    temas en paralelo y reutiliza las que no cambiaron. Devuelve los tiempos.
+    """
     # === Datos para gráficas ===
+    _, y_pred, y_proba = evaluation
+    model, X, y_test = trained[0], data[0], split[3]
     cm = confusion_matrix(y_test, y_pred)
     fpr, tpr, _ = roc_curve(y_test, y_proba)
     auc = roc_auc_score(y_test, y_proba)
@@ -216,20 +332,100 @@ def generate_visualizations(y_test, y_pred, y_proba, model, X):
     idx = np.argsort(importances)[-10:]
     corr = X.corr()
 
-    # === Generar ambas versiones ===
-    for theme in ["light", "dark"]:
-        save_confusion(cm, theme)
-        save_roc(fpr, tpr, auc, theme)
-        save_importance(importances, idx, X, theme)
-        save_correlation(corr, theme)
+    payloads = {
+        "confusion_matrix": {"cm": cm},
+        "roc_curve": {"fpr": fpr, "tpr": tpr, "auc": float(auc)},
+        "feature_importance": {
+            "values": importances[idx],
+            "labels": [FEATURE_TRANSLATIONS.get(col, col) for col in np.array(X.columns)[idx]],
+        },
+        "correlation_matrix": {"corr": corr.to_numpy(), "labels": list(corr.columns)},
+    }
+    return render_figures(payloads, VISUALIZATIONS_DIR, FIGURE_CACHE_DIR, workers=workers)
+
+# === 5. GRAFO DE ETAPAS ===
+# Archivos que escribe cada etapa: si faltan o cambiaron, la etapa no sale de la caché
+SAVE_OUTPUTS = [MODEL_PATH, FOREST_PATH, FEATURE_INFO_PATH, METRICS_PATH, EXAMPLES_PATH,
+                MODEL_PATH.parent / model_store.MANIFEST_NAME]
+VISUALIZATION_OUTPUTS = [
+    VISUALIZATIONS_DIR / f"{name}_{theme}.png"
+    for name in figures.RENDERERS
+    for theme in figures.THEMES
+]
+
+
+def prune_outputs():
+    """El reporte de la poda es salida de `train` solo si la poda está activa."""
+    return [PRUNING_REPORT_PATH] if PRUNE_ENABLED else []
+
+
+def run_pipeline(force=None, search=False, search_workers=None, data_path=None):
+    """
+    carga → división → entrenamiento → evaluación → guardado y gráficas.
+    Cada etapa sale de la caché (artifacts/cache/pipeline/) si no cambiaron
+    su código, sus parámetros ni las etapas de las que depende.
+    Con `data_path` se entrena fuera de memoria desde esos archivos; la carga
+    se invalida cuando cambian (ruta, tamaño o fecha).
+    """
+    pipeline = Pipeline(PIPELINE_CACHE_DIR, force=force)
+    if data_path is None:
+        data = pipeline.run("load", load_data)
+        split = pipeline.run("split", split_data, data)
+        trained = pipeline.run(
+            "train", train_model, split,
+            params={"params": DEFAULT_PARAMS, "search": search, "prune": prune_settings()},
+            options={"search_workers": search_workers},
+            deps=(search_params, prune_model, forest_engine, forest_pruning, hparam_search),
+            outputs=prune_outputs(),
+        )
+    else:
+        fingerprint = source_fingerprint(data_path)
+        data = pipeline.run(
+            "load", load_store,
+            params={"source": str(data_path), "fingerprint": fingerprint, "sample_rows": SAMPLE_ROWS},
+            deps=(feature_store,),
+            outputs=[FEATURE_STORE_DIR / f"{fingerprint}-v{feature_store.STORE_VERSION}" / "meta.json"],
+        )
+        split = pipeline.run("split", split_store, data, params={
+            "test_fraction": TEST_FRACTION, "max_test_rows": TRAIN_MAX_TEST_ROWS, "seed": 42,
+        })
+        trained = pipeline.run(
+            "train", train_from_store, split,
+            params={"params": DEFAULT_PARAMS, "prune": prune_settings(),
+                    "shard_rows": TRAIN_SHARD_ROWS},
+            deps=(prune_model, feature_store, forest_engine, forest_pruning),
+            outputs=prune_outputs(),
+        )
+    evaluation = pipeline.run("evaluate", evaluate_model, trained, split)
+    # El guardado se repite si los archivos cambiaron (publica una versión nueva)
+    pipeline.run("save", save_artifacts, trained, data, evaluation, split,
+                 deps=(forest_engine, model_store), outputs=SAVE_OUTPUTS)
+    # Las gráficas se copian desde la caché si alguien las borró o reemplazó; si
+    # la etapa corre, utils/figures.py solo redibuja las que cambiaron
+    pipeline.run("visualize", generate_visualizations, evaluation, trained, data, split,
+                 options={"workers": VISUALIZATION_WORKERS},
+                 deps=(feature_names, figures), outputs=VISUALIZATION_OUTPUTS, restore=True)
+    pipeline.report()
+
 
 # === MAIN ===
 if __name__ == "__main__":
-    print("🚀 Iniciando entrenamiento")
+    parser = argparse.ArgumentParser(description="Entrena el modelo y genera los artefactos")
+    parser.add_argument("--search", action="store_true",
+                        help="busca hiperparámetros por successive halving antes de entrenar")
+    parser.add_argument("--search-workers", type=int,
+                        default=int(os.getenv("SEARCH_WORKERS", "0")) or None,
+                        help="procesos de la búsqueda (por defecto, todos los núcleos)")
+    parser.add_argument("--data", type=Path, default=os.getenv("TRAIN_DATA_PATH") or None,
+                        help="entrena fuera de memoria desde un CSV/Parquet (o una carpeta "
+                             "de partes) con las columnas de feature_info.json y `target`")
+    parser.add_argument("--force", nargs="*", metavar="ETAPA",
+                        help="reejecuta las etapas indicadas (todas si no se indica "
+                             "ninguna) y las que dependen de ellas, sin usar la caché")
+    args = parser.parse_args()
+    if args.search and args.data:
+        parser.error("--search carga todo el conjunto en memoria: no se combina con --data")
 
-    X, y, dataset = load_data()
-    model, metrics, results = train_model(X, y)
-    save_artifacts(model, dataset, metrics, results[0])
-    generate_visualizations(results[1], results[2], results[3], model, X)
-
-    print("✅ Entrenamiento completo. Artefactos guardados en /artifacts/")
\ No newline at end of file
+    print("🚀 Iniciando entrenamiento")
+    run_pipeline(args.force, args.search, args.search_workers, args.data)
+    print("✅ Entrenamiento completo. Artefactos guardados en /artifacts/")
@@ -0,0 +1,120 @@
+"""
+===========================================================
+🧪 tests/test_admission.py — Control de admisión
+===========================================================
+
+Verifica que el exceso de trabajo se rechace rápido con su
+motivo, que /predict tenga prioridad sobre los lotes al
+liberarse un espacio y que el límite de filas por segundo
+devuelva 429 con el tiempo de espera.
+===========================================================
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.admission import AdmissionController, Rejected, BULK, INTERACTIVE
+
+
+def controller(total=2, bulk=1, queue=1, timeout=0.05, rows_per_second=0):
+    return AdmissionController(total, {
+        INTERACTIVE: {"max_in_flight": total, "max_queue": queue, "queue_timeout": timeout},
+        BULK: {"max_in_flight": bulk, "max_queue": queue, "queue_timeout": timeout},
+    }, batch_rows_per_second=rows_per_second)
+
+
+def test_sheds_when_queue_full_or_timeout():
+    """Sin espacios libres: espera acotada (timeout) y cola llena se rechazan con 503."""
+    admission = controller(total=1, queue=1, timeout=0.05)
+    admitted = admission.acquire(INTERACTIVE)
+
+    started = time.monotonic()
+    with pytest.raises(Rejected) as timeout:
+        admission.acquire(INTERACTIVE)
+    assert timeout.value.status == 503 and timeout.value.reason == "timeout"
+    assert timeout.value.retry_after >= 1
+    assert time.monotonic() - started < 1
+
+    # Con un cliente ya esperando, el siguiente no entra en la cola
+    def wait_and_timeout():
+        with pytest.raises(Rejected):
+            admission.acquire(INTERACTIVE)
+
+    admission.lanes[INTERACTIVE].queue_timeout = 0.5
+    waiter = threading.Thread(target=wait_and_timeout)
+    waiter.start()
+    while admission.stats()["lanes"][INTERACTIVE]["queue_depth"] == 0:
+        time.sleep(0.001)
+    with pytest.raises(Rejected) as full:
+        admission.acquire(INTERACTIVE)
+    assert full.value.reason == "queue_full"
+    waiter.join()
+
+    admission.release(INTERACTIVE, admitted)
+    stats = admission.stats()
+    assert stats["in_flight"] == 0
+    assert stats["lanes"][INTERACTIVE]["shed"] == {"timeout": 2, "queue_full": 1}
+    samples = {(name, tuple(sorted(labels.items()))): value
+               for name, labels, value in admission.metric_samples()}
+    assert samples[("api_admission_shed_total",
+                    (("lane", INTERACTIVE), ("reason", "queue_full")))] == 1
+
+
+def test_bulk_lane_is_capped_and_yields_to_interactive():
+    """Los lotes usan una parte de la capacidad y ceden el espacio libre a /predict."""
+    admission = controller(total=2, bulk=1, queue=2, timeout=0.01)
+    first_bulk = admission.acquire(BULK)
+    with pytest.raises(Rejected):
+        # El carril bulk está lleno aunque quede capacidad total
+        admission.acquire(BULK)
+    for lane in admission.lanes.values():
+        lane.queue_timeout = 2.0
+
+    interactive = admission.acquire(INTERACTIVE)
+    order = []
+
+    def wait_for(lane):
+        admission.acquire(lane)
+        order.append(lane)
+
+    threads = [threading.Thread(target=wait_for, args=(BULK,))]
+    threads[0].start()
+    while admission.stats()["lanes"][BULK]["queue_depth"] == 0:
+        time.sleep(0.001)
+    threads.append(threading.Thread(target=wait_for, args=(INTERACTIVE,)))
+    threads[1].start()
+    while admission.stats()["lanes"][INTERACTIVE]["queue_depth"] == 0:
+        time.sleep(0.001)
+
+    # Se libera el espacio del lote: entra primero la petición interactiva
+    admission.release(BULK, first_bulk)
+    while not order:
+        time.sleep(0.001)
+    assert order == [INTERACTIVE]
+    admission.release(INTERACTIVE, interactive)
+    for thread in threads:
+        thread.join(timeout=2)
+    assert order == [INTERACTIVE, BULK]
+
+
+def test_batch_rows_rate_limit():
+    """Superado el límite de filas por segundo, 429 con el tiempo hasta tener saldo."""
+    admission = controller(rows_per_second=1000)
+    admission.take_rows(800)
+    with pytest.raises(Rejected) as limited:
+        admission.take_rows(800)
+    assert limited.value.status == 429 and limited.value.reason == "rate_limited"
+    assert limited.value.retry_after == 1
+
+    # En stream se espera en vez de rechazar
+    started = time.monotonic()
+    admission.take_rows(500, wait=True)
+    assert time.monotonic() - started > 0.2
+    assert admission.stats()["lanes"][BULK]["shed"] == {"rate_limited": 1}
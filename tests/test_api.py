@@ -13,8 +13,10 @@ Estas pruebas validan el funcionamiento de la API de Flask:
 ===========================================================
 """
 
+import json
 import requests
 import os
+import pytest
 
 # URL de la API: usa variable de entorno si existe, sino localhost
 BASE_URL = os.environ.get("API_URL", "http://127.0.0.1:5000")
@@ -56,6 +58,21 @@ def test_model_info():
     assert isinstance(data["features"], list)
 
 
+def test_model_info_conditional():
+    """Prueba /model/info comprimido, con ETag y 304 si el cliente ya lo tiene."""
+    r = requests.get(f"{BASE_URL}/model/info", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert "max-age" in r.headers["Cache-Control"]
+    cached = requests.get(f"{BASE_URL}/model/info", headers={
+        "Accept-Encoding": "gzip", "If-None-Match": r.headers["ETag"]
+    })
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    versioned = requests.get(f"{BASE_URL}/model/info?v={r.json()['model_version']}")
+    assert "immutable" in versioned.headers["Cache-Control"]
+
+
 def test_predict_valid():
     """Prueba /predict con un caso válido (benigno)."""
     r = requests.post(f"{BASE_URL}/predict", json=CASE_BENIGN)
@@ -71,4 +88,166 @@ def test_predict_invalid():
     r = requests.post(f"{BASE_URL}/predict", json=CASE_INVALID)
     assert r.status_code == 400
     data = r.json()
-    assert "error" in data
\ No newline at end of file
+    assert "error" in data
+
+
+def test_predict_compact():
+    """Prueba /predict con salida compacta (float32) y misma etiqueta."""
+    r_full = requests.post(f"{BASE_URL}/predict", json=CASE_BENIGN)
+    r = requests.post(f"{BASE_URL}/predict?dtype=float32", json=CASE_BENIGN)
+    assert r.status_code == 200
+    data = r.json()
+    assert data["prediction"] == r_full.json()["prediction"]
+    assert abs(sum(data["probability"]) - 1.0) < 1e-6
+
+
+def test_predict_batch_stream():
+    """Prueba /predict/batch en modo streaming NDJSON (una línea por fila)."""
+    header = ",".join(CASE_BENIGN.keys())
+    row = ",".join(str(v) for v in CASE_BENIGN.values())
+    csv = "\n".join([header] + [row] * 3) + "\n"
+
+    r = requests.post(
+        f"{BASE_URL}/predict/batch?stream=ndjson",
+        files={"file": ("batch.csv", csv, "text/csv")}
+    )
+    assert r.status_code == 200
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert len(lines) == 3
+    assert all("prediction" in line and "probability" in line for line in lines)
+
+
+def test_metrics():
+    """Prueba /metrics: formato Prometheus con latencia por etapa de /predict."""
+    requests.post(f"{BASE_URL}/predict", json=CASE_BENIGN)
+    r = requests.get(f"{BASE_URL}/metrics")
+    assert r.status_code == 200
+    assert r.headers["Content-Type"].startswith("text/plain")
+    assert "# TYPE api_requests_total counter" in r.text
+    assert 'api_stage_seconds_count{endpoint="predict",stage="inference"}' in r.text
+
+
+def test_visualization_variant():
+    """Prueba /visualizations con ancho y formato: variante mucho más liviana."""
+    original = requests.get(f"{BASE_URL}/visualizations/correlation_matrix_light.png")
+    if original.status_code == 404:
+        pytest.skip("No hay visualizaciones generadas")
+    r = requests.get(f"{BASE_URL}/visualizations/correlation_matrix_light.png?width=640",
+                     headers={"Accept": "image/webp,*/*"})
+    assert r.status_code == 200
+    assert r.headers["Content-Type"] == "image/webp"
+    assert len(r.content) * 5 < len(original.content)
+
+    bad = requests.get(f"{BASE_URL}/visualizations/correlation_matrix_light.png?format=gif")
+    assert bad.status_code == 400
+    for width in ("abc", "0", "-5", "1.5"):
+        bad = requests.get(f"{BASE_URL}/visualizations/correlation_matrix_light.png?width={width}")
+        assert bad.status_code == 400
+
+
+def test_admission_stats():
+    """Prueba /admission/stats y los gauges de admisión en /metrics."""
+    requests.post(f"{BASE_URL}/predict", json=CASE_BENIGN)
+    r = requests.get(f"{BASE_URL}/admission/stats")
+    assert r.status_code == 200
+    data = r.json()
+    if not data["enabled"]:
+        pytest.skip("Control de admisión desactivado")
+    assert set(data["lanes"]) == {"interactive", "bulk"}
+    assert data["lanes"]["interactive"]["admitted"] >= 1
+    assert "# TYPE api_admission_queue_depth gauge" in requests.get(f"{BASE_URL}/metrics").text
+
+
+def test_admission_lane_from_payload():
+    """Un lote JSON de varias filas en /predict entra por el carril de lotes."""
+    def admitted():
+        data = requests.get(f"{BASE_URL}/admission/stats").json()
+        if not data["enabled"]:
+            pytest.skip("Control de admisión desactivado")
+        return {lane: stats["admitted"] for lane, stats in data["lanes"].items()}
+
+    before = admitted()
+    assert requests.post(f"{BASE_URL}/predict", json=[CASE_BENIGN]).status_code == 200
+    middle = admitted()
+    assert middle["interactive"] == before["interactive"] + 1
+    assert requests.post(f"{BASE_URL}/predict", json=[CASE_BENIGN, CASE_BENIGN]).status_code == 200
+    after = admitted()
+    assert after["bulk"] == middle["bulk"] + 1
+    assert after["interactive"] == middle["interactive"]
+
+
+def test_predict_out_of_range():
+    """Prueba /predict con un valor fuera del rango de entrenamiento."""
+    r = requests.post(f"{BASE_URL}/predict", json={**CASE_BENIGN, "mean radius": -5})
+    assert r.status_code == 400
+    assert r.json()["details"][0]["feature"] == "mean radius"
+
+
+def test_predict_batch_invalid_rows():
+    """Prueba /predict/batch: las filas inválidas se reportan y el resto se evalúa."""
+    header = ",".join(CASE_BENIGN.keys())
+    row = ",".join(str(v) for v in CASE_BENIGN.values())
+    bad = row.replace(str(CASE_BENIGN["mean radius"]), "abc", 1)
+    csv = "\n".join([header, row, bad, row]) + "\n"
+
+    r = requests.post(
+        f"{BASE_URL}/predict/batch",
+        files={"file": ("batch.csv", csv, "text/csv")}
+    )
+    assert r.status_code == 200
+    data = r.json()
+    assert data["invalid_rows"] == 1
+    assert data["errors"][0]["row"] == 1
+    assert data["predictions"][1] is None
+    assert data["predictions"][0] is not None and data["predictions"][2] is not None
+
+
+def test_predict_json_batch():
+    """Prueba /predict con una lista de filas y con columnas: mismo orden que la entrada."""
+    single = requests.post(f"{BASE_URL}/predict", json=CASE_BENIGN).json()
+
+    r = requests.post(f"{BASE_URL}/predict", json=[CASE_BENIGN, CASE_BENIGN])
+    assert r.status_code == 200
+    data = r.json()
+    assert data["predictions"] == [single["prediction"]] * 2
+    assert data["probabilities"][0] == single["probability"]
+
+    columns = {name: [value, value] for name, value in CASE_BENIGN.items()}
+    r = requests.post(f"{BASE_URL}/predict", json=columns)
+    assert r.status_code == 200
+    assert r.json()["predictions"] == data["predictions"]
+
+
+def test_predict_early_exit():
+    """Prueba la salida anticipada por petición: misma etiqueta y árboles usados."""
+    single = requests.post(f"{BASE_URL}/predict", json=CASE_BENIGN).json()
+    r = requests.post(f"{BASE_URL}/predict?early_exit=true", json=CASE_BENIGN)
+    assert r.status_code == 200
+    data = r.json()
+    assert data["prediction"] == single["prediction"]
+    assert 0 < data["trees_used"] <= data["trees_total"]
+    assert abs(data["probability"][0] - single["probability"][0]) <= data["probability_error_bound"] + 1e-9
+
+    r = requests.post(f"{BASE_URL}/predict?tolerance=0.05", json=[CASE_BENIGN, {"foo": 1}])
+    assert r.status_code == 400  # característica desconocida
+    r = requests.post(f"{BASE_URL}/predict?tolerance=0.05", json=[CASE_BENIGN, CASE_BENIGN])
+    data = r.json()
+    assert len(data["trees_used"]) == 2 and data["early_exit"]["tolerance"] == 0.05
+
+    assert requests.post(f"{BASE_URL}/predict?tolerance=2", json=CASE_BENIGN).status_code == 400
+
+
+def test_jobs_submit_and_status():
+    """Prueba /jobs: el archivo se encola y su estado se puede consultar."""
+    header = ",".join(CASE_BENIGN.keys())
+    row = ",".join(str(v) for v in CASE_BENIGN.values())
+    csv = "\n".join([header, row, row]) + "\n"
+
+    r = requests.post(f"{BASE_URL}/jobs", files={"file": ("batch.csv", csv, "text/csv")})
+    assert r.status_code == 202
+    job_id = r.json()["job_id"]
+
+    status = requests.get(f"{BASE_URL}/jobs/{job_id}").json()
+    assert status["status"] in ("queued", "running", "done")
+    assert requests.delete(f"{BASE_URL}/jobs/{job_id}").status_code == 200
+    assert requests.get(f"{BASE_URL}/jobs/{job_id}").status_code == 404
@@ -0,0 +1,67 @@
+"""
+===========================================================
+🧪 tests/test_batch_io.py — Formatos de entrada por lotes
+===========================================================
+
+Verifica la lectura de .npy, Parquet y Arrow IPC para
+/predict/batch y que las columnas queden en el orden del modelo.
+===========================================================
+"""
+
+import io
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.batch_io import detect_format, read_matrix
+
+FEATURES = ["a", "b", "c"]
+
+
+def test_detect_format():
+    """El tipo de contenido manda; si es genérico se usa la extensión."""
+    assert detect_format("application/vnd.apache.parquet", "x.csv") == "parquet"
+    assert detect_format("application/octet-stream", "datos.npy") == "npy"
+    assert detect_format("application/octet-stream", "datos.txt") == "csv"
+
+
+def test_read_npy_without_copy():
+    """La matriz .npy es una vista sobre el buffer subido."""
+    data = np.arange(12, dtype="<f4").reshape(4, 3)
+    buffer = io.BytesIO()
+    np.save(buffer, data)
+
+    matrix = read_matrix(buffer.getbuffer(), "npy", FEATURES)
+    assert np.array_equal(matrix, data)
+    assert not matrix.flags.owndata
+
+
+def test_read_npy_rejects_wrong_shape():
+    """Rechaza matrices con un número de columnas distinto."""
+    buffer = io.BytesIO()
+    np.save(buffer, np.zeros((2, 5)))
+    with pytest.raises(ValueError):
+        read_matrix(buffer.getbuffer(), "npy", FEATURES)
+
+
+def test_read_arrow_formats_reorders_columns():
+    """Parquet y Arrow IPC se reordenan según las features (faltantes en 0)."""
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    table = pa.table({"c": [3.0, 6.0], "a": [1.0, 4.0], "extra": [9.0, 9.0]})
+    expected = np.array([[1.0, 0.0, 3.0], [4.0, 0.0, 6.0]], dtype=np.float32)
+
+    parquet = io.BytesIO()
+    pq.write_table(table, parquet)
+    assert np.array_equal(read_matrix(parquet.getbuffer(), "parquet", FEATURES), expected)
+
+    arrow = io.BytesIO()
+    with pa.ipc.new_stream(arrow, table.schema) as writer:
+        writer.write_table(table)
+    assert np.array_equal(read_matrix(arrow.getbuffer(), "arrow", FEATURES), expected)
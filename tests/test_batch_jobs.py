@@ -0,0 +1,137 @@
+"""
+===========================================================
+🧪 tests/test_batch_jobs.py — Cola de trabajos por lotes
+===========================================================
+
+Verifica que un trabajo encolado se evalúe por bloques con el
+mismo resultado que el modelo, que las filas inválidas se
+informen en su lugar, que los bloques de un CSV no corten
+campos entre comillas con saltos de línea y que un trabajo
+interrumpido se retome solo desde los bloques pendientes.
+===========================================================
+"""
+
+import io
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import load_breast_cancer
+from sklearn.ensemble import RandomForestClassifier
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.batch_jobs import JobRunner, JobStore, plan_csv
+from utils.forest_engine import FlatForest
+from utils.model_store import publish_version
+
+
+@pytest.fixture(scope="module")
+def trained(tmp_path_factory):
+    model_dir = tmp_path_factory.mktemp("model")
+    dataset = load_breast_cancer()
+    model = RandomForestClassifier(n_estimators=20, max_depth=4, random_state=0)
+    model.fit(dataset.data, dataset.target)
+    joblib.dump(model, model_dir / "model.pkl")
+    FlatForest.from_sklearn(model).save(model_dir / "forest.bin")
+    publish_version(model_dir, model_dir / "model.pkl", {}, forest_file=model_dir / "forest.bin")
+    feature_info = {"feature_names": list(dataset.feature_names)}
+    frame = pd.DataFrame(dataset.data[:250], columns=dataset.feature_names)
+    return model_dir, model, feature_info, frame
+
+
+@pytest.fixture
+def runner(trained, tmp_path):
+    model_dir, _, feature_info, _ = trained
+    runner = JobRunner(
+        JobStore(tmp_path / "jobs"), feature_info,
+        model_paths={"model_dir": model_dir, "fallback_model": model_dir / "model.pkl",
+                     "fallback_metrics": model_dir / "metrics.json"},
+        logger=logging.getLogger("test"), workers=2, nice=0, poll_interval=0.1
+    )
+    yield runner
+    runner.close()
+
+
+def submit_csv(store, frame, chunk_rows=60, result_format="ndjson"):
+    return store.create(io.BytesIO(frame.to_csv(index=False).encode()), "csv",
+                        result_format, chunk_rows)
+
+
+def test_job_matches_model(trained, runner):
+    """El resultado por bloques coincide con el modelo y conserva el orden."""
+    _, model, _, frame = trained
+    frame = frame.astype(object)
+    frame.iloc[100, 0] = "abc"
+    job_id = submit_csv(runner.store, frame)
+    assert runner.store.status(job_id)["status"] == "queued"
+
+    assert runner.run_once() is True
+    status = runner.store.status(job_id)
+    assert status["status"] == "done"
+    assert (status["rows_done"], status["rows_invalid"], status["chunks_total"]) == (250, 1, 5)
+
+    lines = [json.loads(line) for line in "".join(runner.store.iter_result(job_id)).splitlines()]
+    assert len(lines) == 250
+    assert lines[100]["row"] == 100
+    expected = model.predict_proba(frame.drop(index=100).to_numpy(dtype=np.float64))
+    got = np.array([line["probability"] for i, line in enumerate(lines) if i != 100])
+    assert np.array_equal(got, expected)
+
+
+def test_job_resumes_from_checkpoints(trained, runner):
+    """Un trabajo abandonado se retoma y no vuelve a evaluar los bloques ya terminados."""
+    _, _, _, frame = trained
+    store = runner.store
+    job_id = submit_csv(store, frame, result_format="csv")
+    job = store.claim(stale_seconds=60)
+    runner.plan(job)
+
+    # Simular un proceso caído después de terminar el primer bloque
+    store.part_path(job_id, 0).write_text("checkpoint\n")
+    store.chunk_done(job_id, 0, 60, 0)
+    store._execute("UPDATE jobs SET heartbeat = ? WHERE id = ?", (time.time() - 120, job_id))
+
+    assert runner.run_once() is True
+    status = store.status(job_id)
+    assert status["status"] == "done"
+    assert status["rows_done"] == 250
+
+    result = "".join(store.iter_result(job_id)).splitlines()
+    assert result[0].startswith("prediction,")
+    assert result[1] == "checkpoint"
+    assert len(result) == 1 + 1 + 190
+
+
+def test_plan_csv_quoted_newlines(trained, runner, tmp_path):
+    """Un campo entre comillas con saltos de línea no parte el bloque."""
+    _, model, _, frame = trained
+    frame = frame.iloc[:10].assign(note=["una\nnota, \"larga\"\n"] * 10)
+    path = tmp_path / "notes.csv"
+    frame.to_csv(path, index=False)
+
+    columns, chunks = plan_csv(path, 4)
+    assert columns == list(frame.columns)
+    assert [(start, rows) for start, rows, _ in chunks] == [(0, 4), (4, 4), (8, 2)]
+    with open(path, "rb") as f:
+        f.seek(chunks[1][2])
+        block = pd.read_csv(f, header=None, names=columns, nrows=4)
+    assert block["note"].tolist() == frame["note"].iloc[4:8].tolist()
+
+    job_id = runner.store.create(io.BytesIO(path.read_bytes()), "csv", "ndjson", 4)
+    assert runner.run_once() is True
+    assert runner.store.status(job_id)["status"] == "done"
+    lines = [json.loads(line) for line in "".join(runner.store.iter_result(job_id)).splitlines()]
+    expected = model.predict_proba(frame.drop(columns="note").to_numpy(dtype=np.float64))
+    assert np.array_equal([line["probability"] for line in lines], expected)
+
+    path.write_bytes(b'a,b\n1,"sin cerrar\n2,3\n')
+    with pytest.raises(ValueError, match="comillas"):
+        plan_csv(path, 4)
@@ -0,0 +1,138 @@
+"""
+===========================================================
+🧪 tests/test_feature_store.py — Entrenamiento fuera de memoria
+===========================================================
+
+Verifica que CSV y Parquet se conviertan al mismo almacén
+float32 (una sola vez por fuente), que la división por hash no
+dependa del tamaño de bloque y que el bosque entrenado por
+fragmentos funcione y traiga una máscara OOB coherente.
+===========================================================
+"""
+
+import pickle
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import load_breast_cancer
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.feature_store import (
+    FeatureStore, StoreRows, build_store, fit_forest, row_uniform, trees_per_shard
+)
+from utils.forest_engine import FlatForest
+
+TARGET_NAMES = ["malignant", "benign"]
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    data = load_breast_cancer()
+    df = pd.DataFrame(data.data, columns=data.feature_names)
+    # Columnas en otro orden y una extra: el almacén usa el orden del esquema
+    df = df[list(reversed(data.feature_names))].assign(target=data.target, extra="x")
+    return data, df
+
+
+@pytest.fixture(scope="module")
+def store(dataset, tmp_path_factory):
+    data, df = dataset
+    source = tmp_path_factory.mktemp("source") / "features.csv"
+    df.to_csv(source, index=False)
+    return build_store(source, tmp_path_factory.mktemp("store"), data.feature_names,
+                       TARGET_NAMES, log=lambda *_: None)
+
+
+def test_store_matches_source(dataset, store):
+    data, _ = dataset
+    assert store.n_rows == len(data.data)
+    assert np.allclose(store.X, data.data.astype(np.float32))
+    assert np.array_equal(store.y, data.target)
+    assert store.class_counts.tolist() == np.bincount(data.target).tolist()
+    low = store.feature_bounds["mean radius"]["min"]
+    assert low == pytest.approx(data.data[:, 0].min(), rel=1e-6)
+
+
+def test_parquet_parts_and_reuse(dataset, tmp_path):
+    pytest.importorskip("pyarrow")
+    data, df = dataset
+    parts = tmp_path / "parts"
+    parts.mkdir()
+    df.iloc[:300].to_parquet(parts / "part-0.parquet")
+    df.iloc[300:].to_parquet(parts / "part-1.parquet")
+
+    logs = []
+    store = build_store(parts, tmp_path / "store", data.feature_names, TARGET_NAMES,
+                        chunk_rows=100, log=logs.append)
+    assert np.allclose(store.X, data.data.astype(np.float32))
+    # Misma fuente: se reutiliza sin convertir de nuevo
+    again = build_store(parts, tmp_path / "store", data.feature_names, TARGET_NAMES, log=logs.append)
+    assert again.path == store.path and len(logs) == 1
+    # Al serializarse solo viaja la ruta
+    payload = pickle.dumps(store)
+    assert len(payload) < 1000 and isinstance(pickle.loads(payload), FeatureStore)
+
+
+def test_schema_errors(dataset, tmp_path):
+    data, df = dataset
+    source = tmp_path / "missing.csv"
+    df.drop(columns=["mean radius"]).to_csv(source, index=False)
+    with pytest.raises(ValueError, match="mean radius"):
+        build_store(source, tmp_path / "store", data.feature_names, TARGET_NAMES)
+
+    source = tmp_path / "labels.csv"
+    df.assign(target=df["target"] + 5).to_csv(source, index=False)
+    with pytest.raises(ValueError, match="target"):
+        build_store(source, tmp_path / "store", data.feature_names, TARGET_NAMES)
+    assert not list((tmp_path / "store").iterdir())  # sin almacenes a medias
+
+
+def test_row_split(store):
+    assert np.array_equal(row_uniform(0, 500, 7),
+                          np.concatenate([row_uniform(0, 123, 7), row_uniform(123, 500, 7)]))
+    test, train = StoreRows(store, 0.0, 0.2), StoreRows(store, 0.2, 1.0)
+    X_test, _ = test.collect()
+    X_train = np.concatenate([X for _, X, _ in train.shards(100)])
+    assert len(X_test) + len(X_train) == store.n_rows
+    assert 0.1 < len(X_test) / store.n_rows < 0.3
+
+
+def test_trees_per_shard():
+    assert trees_per_shard(10, 3) == [3, 4, 3]
+    assert trees_per_shard(2, 4) == [1, 1, 1, 1]
+
+
+def test_fit_forest(store):
+    test, train = StoreRows(store, 0.0, 0.2), StoreRows(store, 0.2, 1.0)
+    params = {"n_estimators": 30, "max_depth": 6, "random_state": 42}
+    model, (X_sample, y_sample, oob), report = fit_forest(
+        train, params, shard_rows=200, oob_rows=100, log=lambda *_: None
+    )
+    assert report["n_shards"] == 3 and len(model.estimators_) == 30
+    assert report["max_shard_train_rows"] <= 200
+
+    X_test, y_test = test.collect()
+    frame = pd.DataFrame(X_test, columns=store.feature_names)
+    assert (model.predict(frame) == y_test).mean() > 0.9
+    engine = FlatForest.from_sklearn(model)
+    assert np.allclose(engine.predict_proba(X_test), model.predict_proba(frame))
+
+    # Cada fila de la muestra es OOB para todos los árboles de los otros fragmentos
+    assert oob.shape == (len(X_sample), 30) and len(y_sample) == len(X_sample)
+    assert 0.6 < oob.mean() < 0.9
+    assert oob.sum(axis=1).min() >= 20
+
+
+def test_shard_without_class(dataset, tmp_path):
+    data, df = dataset
+    source = tmp_path / "sorted.csv"
+    df.sort_values("target").to_csv(source, index=False)
+    store = build_store(source, tmp_path / "store", data.feature_names, TARGET_NAMES,
+                        log=lambda *_: None)
+    with pytest.raises(ValueError, match="no tiene la clase"):
+        fit_forest(StoreRows(store), {"n_estimators": 4}, shard_rows=100, log=lambda *_: None)
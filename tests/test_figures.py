@@ -0,0 +1,70 @@
+"""
+===========================================================
+🧪 tests/test_figures.py — Gráficas en paralelo con caché
+===========================================================
+
+Verifica que se generen las gráficas de ambos temas, que solo
+se redibujen las que cambiaron, que se repongan desde la caché
+y que el tema oscuro no deje el estilo global modificado.
+===========================================================
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.figures import RENDERERS, THEMES, render_figures
+
+PNG_MAGIC = b"\x89PNG"
+
+
+def payloads(auc=0.9):
+    labels = ["a", "b", "c"]
+    return {
+        "confusion_matrix": {"cm": np.array([[40, 2], [3, 69]])},
+        "roc_curve": {"fpr": np.array([0.0, 0.1, 1.0]), "tpr": np.array([0.0, 0.8, 1.0]), "auc": auc},
+        "feature_importance": {"values": np.array([0.1, 0.2, 0.3]), "labels": labels},
+        "correlation_matrix": {"corr": np.eye(3), "labels": labels},
+    }
+
+
+def statuses(timings):
+    return {t["figure"]: t["status"] for t in timings}
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    return tmp_path / "out", tmp_path / "cache"
+
+
+def test_render_and_cache(dirs):
+    out, cache = dirs
+    timings = render_figures(payloads(), out, cache, workers=2, log=lambda *_: None)
+    names = {f"{figure}_{theme}" for figure in RENDERERS for theme in THEMES}
+    assert statuses(timings) == dict.fromkeys(names, "rendered")
+    assert all((out / f"{name}.png").read_bytes()[:4] == PNG_MAGIC for name in names)
+    assert all(t["seconds"] > 0 for t in timings)
+
+    # Solo cambia la ROC: se redibujan sus dos temas
+    (out / "confusion_matrix_dark.png").unlink()
+    timings = render_figures(payloads(auc=0.8), out, cache, workers=2, log=lambda *_: None)
+    rendered = {name for name, status in statuses(timings).items() if status == "rendered"}
+    assert rendered == {"roc_curve_light", "roc_curve_dark"}
+    # Las que no cambiaron se reponen desde la caché
+    assert (out / "confusion_matrix_dark.png").exists()
+
+
+def test_dark_theme_does_not_leak(dirs):
+    import matplotlib.pyplot as plt
+
+    out, cache = dirs
+    before = plt.rcParams["axes.facecolor"]
+    render_figures({"roc_curve": payloads()["roc_curve"]}, out, cache, workers=1,
+                   log=lambda *_: None)
+    assert plt.rcParams["axes.facecolor"] == before
+    assert (out / "roc_curve_light.png").read_bytes() != (out / "roc_curve_dark.png").read_bytes()
@@ -0,0 +1,124 @@
+"""
+===========================================================
+🧪 tests/test_forest_engine.py — Paridad del motor nativo
+===========================================================
+
+Comprueba que FlatForest devuelve exactamente las mismas
+predicciones y probabilidades que sklearn para un bosque
+entrenado con la configuración de train_model.py.
+===========================================================
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.datasets import load_breast_cancer
+from sklearn.ensemble import RandomForestClassifier
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils import forest_engine
+from utils.forest_engine import FlatForest
+
+
+@pytest.fixture(scope="module")
+def forest():
+    X, y = load_breast_cancer(return_X_y=True)
+    model = RandomForestClassifier(
+        n_estimators=200, max_depth=6, random_state=42, class_weight="balanced"
+    )
+    model.fit(X, y)
+    return model, FlatForest.from_sklearn(model), X
+
+
+def test_parity_with_sklearn(forest):
+    """Mismas etiquetas y probabilidades (bit a bit) que sklearn."""
+    model, engine, X = forest
+    rng = np.random.default_rng(0)
+    X_perturbed = X * rng.uniform(0.5, 1.5, X.shape)
+
+    for data in (X, X_perturbed, X[:1]):
+        assert np.array_equal(engine.predict(data), model.predict(data))
+        assert np.array_equal(engine.predict_proba(data), model.predict_proba(data))
+
+
+def test_parity_with_missing_values(forest):
+    """Los NaN siguen la misma rama que en sklearn."""
+    model, engine, X = forest
+    X_missing = X.copy()
+    X_missing[::5, 3] = np.nan
+    X_missing[::7, 22] = np.nan
+
+    assert np.array_equal(engine.predict_proba(X_missing), model.predict_proba(X_missing))
+
+
+def test_chunked_evaluation(forest, monkeypatch):
+    """Evaluar por bloques no cambia el resultado."""
+    _, engine, X = forest
+    expected = engine.predict_proba(X)
+    monkeypatch.setattr(forest_engine, "CHUNK_ROWS", 64)
+
+    assert np.array_equal(engine.predict_proba(X), expected)
+
+
+def test_invalid_input(forest):
+    """Rechaza entradas con forma incorrecta o valores infinitos."""
+    _, engine, X = forest
+    with pytest.raises(ValueError):
+        engine.predict_proba(X[:, :10])
+
+    X_inf = X[:2].copy()
+    X_inf[0, 0] = np.inf
+    with pytest.raises(ValueError):
+        engine.predict_proba(X_inf)
+
+
+def test_save_and_load_mmap(forest, tmp_path):
+    """El bosque guardado y mapeado en memoria predice igual que sklearn."""
+    model, engine, X = forest
+    path = tmp_path / "forest.bin"
+    engine.save(path)
+
+    loaded = FlatForest.load(path, mmap_mode=True)
+    assert not loaded.threshold.flags.writeable
+    assert np.array_equal(loaded.classes_, model.classes_)
+    assert np.array_equal(loaded.predict_proba(X), model.predict_proba(X))
+
+
+@pytest.mark.parametrize("block_trees", [1, 16, 64])
+def test_early_exit_keeps_labels(forest, block_trees):
+    """Con tolerancia 0 las etiquetas son las del bosque completo y el error queda acotado."""
+    _, engine, X = forest
+    rng = np.random.default_rng(0)
+    X_all = np.vstack([X, X * rng.uniform(0.8, 1.2, X.shape)])
+    expected = engine.predict_proba(X_all)
+
+    proba, trees_used, bound = engine.predict_proba_early_exit(X_all, 0.0, block_trees)
+    assert np.array_equal(proba.argmax(axis=1), expected.argmax(axis=1))
+    assert np.all(np.abs(proba - expected).max(axis=1) <= bound + 1e-12)
+    assert trees_used.max() <= engine.n_estimators
+    assert trees_used.mean() < engine.n_estimators
+
+    # Las filas que recorren todos los árboles dan exactamente lo mismo
+    full = trees_used == engine.n_estimators
+    assert np.array_equal(proba[full], expected[full])
+    assert np.all(bound[full] == 0)
+
+
+def test_early_exit_tolerance(forest):
+    """Una tolerancia mayor nunca usa más árboles y respeta la cota pedida."""
+    _, engine, X = forest
+    expected = engine.predict_proba(X)
+    _, exact_trees, _ = engine.predict_proba_early_exit(X, 0.0)
+    proba, trees_used, bound = engine.predict_proba_early_exit(X, 0.4)
+
+    assert np.all(trees_used <= exact_trees)
+    assert trees_used.mean() < exact_trees.mean()
+    assert np.all(np.abs(proba - expected).max(axis=1) <= bound + 1e-12)
+    settled = bound > 0.4
+    assert np.array_equal(proba[settled].argmax(axis=1), expected[settled].argmax(axis=1))
+    with pytest.raises(ValueError):
+        engine.predict_proba_early_exit(X, -0.1)
@@ -0,0 +1,85 @@
+"""
+===========================================================
+🧪 tests/test_forest_pruning.py — Poda del bosque
+===========================================================
+
+Verifica que la poda elija el subconjunto más chico dentro de
+la tolerancia, que la curva de compromiso sea consistente y
+que el bosque podado siga funcionando con el motor nativo.
+===========================================================
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.datasets import load_breast_cancer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.forest_engine import FlatForest
+from utils.forest_pruning import METRICS, oob_mask, prune_forest
+
+
+@pytest.fixture(scope="module")
+def split():
+    X, y = load_breast_cancer(return_X_y=True)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    model = RandomForestClassifier(
+        n_estimators=60, max_depth=6, random_state=42, class_weight="balanced"
+    )
+    model.fit(X_train, y_train)
+    return model, X_train, y_train, X_test, y_test
+
+
+def test_prune_within_tolerance(split):
+    model, X_train, y_train, X_test, y_test = split
+    pruned, report = prune_forest(model, X_train, y_train, X_test, y_test, tolerance=0.01)
+
+    curve = {point["n_estimators"]: point for point in report["curve"]}
+    chosen = curve[report["n_estimators"]]
+    assert len(pruned.estimators_) == report["n_estimators"] < len(model.estimators_)
+    assert all(report["oob_full"][m] - chosen["oob"][m] <= 0.01 for m in METRICS)
+    # Es el más chico: ningún tamaño menor de la curva cumple la tolerancia
+    assert not any(p["within_tolerance"] for k, p in curve.items() if k < report["n_estimators"])
+    # El tamaño del bosque aplanado crece con los árboles
+    sizes = [p["nbytes"] for p in report["curve"]]
+    assert sizes == sorted(sizes)
+
+    engine = FlatForest.from_sklearn(pruned)
+    assert engine.n_estimators == report["n_estimators"]
+    assert np.array_equal(engine.predict_proba(X_test), pruned.predict_proba(X_test))
+    assert chosen["test"]["accuracy"] == pytest.approx((pruned.predict(X_test) == y_test).mean())
+
+
+def test_size_budget_changes_choice(split):
+    """Si el elegido por tolerancia no entra en el presupuesto, se usa el más grande que sí."""
+    model, X_train, y_train, X_test, y_test = split
+    _, free = prune_forest(model, X_train, y_train, X_test, y_test, tolerance=0.0)
+    curve = {point["n_estimators"]: point for point in free["curve"]}
+    assert free["n_estimators"] > 10 and free["budget_met"] is True
+
+    budget = curve[10]["nbytes"]
+    pruned, report = prune_forest(model, X_train, y_train, X_test, y_test,
+                                  tolerance=0.0, size_budget_bytes=budget)
+    assert report["budget_met"] is False
+    assert report["n_estimators_tolerance"] == free["n_estimators"]
+    assert report["n_estimators"] == max(k for k, p in curve.items() if p["nbytes"] <= budget)
+    assert len(pruned.estimators_) == report["n_estimators"] < free["n_estimators"]
+
+    with pytest.raises(ValueError, match="presupuesto"):
+        prune_forest(model, X_train, y_train, X_test, y_test, size_budget_bytes=1)
+
+
+def test_oob_mask(split):
+    model, X_train, *_ = split
+    mask = oob_mask(model, len(X_train))
+    assert mask.shape == (len(X_train), len(model.estimators_))
+    # En un bootstrap queda fuera ~36.8% de las filas
+    assert 0.3 < mask.mean() < 0.45
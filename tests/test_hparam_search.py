@@ -0,0 +1,49 @@
+"""
+===========================================================
+🧪 tests/test_hparam_search.py — Búsqueda por successive halving
+===========================================================
+
+Verifica el calendario de filas por ronda, que cada ronda se
+quede con la mejor parte de las candidatas, que el reporte
+incluya tiempos y costo de inferencia y que una búsqueda
+repetida salga entera de la caché en disco.
+===========================================================
+"""
+
+import sys
+from pathlib import Path
+
+from sklearn.datasets import load_breast_cancer
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.hparam_search import schedule, successive_halving
+
+SPACE = {"max_depth": [2, 4], "n_estimators": [5, 10], "max_features": ["sqrt", 0.5]}
+
+
+def test_schedule():
+    assert schedule(36, 364, 3, 40) == [40, 121, 364]
+    assert schedule(36, 100000, 3, 40) == [3703, 11111, 33333, 100000]
+    assert schedule(1, 364, 3, 40) == [364]
+
+
+def test_search_and_resume(tmp_path):
+    X, y = load_breast_cancer(return_X_y=True)
+    report = successive_halving(X, y, tmp_path, space=SPACE, n_splits=3, workers=2,
+                                min_rows=60, log=lambda message: None)
+
+    rounds = report["rounds"]
+    # 8 candidatas → 3 (la mejor tercera parte) → gana la mejor de esas 3
+    assert [r["n_candidates"] for r in rounds] == [8, 3]
+    assert rounds[-1]["n_rows"] == 379  # filas de entrenamiento del fold más chico
+    best = report["best"]
+    assert best["params"] == report["best_params"]
+    assert best["inference_us_per_row"] > 0 and best["fit_seconds"] > 0 and best["n_nodes"] > 0
+    assert report["tasks_evaluated"] == 3 * (8 + 3) and report["tasks_cached"] == 0
+
+    resumed = successive_halving(X, y, tmp_path, space=SPACE, n_splits=3, workers=2,
+                                 min_rows=60, log=lambda message: None)
+    assert resumed["tasks_evaluated"] == 0
+    assert resumed["best_params"] == report["best_params"]
@@ -0,0 +1,82 @@
+"""
+===========================================================
+🧪 tests/test_image_variants.py — Variantes de visualizaciones
+===========================================================
+
+Verifica que las variantes se generen con el ancho pedido, se
+reutilicen desde el disco, se regeneren si cambia el original
+y que la caché desaloje las menos usadas al llenarse.
+===========================================================
+"""
+
+import io
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+from werkzeug.http import parse_accept_header
+from werkzeug.datastructures import MIMEAccept
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.image_variants import VariantCache
+
+
+def make_png(path, width=1200, height=900, seed=0):
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 255, (height // 30, width // 30, 3), dtype=np.uint8)
+    Image.fromarray(pixels).resize((width, height), Image.NEAREST).save(path)
+
+
+def test_variant_generated_once_and_resized(tmp_path):
+    source = tmp_path / "chart.png"
+    make_png(source)
+    cache = VariantCache(tmp_path / "cache", 10 * 1024 * 1024, [320, 640])
+
+    width = cache.snap_width(500)
+    assert width == 640 and cache.snap_width(5000) == 640
+    body = cache.get(source, width, "png")
+    assert Image.open(io.BytesIO(body)).size == (640, 480)
+    assert cache.get(source, width, "png") == body
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Nunca se agranda el original
+    assert Image.open(io.BytesIO(cache.get(source, 5000, "png"))).size == (1200, 900)
+
+    # Un original regenerado no reutiliza la variante anterior
+    make_png(source, seed=1)
+    os.utime(source, ns=(0, source.stat().st_mtime_ns + 10**9))
+    cache.get(source, width, "png")
+    assert cache.misses == 3
+
+
+def test_lru_eviction(tmp_path):
+    """Al superar el máximo se borran las variantes usadas hace más tiempo."""
+    sources = []
+    for i in range(3):
+        sources.append(tmp_path / f"chart{i}.png")
+        make_png(sources[-1], seed=i)
+    cache = VariantCache(tmp_path / "cache", 10 * 1024 * 1024, [320])
+    sizes = [len(cache.get(source, 320, "png")) for source in sources]
+    for path in (tmp_path / "cache").iterdir():
+        path.unlink()
+
+    # Caben dos de las tres variantes
+    cache.max_bytes = sum(sizes) - 1
+    cache.get(sources[0], 320, "png")
+    cache.get(sources[1], 320, "png")
+    cache.get(sources[0], 320, "png")  # chart0 pasa a ser la más reciente
+    cache.get(sources[2], 320, "png")
+    names = {p.name.split("-")[0] for p in (tmp_path / "cache").iterdir()}
+    assert names == {"chart0", "chart2"}
+    assert cache.evictions == 1
+
+
+def test_negotiation(tmp_path):
+    cache = VariantCache(tmp_path / "cache", 1024, [320])
+    accept = parse_accept_header("image/avif,image/webp,*/*;q=0.8", MIMEAccept)
+    assert cache.negotiate(accept) == cache.formats[0]
+    assert cache.negotiate(parse_accept_header("*/*", MIMEAccept)) == "png"
@@ -0,0 +1,99 @@
+"""
+===========================================================
+🧪 tests/test_input_schema.py — Esquema de entrada y validación
+===========================================================
+
+Comprueba que InputSchema arme filas en el orden del modelo y
+que la validación por lotes marque solo las filas inválidas,
+con un reporte por fila.
+===========================================================
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.input_schema import InputSchema
+
+FEATURE_INFO = {
+    "feature_names": ["a", "b", "c"],
+    "feature_bounds": {
+        "a": {"min": 1.0, "max": 3.0},
+        "b": {"min": -1.0, "max": 1.0},
+        "c": {"min": 10.0, "max": 20.0},
+    },
+}
+
+
+def test_bounds_from_feature_info():
+    """Los límites se amplían en el rango observado; sin negativos si nunca los hubo."""
+    schema = InputSchema.from_feature_info(FEATURE_INFO, margin=0.5)
+    assert np.allclose(schema.lower, [0.0, -2.0, 5.0])
+    assert np.allclose(schema.upper, [4.0, 2.0, 25.0])
+
+    unbounded = InputSchema.from_feature_info({"feature_names": ["a"]})
+    assert np.isinf(unbounded.upper).all()
+
+
+def test_row_from_dict():
+    """Fila en el orden del modelo; ausentes en 0 sin validar y errores por valor."""
+    schema = InputSchema.from_feature_info(FEATURE_INFO)
+    row, errors = schema.row_from_dict({"c": 15, "a": "2.5"})
+    assert np.array_equal(row, [2.5, 0.0, 15.0])
+    assert errors == []
+
+    _, errors = schema.row_from_dict({"a": "x", "b": 100.0, "c": True})
+    assert {e["feature"] for e in errors} == {"a", "b", "c"}
+    assert schema.unknown_features({"a": 1, "z": 2}) == ["z"]
+
+
+def test_validate_frame_per_row():
+    """Solo las filas con valores no numéricos, infinitos o fuera de rango se marcan."""
+    schema = InputSchema.from_feature_info(FEATURE_INFO)
+    df = pd.DataFrame({
+        "c": [15, 15, 15, 15, np.nan],
+        "a": ["2", "oops", "2", "2", None],
+        "extra": [0, 0, 0, 0, 0],
+    })
+    X, type_errors, present = schema.frame_to_matrix(df)
+    df.loc[2, "c"] = 999
+    X[2, 2] = 999
+    X[3, 2] = np.inf
+    valid, report = schema.validate_matrix(X, type_errors, df, row_offset=100, present=present)
+
+    assert valid.tolist() == [True, False, False, False, True]
+    assert [entry["row"] for entry in report] == [101, 102, 103]
+    assert report[0]["errors"][0] == {"feature": "a", "error": "valor no numérico", "value": "oops"}
+    assert present.tolist() == [True, False, True]
+    assert schema.column_report(df.columns) == {"unknown_columns": ["extra"], "missing_columns": ["b"]}
+
+
+def test_report_is_truncated():
+    """El reporte detalla como máximo `max_reported` filas, pero las marca todas."""
+    schema = InputSchema.from_feature_info(FEATURE_INFO)
+    X = np.full((50, 3), -100.0)
+    valid, report = schema.validate_matrix(X, max_reported=5)
+    assert not valid.any()
+    assert len(report) == 5
+
+
+def test_records_and_columns_to_matrix():
+    """Filas JSON y columnas JSON dan la misma matriz; solo se validan celdas enviadas."""
+    schema = InputSchema.from_feature_info(FEATURE_INFO)
+    records = [{"a": 2, "c": 15}, {"a": "x"}, {"b": 0.5, "c": None}]
+    X, type_errors, present = schema.records_to_matrix(records)
+    assert np.array_equal(X[0], [2.0, 0.0, 15.0])
+    assert np.isnan(X[2, 2])
+    valid, report = schema.validate_matrix(X, type_errors, records, present=present)
+    assert valid.tolist() == [True, False, True]
+    assert report[0]["errors"][0]["value"] == "x"
+
+    columns = {"c": [15, 12], "a": [2, 3]}
+    X_columns, _, present = schema.columns_to_matrix(columns, 2)
+    assert np.array_equal(X_columns, [[2.0, 0.0, 15.0], [3.0, 0.0, 12.0]])
+    assert present.tolist() == [True, False, True]
@@ -0,0 +1,46 @@
+"""
+===========================================================
+🧪 tests/test_load_test.py — Utilidades de la prueba de carga
+===========================================================
+
+Comprueba la construcción de escenarios y la comparación con
+un baseline de benchmarks/load_test.py sin levantar la API.
+===========================================================
+"""
+
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR / "benchmarks"))
+
+from load_test import compare, load_replay, scenario_requests
+
+
+def result(scenario, rps, p99, concurrency=8):
+    return {"scenario": scenario, "concurrency": concurrency,
+            "throughput_rps": rps, "latency_ms": {"p99": p99}}
+
+
+def test_compare_detects_regressions():
+    """Marca regresión si cae el throughput o sube el p99 más de lo tolerado."""
+    baseline = {"results": [result("predict", 100, 10), result("batch", 20, 100)]}
+    current = [result("predict", 95, 10.5), result("batch", 20, 130), result("static", 1, 1)]
+
+    assert compare(current, baseline, 0.10) == [("batch", 8)]
+    assert compare(current, baseline, 0.50) == []
+
+
+def test_batch_scenario_rows():
+    """El escenario batch arma un CSV con encabezado y las filas pedidas."""
+    (spec,) = scenario_requests("batch", 25, None)
+    csv = spec["files"]["file"][1]
+    assert spec["rows"] == 25
+    assert len(csv.strip().splitlines()) == 26
+
+
+def test_replay_traffic_file():
+    """El tráfico de ejemplo se carga como peticiones con método y ruta."""
+    specs = load_replay(BASE_DIR / "benchmarks" / "traffic.jsonl")
+    assert all("path" in spec for spec in specs)
+    assert any(spec["path"] == "/predict" for spec in specs)
@@ -0,0 +1,114 @@
+"""
+===========================================================
+🧪 tests/test_metrics.py — Registro de métricas Prometheus
+===========================================================
+
+Comprueba el formato de exposición de MetricsRegistry y que
+/metrics sume los contadores e histogramas de varios workers,
+pero no los gauges: esos van por pid y solo de procesos vivos.
+===========================================================
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.metrics import Histogram, MetricsRegistry
+
+
+def test_histogram_buckets():
+    """Cada valor cae en el primer bucket cuyo límite lo cubre."""
+    histogram = Histogram((1, 5))
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"1": 2, "5": 1, "+Inf": 1}
+    assert snapshot["count"] == 4
+    assert snapshot["sum"] == 14.5
+
+
+def test_render_format():
+    """Contadores e histogramas acumulativos en formato de texto."""
+    registry = MetricsRegistry()
+    registry.describe("requests_total", "counter", "Peticiones")
+    registry.inc("requests_total", {"endpoint": "predict"})
+    registry.inc("requests_total", {"endpoint": "predict"}, 2)
+    registry.observe("latency_seconds", 0.002, {"stage": "parse"}, buckets=(0.001, 0.01))
+    registry.add_collector(lambda: [("cache_hits_total", {}, 7)])
+
+    text = registry.render()
+    assert "# HELP requests_total Peticiones" in text
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{endpoint="predict"} 3' in text
+    assert "cache_hits_total 7" in text
+    assert 'latency_seconds_bucket{stage="parse",le="0.001"} 0' in text
+    assert 'latency_seconds_bucket{stage="parse",le="0.01"} 1' in text
+    assert 'latency_seconds_bucket{stage="parse",le="+Inf"} 1' in text
+    assert 'latency_seconds_count{stage="parse"} 1' in text
+
+
+def test_multiprocess_aggregation(tmp_path):
+    """Los estados volcados por otros workers se suman al propio."""
+    other = MetricsRegistry(tmp_path)
+    other.inc("requests_total", {"endpoint": "predict"}, 5)
+    other.observe("latency_seconds", 0.5, buckets=(1,))
+    # Simular otro proceso: su archivo lleva un pid distinto
+    (tmp_path / "1.json").write_text(json.dumps(other._state()))
+
+    registry = MetricsRegistry(tmp_path)
+    registry.inc("requests_total", {"endpoint": "predict"})
+    registry.observe("latency_seconds", 2.0, buckets=(1,))
+
+    text = registry.render()
+    assert 'requests_total{endpoint="predict"} 6' in text
+    assert 'latency_seconds_bucket{le="1"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in text
+    assert "latency_seconds_sum 2.5" in text
+
+
+def test_gauges_per_live_worker(tmp_path):
+    """Un worker terminado aporta sus contadores pero no sus gauges."""
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+
+    def collector(in_flight):
+        return lambda: [("in_flight", {}, in_flight), ("shed_total", {}, 2)]
+
+    other = MetricsRegistry(tmp_path)
+    other.describe("in_flight", "gauge", "Peticiones en curso")
+    other.add_collector(collector(3))
+    state = other._state()
+    state["pid"] = dead.pid
+    (tmp_path / f"{dead.pid}.json").write_text(json.dumps(state))
+
+    registry = MetricsRegistry(tmp_path)
+    registry.describe("in_flight", "gauge", "Peticiones en curso")
+    registry.add_collector(collector(1))
+
+    text = registry.render()
+    assert "# TYPE in_flight gauge" in text
+    assert f'in_flight{{pid="{os.getpid()}"}} 1' in text
+    assert f'pid="{dead.pid}"' not in text
+    assert "shed_total 4" in text
+
+
+def test_flush_is_throttled(tmp_path):
+    """flush() escribe como máximo una vez por intervalo salvo que se fuerce."""
+    registry = MetricsRegistry(tmp_path, flush_interval=60)
+    registry.inc("requests_total")
+    registry.flush()
+    path = next(tmp_path.glob("*.json"))
+    first = path.read_text()
+
+    registry.inc("requests_total")
+    registry.flush()
+    assert path.read_text() == first
+
+    registry.flush(force=True)
+    assert path.read_text() != first
@@ -0,0 +1,71 @@
+"""
+===========================================================
+🧪 tests/test_microbatch.py — Agrupación de peticiones
+===========================================================
+
+Verifica que MicroBatcher agrupa filas concurrentes y que
+cada llamada recibe su propio resultado.
+===========================================================
+"""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.microbatch import MicroBatcher
+
+
+def fake_score(X):
+    """Etiqueta = primera columna; probabilidades = fila completa."""
+    if np.isinf(X).any():
+        raise ValueError("infinito")
+    return X[:, 0].astype(int), X
+
+
+def test_each_caller_gets_its_row():
+    """Las respuestas respetan la fila enviada por cada cliente."""
+    batcher = MicroBatcher(fake_score, max_batch_size=16, max_wait_us=5000)
+    rows = [[float(i), float(i) * 2] for i in range(100)]
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        results = list(pool.map(batcher.submit, rows))
+
+    for i, (label, proba) in enumerate(results):
+        assert label == i
+        assert proba.tolist() == rows[i]
+
+    stats = batcher.stats()
+    assert stats["batch_size"]["count"] < 100
+    assert stats["batch_size"]["sum"] == 100
+
+
+def test_invalid_row_is_isolated():
+    """Una fila inválida solo hace fallar a su propio cliente."""
+    batcher = MicroBatcher(fake_score, max_batch_size=8, max_wait_us=20000)
+    rows = [[1.0, 1.0], [np.inf, 0.0], [2.0, 2.0]]
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(batcher.submit, row) for row in rows]
+
+    assert futures[0].result()[0] == 1
+    assert futures[2].result()[0] == 2
+    with pytest.raises(ValueError):
+        futures[1].result()
+
+
+def test_rows_scored_with_their_model():
+    """Filas de dos modelos en la misma ventana se evalúan cada una con el suyo."""
+    def score(X, state=None):
+        return np.full(len(X), state), X
+
+    batcher = MicroBatcher(score, max_batch_size=16, max_wait_us=20000)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(batcher.submit, [float(i)], state=i % 2) for i in range(8)]
+    assert [f.result()[0] for f in futures] == [i % 2 for i in range(8)]
+
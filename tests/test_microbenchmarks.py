@@ -0,0 +1,126 @@
+"""
+===========================================================
+🧪 tests/test_microbenchmarks.py — Regresiones de rendimiento
+===========================================================
+
+Mide las rutas calientes de la API con el cliente de pruebas de
+Flask (sin servidor HTTP) y falla si alguna es más lenta que el
+baseline guardado por encima del umbral tolerado.
+
+Se ejecutan solo a pedido, porque dependen de la máquina:
+    RUN_MICROBENCH=1 pytest tests/test_microbenchmarks.py
+
+- MICROBENCH_MAX_SLOWDOWN → tolerancia (por defecto 0.25 = 25 %).
+- MICROBENCH_SAVE=1       → guarda las mediciones como nuevo baseline.
+- MICROBENCH_BASELINE     → ruta de un baseline alternativo.
+===========================================================
+"""
+
+import io
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import load_breast_cancer
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+sys.path.append(str(BASE_DIR / "benchmarks"))
+
+pytestmark = pytest.mark.skipif(
+    os.getenv("RUN_MICROBENCH", "false").lower() not in ("1", "true"),
+    reason="Microbenchmarks desactivados (RUN_MICROBENCH=1 para ejecutarlos)"
+)
+
+MAX_SLOWDOWN = float(os.getenv("MICROBENCH_MAX_SLOWDOWN", "0.25"))
+SAVE_BASELINE = os.getenv("MICROBENCH_SAVE", "false").lower() in ("1", "true")
+BASELINE_PATH = os.getenv("MICROBENCH_BASELINE")
+
+BENCHMARKS = [
+    "predict_request",
+    "predict_invalid_request",
+    "predict_json_batch_1k",
+    "predict_batch_request_1k",
+    "csv_parse_1k",
+    "schema_validate_1k",
+    "inference_1",
+    "inference_64",
+    "inference_10k",
+    "serialize_json_1k",
+]
+
+RESULTS = {}
+
+
+@pytest.fixture(scope="module")
+def api():
+    # Medir el modelo, no la caché ni los hilos de fondo
+    os.environ.setdefault("PREDICTION_CACHE_SIZE", "0")
+    os.environ.setdefault("MICROBATCH_ENABLED", "false")
+    os.environ.setdefault("MODEL_RELOAD_INTERVAL", "0")
+    import api.api as api_module
+    return api_module
+
+
+@pytest.fixture(scope="module")
+def benchmarks(api):
+    import microbench
+
+    state = api.store.active
+    feature_names = state.feature_info["feature_names"]
+    X, _ = load_breast_cancer(return_X_y=True)
+    X = np.tile(X, (18, 1))[:10_000]
+    frame = pd.DataFrame(X[:1000], columns=feature_names)
+    csv = frame.to_csv(index=False).encode()
+    case = dict(zip(feature_names, X[0].tolist()))
+    records = frame.to_dict(orient="records")
+    labels, probas = api.infer(X[:1000], state=state)
+    client = api.app.test_client()
+
+    def serialize():
+        with api.app.test_request_context("/predict/batch", method="POST"):
+            api.batch_response(labels, probas, state).get_data()
+
+    def validate_frame():
+        X_frame, type_errors, present = state.schema.frame_to_matrix(frame)
+        state.schema.validate_matrix(X_frame, type_errors, frame, present=present)
+
+    functions = {
+        "predict_request": lambda: client.post("/predict", json=case),
+        "predict_invalid_request": lambda: client.post("/predict", json={"foo": 1}),
+        "predict_json_batch_1k": lambda: client.post("/predict", json=records),
+        "predict_batch_request_1k": lambda: client.post(
+            "/predict/batch", data=csv, content_type="text/csv"),
+        "csv_parse_1k": lambda: pd.read_csv(io.BytesIO(csv)),
+        "schema_validate_1k": validate_frame,
+        "inference_1": lambda: api.infer(X[:1], state=state),
+        "inference_64": lambda: api.infer(X[:64], state=state),
+        "inference_10k": lambda: api.infer(X, state=state),
+        "serialize_json_1k": serialize,
+    }
+    yield microbench, functions
+
+    if SAVE_BASELINE and RESULTS:
+        microbench.save_baseline(RESULTS, BASELINE_PATH)
+
+
+@pytest.mark.parametrize("name", BENCHMARKS)
+def test_microbenchmark(benchmarks, name):
+    """El tiempo mediano no supera al baseline más la tolerancia."""
+    microbench, functions = benchmarks
+    current = microbench.measure(functions[name])
+    RESULTS[name] = current
+    if SAVE_BASELINE:
+        return
+
+    baseline = microbench.load_baseline(BASELINE_PATH)
+    if baseline is None or name not in baseline:
+        pytest.skip(f"Sin baseline para {name} (MICROBENCH_SAVE=1 para crearlo)")
+    change = microbench.slowdown(current, baseline[name])
+    assert change <= MAX_SLOWDOWN, (
+        f"{name}: {current * 1e6:.1f} µs vs {baseline[name] * 1e6:.1f} µs "
+        f"({change:+.0%}, tolerancia {MAX_SLOWDOWN:.0%})"
+    )
@@ -0,0 +1,95 @@
+"""
+===========================================================
+🧪 tests/test_model_store.py — Versiones y recarga en caliente
+===========================================================
+
+Verifica que una versión publicada reemplaza a la activa (con
+sus propios límites de validación y ejemplos) y que una versión
+que no carga no interrumpe el servicio.
+===========================================================
+"""
+
+import json
+import logging
+import sys
+from pathlib import Path
+
+import joblib
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.model_store import ModelStore, publish_version, MANIFEST_NAME
+
+
+def publish(model_dir, model, metrics, feature_info=None, examples=None):
+    model_file = model_dir / "model.pkl"
+    joblib.dump(model, model_file)
+    files = {}
+    if feature_info is not None:
+        files["feature_info_file"] = model_dir / "feature_info.json"
+        files["feature_info_file"].write_text(json.dumps(feature_info))
+    if examples is not None:
+        files["examples_file"] = model_dir / "example_cases.json"
+        files["examples_file"].write_text(json.dumps(examples))
+    return publish_version(model_dir, model_file, metrics, **files)
+
+
+def radius_info(high):
+    return {
+        "feature_names": ["mean radius"],
+        "target_names": ["malignant", "benign"],
+        "feature_bounds": {"mean radius": {"min": 0.0, "max": high}},
+    }
+
+
+def make_store(model_dir, swaps):
+    return ModelStore(
+        model_dir, model_dir / "model.pkl", model_dir / "metrics.json",
+        load_engine=lambda source: (joblib.load(source["model"]), None, "pickle"),
+        warmup=lambda engine: None,
+        logger=logging.getLogger("test"), on_swap=swaps.append
+    )
+
+
+def test_new_version_is_swapped_in(tmp_path):
+    """Al publicar una versión nueva, el store la activa y avisa."""
+    first = publish(tmp_path, {"trees": 200}, {"accuracy": 0.9})
+    swaps = []
+    store = make_store(tmp_path, swaps)
+    assert store.active.version == first
+    assert store.check_for_update() is False
+
+    second = publish(tmp_path, {"trees": 50}, {"accuracy": 0.8})
+    assert store.check_for_update() is True
+    assert store.active.version == second
+    assert store.active.model == {"trees": 50}
+    assert store.active.metrics == {"accuracy": 0.8}
+    assert [state.version for state in swaps] == [second]
+
+
+def test_broken_version_keeps_active(tmp_path):
+    """Si la versión nueva no carga, sigue activa la anterior."""
+    first = publish(tmp_path, {"trees": 200}, {"accuracy": 0.9})
+    store = make_store(tmp_path, [])
+
+    second = publish(tmp_path, {"trees": 50}, {"accuracy": 0.8})
+    (tmp_path / "versions" / second / "model.pkl").write_bytes(b"corrupto")
+    (tmp_path / MANIFEST_NAME).touch()
+
+    assert store.check_for_update() is False
+    assert store.active.version == first
+
+
+def test_new_version_reloads_schema_and_examples(tmp_path):
+    """La versión nueva trae sus límites: un valor antes rechazado ahora se acepta."""
+    publish(tmp_path, {"trees": 200}, {}, radius_info(10.0), {"case": {"mean radius": 5.0}})
+    store = make_store(tmp_path, [])
+    row = {"mean radius": 25.0}  # límite con margen 1.0: 10 + 10 = 20
+    assert store.active.schema.row_from_dict(row)[1]
+
+    publish(tmp_path, {"trees": 50}, {}, radius_info(30.0), {"case": {"mean radius": 28.0}})
+    assert store.check_for_update() is True
+    assert store.active.schema.row_from_dict(row)[1] == []
+    assert store.active.examples == {"case": {"mean radius": 28.0}}
+    assert store.active.feature_info["feature_bounds"]["mean radius"]["max"] == 30.0
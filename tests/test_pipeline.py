@@ -0,0 +1,79 @@
+"""
+===========================================================
+🧪 tests/test_pipeline.py — Etapas con caché del entrenamiento
+===========================================================
+
+Verifica que las etapas salgan de la caché cuando no cambió
+nada, que se reejecuten al cambiar sus parámetros o los de una
+etapa anterior, que `force` alcance a las etapas siguientes y
+que los archivos generados se repongan o regeneren.
+===========================================================
+"""
+
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.pipeline import Pipeline
+
+CALLS = []
+
+
+def load(n):
+    CALLS.append("load")
+    return list(range(n))
+
+
+def total(values):
+    CALLS.append("total")
+    return sum(values)
+
+
+def write(value, path):
+    CALLS.append("write")
+    Path(path).write_text(str(value))
+    return value
+
+
+def run(root, n=3, force=None, out=None):
+    pipeline = Pipeline(root, force=force, log=lambda message: None)
+    data = pipeline.run("load", load, params={"n": n})
+    result = pipeline.run("total", total, data)
+    if out is not None:
+        pipeline.run("write", write, result, params={"path": str(out)}, outputs=[out], restore=True)
+    pipeline.report()
+    return result.value, [t["status"] for t in pipeline.timings]
+
+
+def test_cache_hit_and_invalidation(tmp_path):
+    CALLS.clear()
+    assert run(tmp_path) == (3, ["ran", "ran"])
+    assert run(tmp_path) == (3, ["cached", "cached"])
+    assert CALLS == ["load", "total"]
+
+    # Un parámetro distinto cambia la clave de la etapa y de las siguientes
+    assert run(tmp_path, n=4) == (6, ["ran", "ran"])
+    assert run(tmp_path, n=3) == (3, ["cached", "cached"])
+
+
+def test_force_propagates(tmp_path):
+    run(tmp_path)
+    CALLS.clear()
+    assert run(tmp_path, force=["total"])[1] == ["cached", "forced"]
+    assert run(tmp_path, force=["load"])[1] == ["forced", "forced"]
+    assert run(tmp_path, force=[])[1] == ["forced", "forced"]
+    assert CALLS == ["total", "load", "total", "load", "total"]
+
+
+def test_outputs_restored(tmp_path):
+    out = tmp_path / "out.txt"
+    assert run(tmp_path / "cache", out=out)[1] == ["ran", "ran", "ran"]
+    out.unlink()
+    CALLS.clear()
+    assert run(tmp_path / "cache", out=out)[1] == ["cached", "cached", "restored"]
+    assert out.read_text() == "3" and CALLS == []
+
+    report = (tmp_path / "cache" / "last_run.json").read_text()
+    assert '"restored"' in report
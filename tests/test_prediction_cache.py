@@ -0,0 +1,90 @@
+"""
+===========================================================
+🧪 tests/test_prediction_cache.py — Caché de predicciones
+===========================================================
+
+Verifica la clave canónica, el desalojo LRU, la expiración por
+TTL, la invalidación al cambiar de modelo y el nivel compartido.
+===========================================================
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.prediction_cache import PredictionCache, SQLiteCacheBackend, canonical_key
+
+PROBA = np.array([0.25, 0.75])
+
+
+def test_canonical_key():
+    """Vectores equivalentes para los árboles comparten clave."""
+    assert canonical_key([0.0, 1.0], "v1") == canonical_key([-0.0, 1.0], "v1")
+    assert canonical_key([0.1, 1.0], "v1") == canonical_key([np.float32(0.1), 1.0], "v1")
+    assert canonical_key([0.1, 1.0], "v1") != canonical_key([0.1, 1.0], "v2")
+    assert canonical_key([0.1, 1.0], "v1") != canonical_key([0.2, 1.0], "v1")
+
+
+def test_lru_eviction_and_counters():
+    """Se desaloja la entrada menos usada y se cuentan aciertos y fallos."""
+    cache = PredictionCache(max_entries=2, ttl_seconds=60, model_version="v1")
+    keys = [cache.key([float(i)]) for i in range(3)]
+
+    cache.put(keys[0], 1, PROBA)
+    cache.put(keys[1], 1, PROBA)
+    assert cache.get(keys[0]) is not None
+    cache.put(keys[2], 1, PROBA)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+
+
+def test_ttl_expiration():
+    """Las entradas vencidas no se devuelven."""
+    cache = PredictionCache(max_entries=10, ttl_seconds=-1, model_version="v1")
+    key = cache.key([1.0])
+    cache.put(key, 1, PROBA)
+
+    assert cache.get(key) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_model_change_invalidates():
+    """Un modelo nuevo vacía la caché."""
+    cache = PredictionCache(max_entries=10, ttl_seconds=60, model_version="v1")
+    cache.put(cache.key([1.0]), 1, PROBA)
+    cache.set_model_version("v2")
+
+    assert cache.stats()["entries"] == 0
+    assert cache.get(cache.key([1.0])) is None
+
+
+def test_stale_version_not_cached():
+    """Lo que calculó el modelo anterior no se guarda bajo la versión nueva."""
+    cache = PredictionCache(max_entries=10, ttl_seconds=60, model_version="v2")
+    old_key = cache.key([1.0], "v1")
+    assert old_key != cache.key([1.0])
+    cache.put(old_key, 1, PROBA, "v1")
+    assert cache.stats()["entries"] == 0
+    cache.put(cache.key([1.0], "v2"), 1, PROBA, "v2")
+    assert cache.get(cache.key([1.0])) is not None
+
+
+def test_shared_backend(tmp_path):
+    """Un resultado guardado por un proceso lo ve otro con el mismo archivo."""
+    path = tmp_path / "predictions.sqlite"
+    writer = PredictionCache(10, 60, "v1", shared=SQLiteCacheBackend(path, 10))
+    reader = PredictionCache(10, 60, "v1", shared=SQLiteCacheBackend(path, 10))
+
+    writer.put(writer.key([1.0]), 1, PROBA)
+    label, proba = reader.get(reader.key([1.0]))
+
+    assert label == 1
+    assert np.array_equal(proba, PROBA)
+    assert reader.stats()["shared_hits"] == 1
@@ -0,0 +1,67 @@
+"""
+===========================================================
+🧪 tests/test_response_encoding.py — Codificación de lotes
+===========================================================
+
+Verifica que las codificaciones alternativas de /predict/batch
+conservan etiquetas y probabilidades.
+===========================================================
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils import response_encoding
+from utils.response_encoding import (
+    encode_arrow, encode_columns_json, encode_raw_float32, proba_to_list
+)
+
+CLASSES = np.array([0, 1])
+LABELS = np.array([1, 0, 1])
+PROBA = np.array([[0.2, 0.8], [0.9, 0.1], [0.45, 0.55]])
+
+
+def test_columns_json():
+    """JSON por columnas: una lista por clase."""
+    body, _ = encode_columns_json(LABELS, PROBA, CLASSES)
+    data = json.loads(body)
+    assert data["predictions"] == [1, 0, 1]
+    assert data["probabilities"]["1"] == [0.8, 0.1, 0.55]
+
+
+def test_raw_float32():
+    """Buffer crudo float32 con la forma en los encabezados."""
+    body, headers = encode_raw_float32(LABELS, PROBA, CLASSES)
+    assert headers["X-Shape"] == "3,2"
+    proba = np.frombuffer(body, dtype="<f4").reshape(3, 2)
+    assert np.allclose(proba, PROBA)
+
+
+def test_arrow():
+    """Arrow IPC con columnas prediction y probability_<clase>."""
+    pa = pytest.importorskip("pyarrow")
+    body, _ = encode_arrow(LABELS, PROBA, CLASSES)
+    table = pa.ipc.open_stream(body).read_all()
+    assert table.column("prediction").to_pylist() == [1, 0, 1]
+    assert table.column("probability_0").to_pylist() == [0.2, 0.9, 0.45]
+
+
+def test_proba_to_list_float32(monkeypatch):
+    """float32 se devuelve con su representación corta, con o sin orjson."""
+    rng = np.random.default_rng(0)
+    proba = np.concatenate([
+        rng.random((500, 2)), np.arange(52).reshape(26, 2) / 51, rng.random((10, 2)) * 1e-6,
+    ]).astype(np.float32)
+    expected = [[float(str(v)) for v in row] for row in proba]
+    assert proba_to_list(proba) == expected
+    assert proba_to_list(proba[:, 1]) == [row[1] for row in expected]  # no contiguo
+    monkeypatch.setattr(response_encoding, "orjson", None)
+    assert proba_to_list(proba) == expected
+    assert proba_to_list(proba.astype(np.float64)) == proba.astype(np.float64).tolist()
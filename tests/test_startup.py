@@ -0,0 +1,69 @@
+"""
+===========================================================
+🧪 tests/test_startup.py — Arranque y preparación
+===========================================================
+
+Verifica que importar la API no cargue los módulos pesados
+que /predict no usa, que el worker quede listo con sus fases
+medidas y que las fases no se reescriban después de estar listo.
+===========================================================
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.lazy_import import lazy_import
+from utils.startup import StartupReport
+
+PROBE = """
+import json, sys
+sys.path.insert(0, "api")
+import api
+client = api.app.test_client()
+ready = client.get("/ready")
+case = next(iter(api.store.active.examples.values()))
+predict = client.post("/predict", json=case)
+print(json.dumps({
+    "ready": ready.status_code,
+    "phases": sorted(ready.get_json()["startup"]["phases_s"]),
+    "predict": predict.status_code,
+    "heavy": [m for m in ("pandas", "joblib", "pyarrow", "PIL") if m in sys.modules],
+}))
+"""
+
+
+def test_api_starts_ready_without_heavy_modules():
+    """Tras importar la API y servir /predict no se cargaron pandas, joblib, pyarrow ni Pillow."""
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BASE_DIR, capture_output=True, text=True, check=True,
+        env={**os.environ, "MODEL_RELOAD_INTERVAL": "0", "STARTUP_MODE": "sync"},
+    )
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    assert probe["ready"] == 200 and probe["predict"] == 200
+    assert {"imports", "artifacts", "model_load", "warmup"} <= set(probe["phases"])
+    assert probe["heavy"] == []
+
+
+def test_phases_frozen_after_ready():
+    report = StartupReport()
+    with report.phase("model_load"):
+        time.sleep(0.01)
+    report.mark_ready()
+    with report.phase("model_load"):  # recarga en caliente: no cuenta como arranque
+        time.sleep(0.05)
+    assert report.phases["model_load"] < 0.05
+    assert report.as_dict()["ready"] is True
+    assert ("api_ready", 1) in [(name, value) for name, _, value in report.metric_samples()]
+
+
+def test_lazy_import():
+    assert lazy_import("no_existe_este_paquete", optional=True) is None
+    module = lazy_import("colorsys")
+    assert module.rgb_to_hsv(1, 0, 0) == (0.0, 1.0, 1)
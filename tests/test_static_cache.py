@@ -0,0 +1,57 @@
+"""
+===========================================================
+🧪 tests/test_static_cache.py — Respuestas pre-serializadas
+===========================================================
+
+Verifica la negociación de Accept-Encoding, que las variantes
+comprimidas reproduzcan el cuerpo original y que una entrada
+se reconstruya solo cuando cambia su versión.
+===========================================================
+"""
+
+import gzip
+import json
+import sys
+from pathlib import Path
+
+from werkzeug.http import parse_accept_header
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from utils.static_cache import StaticCache, StaticPayload
+
+BODY = json.dumps({"feature_names": [f"feature {i}" for i in range(100)]}).encode()
+
+
+def test_negotiation_and_variants():
+    """Cada cliente recibe la mejor variante que acepta, con su propio ETag."""
+    payload = StaticPayload(BODY, "application/json")
+    assert gzip.decompress(payload.variants["gzip"]) == BODY
+
+    encoding, body, etag = payload.negotiate(parse_accept_header("gzip, deflate"))
+    assert (encoding, body, etag) == ("gzip", payload.variants["gzip"], f"{payload.etag}-gzip")
+    assert payload.negotiate(parse_accept_header(""))[0] == "identity"
+    assert payload.negotiate(parse_accept_header("gzip;q=0"))[0] == "identity"
+    assert payload.negotiate(parse_accept_header("identity;q=1, gzip;q=0.5"))[0] == "identity"
+
+
+def test_compressed_formats_are_not_recompressed():
+    """PNG y cuerpos pequeños se sirven tal cual."""
+    assert list(StaticPayload(BODY, "image/png").variants) == ["identity"]
+    assert list(StaticPayload(b"{}", "application/json").variants) == ["identity"]
+
+
+def test_rebuild_only_on_new_version():
+    cache = StaticCache()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return StaticPayload(BODY, "application/json")
+
+    first = cache.get("model_info", "v1", build)
+    assert cache.get("model_info", "v1", build) is first
+    assert cache.get("model_info", "v2", build) is not first
+    assert len(builds) == 2
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,196 @@
+"""
+===========================================================
+📌 admission.py — Control de admisión y descarte de carga
+===========================================================
+
+Limita el trabajo que cada worker acepta a la vez, con dos
+carriles de prioridad:
+- interactive → /predict (filas individuales, latencia baja).
+- bulk        → /predict/batch (lotes grandes).
+
+Cada carril tiene un máximo de evaluaciones en curso y una cola
+acotada con tiempo de espera máximo. El carril bulk solo usa una
+parte de la capacidad total y cede los espacios libres cuando
+hay peticiones interactivas esperando. Además, las filas por
+segundo de los lotes se limitan con un token bucket.
+
+Lo que no entra se rechaza rápido: 503 si la cola está llena o
+se agotó la espera, 429 si se superó el límite de filas, ambos
+con `Retry-After`. Los límites son por proceso (por worker).
+===========================================================
+"""
+import math
+import threading
+import time
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+
+class Rejected(Exception):
+    """Petición descartada: código HTTP, motivo y segundos sugeridos para reintentar."""
+
+    def __init__(self, status, reason, retry_after, message):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    """Límite de filas por segundo con ráfagas de hasta `burst` filas."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, n):
+        """
+        Descuenta `n` filas si hay saldo y devuelve 0; si no, devuelve los
+        segundos que faltan. Un lote mayor que la ráfaga pasa con el bucket
+        lleno y deja saldo negativo.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            needed = min(n, self.capacity)
+            if self.tokens >= needed:
+                self.tokens -= n
+                return 0.0
+            return (needed - self.tokens) / self.rate
+
+
+class Lane:
+    def __init__(self, max_in_flight, max_queue, queue_timeout):
+        self.max_in_flight = int(max_in_flight)
+        self.max_queue = int(max_queue)
+        self.queue_timeout = float(queue_timeout)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = {}
+        self.service_time = 0.01  # EWMA de segundos por petición, para Retry-After
+
+
+class AdmissionController:
+    """Espacios de evaluación compartidos por los carriles interactive y bulk."""
+
+    def __init__(self, max_in_flight, lanes, batch_rows_per_second=0, batch_rows_burst=None,
+                 on_wait=None):
+        self.max_in_flight = int(max_in_flight)
+        self.lanes = {name: Lane(**config) for name, config in lanes.items()}
+        self.rows = (TokenBucket(batch_rows_per_second, batch_rows_burst)
+                     if batch_rows_per_second > 0 else None)
+        self.on_wait = on_wait
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def _can_run(self, name):
+        lane = self.lanes[name]
+        if self.in_flight >= self.max_in_flight or lane.in_flight >= lane.max_in_flight:
+            return False
+        # Prioridad: bulk no toma un espacio si hay interactivas esperando
+        return name == INTERACTIVE or self.lanes[INTERACTIVE].waiting == 0
+
+    def _retry_after(self, lane):
+        return lane.service_time * (lane.waiting + 1) / max(1, lane.max_in_flight)
+
+    def _shed(self, lane, reason):
+        lane.shed[reason] = lane.shed.get(reason, 0) + 1
+
+    def acquire(self, name):
+        """Espera un espacio en el carril o lanza Rejected. Devuelve el instante de entrada."""
+        lane = self.lanes[name]
+        started = time.monotonic()
+        with self._cond:
+            if not self._can_run(name):
+                if lane.waiting >= lane.max_queue:
+                    self._shed(lane, "queue_full")
+                    raise Rejected(503, "queue_full", self._retry_after(lane),
+                                   "Servidor saturado: cola de espera llena")
+                lane.waiting += 1
+                deadline = started + lane.queue_timeout
+                try:
+                    while not self._can_run(name):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._shed(lane, "timeout")
+                            raise Rejected(503, "timeout", self._retry_after(lane),
+                                           "Servidor saturado: se agotó la espera")
+                        self._cond.wait(remaining)
+                finally:
+                    lane.waiting -= 1
+                    # Si otra petición interactiva sale de la cola, bulk puede avanzar
+                    self._cond.notify_all()
+            lane.in_flight += 1
+            lane.admitted += 1
+            self.in_flight += 1
+        admitted = time.monotonic()
+        if self.on_wait is not None:
+            self.on_wait(name, admitted - started)
+        return admitted
+
+    def release(self, name, admitted):
+        lane = self.lanes[name]
+        elapsed = time.monotonic() - admitted
+        with self._cond:
+            lane.in_flight -= 1
+            self.in_flight -= 1
+            lane.service_time = 0.8 * lane.service_time + 0.2 * elapsed
+            self._cond.notify_all()
+
+    def take_rows(self, n, wait=False):
+        """
+        Cobra `n` filas al límite de filas por segundo. Sin `wait` lanza
+        Rejected (429) si no alcanza; con `wait` espera (modo stream).
+        """
+        if self.rows is None:
+            return
+        while True:
+            delay = self.rows.take(n)
+            if delay == 0:
+                return
+            if not wait:
+                with self._cond:
+                    self._shed(self.lanes[BULK], "rate_limited")
+                raise Rejected(429, "rate_limited", delay,
+                               "Límite de filas por segundo superado")
+            time.sleep(delay)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self.in_flight,
+                "batch_rows_per_second": self.rows.rate if self.rows is not None else None,
+                "lanes": {
+                    name: {
+                        "max_in_flight": lane.max_in_flight,
+                        "max_queue": lane.max_queue,
+                        "queue_timeout_s": lane.queue_timeout,
+                        "in_flight": lane.in_flight,
+                        "queue_depth": lane.waiting,
+                        "admitted": lane.admitted,
+                        "shed": dict(lane.shed),
+                    }
+                    for name, lane in self.lanes.items()
+                },
+            }
+
+    def metric_samples(self):
+        """Muestras para /metrics: [(nombre, etiquetas, valor)]."""
+        samples = []
+        for name, lane in self.stats()["lanes"].items():
+            labels = {"lane": name}
+            samples.append(("api_admission_in_flight", labels, lane["in_flight"]))
+            samples.append(("api_admission_queue_depth", labels, lane["queue_depth"]))
+            samples.append(("api_admission_admitted_total", labels, lane["admitted"]))
+            for reason, count in lane["shed"].items():
+                samples.append(("api_admission_shed_total", {**labels, "reason": reason}, count))
+        return samples
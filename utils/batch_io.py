@@ -0,0 +1,156 @@
+"""
+===========================================================
+📌 batch_io.py — Lectura de archivos para /predict/batch
+===========================================================
+
+Además de CSV, acepta formatos binarios columnares:
+- Parquet y Arrow IPC (stream), requieren `pyarrow` (opcional).
+- Matrices `.npy` float32/float64 little-endian con las 30
+  columnas ya en el orden de `feature_info["feature_names"]`.
+
+Los archivos subidos se leen sin copiarlos cuando es posible:
+los que werkzeug ya volcó a disco se mapean en memoria y los
+pequeños se usan directamente desde su buffer.
+===========================================================
+"""
+import io
+import mmap
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from utils.lazy_import import lazy_import
+
+# pandas y pyarrow se importan en el primer uso: /predict no los necesita
+pd = lazy_import("pandas")
+pa = lazy_import("pyarrow", optional=True)
+pa_ipc = lazy_import("pyarrow.ipc", optional=True)
+pq = lazy_import("pyarrow.parquet", optional=True)
+
+# Tipo de contenido → formato interno
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/x-npy": "npy",
+}
+EXTENSIONS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".arrows": "arrow",
+    ".npy": "npy",
+}
+NPY_DTYPES = (np.dtype("<f4"), np.dtype("<f8"))
+
+
+class UnsupportedFormat(ValueError):
+    """El formato pedido no se reconoce o falta la dependencia opcional."""
+
+
+def detect_format(mimetype, filename=None):
+    """Formato según el tipo de contenido; si es genérico, según la extensión."""
+    if mimetype in CONTENT_TYPES:
+        return CONTENT_TYPES[mimetype]
+    if filename:
+        extension = os.path.splitext(filename)[1].lower()
+        if extension in EXTENSIONS:
+            return EXTENSIONS[extension]
+    # Compatibilidad: antes todo archivo se leía como CSV
+    return "csv"
+
+
+def upload_buffer(stream):
+    """Vista de solo lectura del archivo subido, sin copiarlo cuando es posible."""
+    raw = getattr(stream, "_file", stream)  # SpooledTemporaryFile de werkzeug
+    if isinstance(raw, io.BytesIO):
+        return raw.getbuffer()
+    try:
+        raw.flush()
+        return mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        raw.seek(0)
+        return memoryview(raw.read())
+
+
+def spool_stream(stream, chunk_size=1024 * 1024):
+    """Vuelca un cuerpo crudo (no multipart) a un archivo temporal mapeable."""
+    spooled = tempfile.TemporaryFile("w+b")
+    shutil.copyfileobj(stream, spooled, chunk_size)
+    spooled.seek(0)
+    return spooled
+
+
+def table_to_matrix(table, feature_names):
+    """Tabla Arrow → matriz en el orden del modelo (columnas faltantes en 0)."""
+    matrix = np.zeros((table.num_rows, len(feature_names)), dtype=np.float32)
+    available = set(table.column_names)
+    for j, name in enumerate(feature_names):
+        if name in available:
+            column = table.column(name).cast(pa.float32())
+            matrix[:, j] = column.to_numpy(zero_copy_only=False)
+    return matrix
+
+
+def read_npy(buffer, n_features):
+    """Matriz `.npy` vista directamente sobre el buffer (sin copia)."""
+    header = io.BytesIO(buffer[:4096])
+    version = np.lib.format.read_magic(header)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(header)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(header)
+
+    if dtype not in NPY_DTYPES:
+        raise ValueError(f"Tipo no soportado en .npy: {dtype} (usar <f4 o <f8)")
+    if len(shape) != 2 or shape[1] != n_features:
+        raise ValueError(f"Se esperaba una matriz (n, {n_features}), se recibió {shape}")
+
+    return np.ndarray(
+        shape, dtype=dtype, buffer=buffer, offset=header.tell(),
+        order="F" if fortran_order else "C"
+    )
+
+
+def read_matrix(buffer, fmt, feature_names, return_columns=False):
+    """
+    Lee un archivo binario y devuelve la matriz en el orden del modelo. Con
+    `return_columns=True` devuelve además qué columnas venían en el archivo.
+    """
+    if fmt == "npy":
+        matrix = read_npy(buffer, len(feature_names))
+        present = np.ones(len(feature_names), dtype=bool)
+        return (matrix, present) if return_columns else matrix
+
+    if pa is None:
+        raise UnsupportedFormat(f"El formato {fmt} requiere instalar pyarrow")
+
+    source = pa.py_buffer(buffer)
+    if fmt == "parquet":
+        schema = pq.read_schema(pa.BufferReader(source))
+        columns = [name for name in feature_names if name in schema.names]
+        table = pq.read_table(pa.BufferReader(source), columns=columns)
+    elif fmt == "arrow":
+        table = pa_ipc.open_stream(source).read_all()
+    else:
+        raise UnsupportedFormat(f"Formato no soportado: {fmt}")
+    matrix = table_to_matrix(table, feature_names)
+    if not return_columns:
+        return matrix
+    available = set(table.column_names)
+    return matrix, np.array([name in available for name in feature_names])
+
+
+def iter_chunks(matrix, chunk_rows):
+    """Divide una matriz en vistas de `chunk_rows` filas."""
+    for start in range(0, matrix.shape[0], chunk_rows):
+        yield matrix[start:start + chunk_rows]
+
+
+def iter_csv_chunks(file, chunk_rows):
+    """Lee un CSV por bloques de `chunk_rows` filas (sin reordenar columnas)."""
+    yield from pd.read_csv(file, chunksize=chunk_rows)
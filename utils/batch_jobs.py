@@ -0,0 +1,468 @@
+"""
+===========================================================
+📌 batch_jobs.py — Cola de trabajos de predicción por lotes
+===========================================================
+
+Los archivos grandes no se evalúan dentro de la petición HTTP:
+la API guarda el archivo en `JOBS_DIR/<id>/`, registra el trabajo
+en una cola SQLite (`JOBS_DIR/jobs.sqlite`) y responde con su id.
+
+Un proceso aparte (`api/jobs_worker.py`) toma los trabajos y los
+divide en bloques de filas que evalúa en paralelo con un pool de
+procesos de baja prioridad (nice), así la latencia de /predict en
+los workers de gunicorn no compite con los lotes. Cada bloque
+terminado se guarda como `parts/<n>.part` y se marca en la base:
+si el proceso se reinicia, el trabajo continúa desde los bloques
+pendientes. El resultado es la concatenación ordenada de las partes.
+===========================================================
+"""
+import io
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import numpy as np
+
+from utils.batch_io import NPY_DTYPES, read_matrix
+from utils.forest_engine import FlatForest
+from utils.input_schema import InputSchema
+from utils.lazy_import import lazy_import
+from utils.model_store import published_source
+from utils.response_encoding import encode_stream_block, stream_header
+
+joblib = lazy_import("joblib")
+pd = lazy_import("pandas")
+
+RESULT_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+INPUT_EXTENSIONS = {"csv": ".csv", "npy": ".npy", "parquet": ".parquet", "arrow": ".arrows"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY, status TEXT, input_format TEXT, result_format TEXT,
+    chunk_rows INTEGER, rows_total INTEGER, rows_done INTEGER DEFAULT 0,
+    rows_invalid INTEGER DEFAULT 0, chunks_total INTEGER, chunks_done INTEGER DEFAULT 0,
+    model_version TEXT, plan TEXT, created_at REAL, started_at REAL,
+    finished_at REAL, heartbeat REAL, error TEXT
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    job_id TEXT, idx INTEGER, start_row INTEGER, rows INTEGER, byte_offset INTEGER,
+    status TEXT, rows_invalid INTEGER DEFAULT 0, PRIMARY KEY (job_id, idx)
+);
+"""
+
+
+# === COLA (SQLite + archivos) ===
+class JobStore:
+    """Estado de los trabajos, compartido entre la API y el proceso de trabajos."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.path = str(self.root / "jobs.sqlite")
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self):
+        # Una conexión por proceso: no se comparten tras el fork
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False,
+                                   isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._connection().execute(sql, params).fetchall()
+
+    def job_dir(self, job_id):
+        return self.root / job_id
+
+    def input_path(self, job):
+        return self.job_dir(job["id"]) / f"input{INPUT_EXTENSIONS[job['input_format']]}"
+
+    def part_path(self, job_id, idx):
+        return self.job_dir(job_id) / "parts" / f"{idx:06d}.part"
+
+    # --- API ---
+    def create(self, stream, input_format, result_format, chunk_rows):
+        """Guarda el archivo (copiándolo por bloques) y encola el trabajo."""
+        job_id = uuid.uuid4().hex
+        job_dir = self.job_dir(job_id)
+        (job_dir / "parts").mkdir(parents=True)
+        target = job_dir / f"input{INPUT_EXTENSIONS[input_format]}"
+        with open(target, "wb") as f:
+            shutil.copyfileobj(stream, f, 1024 * 1024)
+        self._execute(
+            "INSERT INTO jobs (id, status, input_format, result_format, chunk_rows, created_at) "
+            "VALUES (?, 'queued', ?, ?, ?, ?)",
+            (job_id, input_format, result_format, int(chunk_rows), time.time())
+        )
+        return job_id
+
+    def get(self, job_id):
+        rows = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return dict(rows[0]) if rows else None
+
+    def status(self, job_id):
+        """Estado público del trabajo con su avance."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        total = job["rows_total"]
+        return {
+            "job_id": job["id"],
+            "status": job["status"],
+            "input_format": job["input_format"],
+            "result_format": job["result_format"],
+            "rows_total": total,
+            "rows_done": job["rows_done"],
+            "rows_invalid": job["rows_invalid"],
+            "chunks_total": job["chunks_total"],
+            "chunks_done": job["chunks_done"],
+            "progress": round(job["rows_done"] / total, 4) if total else 0.0,
+            "model_version": job["model_version"],
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+            "error": job["error"],
+        }
+
+    def iter_result(self, job_id):
+        """Encabezado y partes del resultado en orden (para enviarlo por bloques)."""
+        job = self.get(job_id)
+        yield json.loads(job["plan"])["header"]
+        for idx in range(job["chunks_total"]):
+            with open(self.part_path(job_id, idx)) as f:
+                yield from iter(lambda: f.read(1024 * 1024), "")
+
+    def delete(self, job_id):
+        self._execute("DELETE FROM chunks WHERE job_id = ?", (job_id,))
+        self._execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+    def counts(self):
+        rows = self._execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+        return {row["status"]: row["n"] for row in rows}
+
+    # --- Proceso de trabajos ---
+    def claim(self, stale_seconds):
+        """
+        Toma el trabajo en cola más antiguo, o uno en curso cuyo proceso dejó
+        de dar señales (se retoma desde sus bloques pendientes).
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' "
+                    "OR (status = 'running' AND heartbeat < ?) ORDER BY created_at LIMIT 1",
+                    (now - stale_seconds,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', heartbeat = ?, "
+                        "started_at = COALESCE(started_at, ?) WHERE id = ?",
+                        (now, now, row["id"])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"]) if row is not None else None
+
+    def set_plan(self, job_id, chunks, plan, model_version):
+        rows_total = sum(rows for _, rows, _ in chunks)
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM chunks WHERE job_id = ?", (job_id,))
+            conn.executemany(
+                "INSERT INTO chunks (job_id, idx, start_row, rows, byte_offset, status) "
+                "VALUES (?, ?, ?, ?, ?, 'pending')",
+                [(job_id, idx, start, rows, offset)
+                 for idx, (start, rows, offset) in enumerate(chunks)]
+            )
+            conn.execute(
+                "UPDATE jobs SET rows_total = ?, chunks_total = ?, plan = ?, "
+                "model_version = ?, heartbeat = ? WHERE id = ?",
+                (rows_total, len(chunks), json.dumps(plan), model_version, time.time(), job_id)
+            )
+            conn.execute("COMMIT")
+
+    def pending_chunks(self, job_id):
+        rows = self._execute(
+            "SELECT * FROM chunks WHERE job_id = ? AND status != 'done' ORDER BY idx", (job_id,)
+        )
+        return [dict(row) for row in rows]
+
+    def chunk_done(self, job_id, idx, rows, rows_invalid):
+        """Checkpoint de un bloque: su parte ya está escrita en disco."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE chunks SET status = 'done', rows_invalid = ? WHERE job_id = ? AND idx = ?",
+                (rows_invalid, job_id, idx)
+            )
+            conn.execute(
+                "UPDATE jobs SET rows_done = rows_done + ?, rows_invalid = rows_invalid + ?, "
+                "chunks_done = chunks_done + 1, heartbeat = ? WHERE id = ?",
+                (rows, rows_invalid, time.time(), job_id)
+            )
+            conn.execute("COMMIT")
+
+    def touch(self, job_id):
+        self._execute("UPDATE jobs SET heartbeat = ? WHERE id = ?", (time.time(), job_id))
+
+    def finish(self, job_id, status, error=None):
+        self._execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+            (status, error, time.time(), job_id)
+        )
+
+
+# === PLAN DE BLOQUES ===
+def csv_records(f):
+    """
+    Registros de un CSV binario como (bytes, fin en bytes). Un salto de línea
+    dentro de comillas no cierra el registro: con comillas pares (`""` es una
+    comilla escapada) el registro termina en ese salto.
+    """
+    record, quotes, position = b"", 0, f.tell()
+    for line in f:
+        position += len(line)
+        record += line
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            yield record, position
+            record, quotes = b"", 0
+    if record:
+        raise ValueError("El CSV termina dentro de un campo entre comillas sin cerrar")
+
+
+def plan_csv(path, chunk_rows):
+    """
+    Recorre el CSV una vez y anota el byte donde empieza cada bloque, para
+    que cada proceso lea solo su parte. Los bloques se cortan entre registros,
+    no en cualquier salto de línea, así un campo entre comillas con saltos de
+    línea queda entero en su bloque. Devuelve (columnas, bloques).
+    """
+    chunks = []
+    with open(path, "rb") as f:
+        records = csv_records(f)
+        header, offset = next(records, (b"", 0))
+        start_row, rows = 0, 0
+        for record, position in records:
+            if not record.strip():
+                continue
+            rows += 1
+            if rows == chunk_rows:
+                chunks.append((start_row, rows, offset))
+                start_row, rows, offset = start_row + rows, 0, position
+        if rows:
+            chunks.append((start_row, rows, offset))
+    columns = pd.read_csv(io.StringIO(header.decode()), nrows=0).columns
+    return list(columns), chunks
+
+
+def plan_matrix(n_rows, chunk_rows):
+    return [(start, min(chunk_rows, n_rows - start), 0) for start in range(0, n_rows, chunk_rows)]
+
+
+# === EVALUACIÓN DE UN BLOQUE (en los procesos del pool) ===
+_worker = {}
+
+
+def init_worker(feature_info, bounds_margin, nice):
+    """Inicializa cada proceso del pool: prioridad baja y esquema compilado."""
+    if nice:
+        os.nice(nice)
+    _worker["schema"] = InputSchema.from_feature_info(feature_info, bounds_margin)
+    _worker["engines"] = {}
+
+
+def load_job_engine(source):
+    """Motor de la versión del trabajo: forest.bin mapeado o, si no existe, model.pkl."""
+    if source.get("forest"):
+        return FlatForest.load(source["forest"], mmap_mode=True)
+    model = joblib.load(source["model"])
+    try:
+        return FlatForest.from_sklearn(model)
+    except Exception:
+        return model
+
+
+def score_matrix(engine, schema, X, valid):
+    """Etiquetas y probabilidades de las filas válidas (None si no hay ninguna)."""
+    if not valid.any():
+        return None, None
+    X_valid = X if valid.all() else X[valid]
+    if not isinstance(engine, FlatForest):
+        X_valid = pd.DataFrame(X_valid, columns=schema.feature_names)
+    proba = engine.predict_proba(X_valid)
+    labels = engine.classes_.take(np.argmax(proba, axis=1), axis=0)
+    if valid.all():
+        return labels, proba
+    all_labels = np.full(len(X), -1, dtype=labels.dtype)
+    all_probas = np.full((len(X), proba.shape[1]), np.nan, dtype=proba.dtype)
+    all_labels[valid], all_probas[valid] = labels, proba
+    return all_labels, all_probas
+
+
+def score_chunk(task):
+    """Lee, valida y evalúa un bloque; escribe su parte de forma atómica."""
+    schema = _worker["schema"]
+    plan = task["plan"]
+    version = plan["source"]["version"]
+    engine = _worker["engines"].get(version)
+    if engine is None:
+        engine = _worker["engines"][version] = load_job_engine(plan["source"])
+
+    if plan["matrix"] is None:
+        with open(task["input"], "rb") as f:
+            f.seek(task["byte_offset"])
+            frame = pd.read_csv(f, header=None, names=plan["columns"], nrows=task["rows"])
+        X, type_errors, present = schema.frame_to_matrix(frame)
+        source = frame
+    else:
+        matrix = np.load(plan["matrix"], mmap_mode="r")
+        X = matrix[task["start_row"]:task["start_row"] + task["rows"]]
+        type_errors, source = None, None
+        present = np.array(plan["present"]) if plan["present"] is not None else None
+
+    valid, report = schema.validate_matrix(
+        X, type_errors, source, task["start_row"], len(X), present
+    )
+    labels, probas = score_matrix(engine, schema, X, valid)
+    block = encode_stream_block(
+        plan["result_format"], labels, probas, report, task["start_row"], len(engine.classes_)
+    )
+
+    part = Path(task["part"])
+    tmp = part.with_suffix(".tmp")
+    tmp.write_text(block)
+    os.replace(tmp, part)
+    return task["idx"], len(X), int(len(X) - valid.sum())
+
+
+# === PROCESO DE TRABAJOS ===
+class JobRunner:
+    """Toma trabajos de la cola y reparte sus bloques en un pool de procesos."""
+
+    def __init__(self, store, feature_info, model_paths, logger, workers=None,
+                 bounds_margin=1.0, nice=10, poll_interval=1.0, stale_seconds=60.0):
+        self.store = store
+        self.feature_info = feature_info
+        self.model_paths = model_paths
+        self.logger = logger
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.poll_interval = poll_interval
+        self.stale_seconds = stale_seconds
+        self.pool = ProcessPoolExecutor(
+            self.workers, initializer=init_worker,
+            initargs=(feature_info, bounds_margin, nice)
+        )
+
+    def plan(self, job):
+        """Divide el archivo en bloques y fija la versión del modelo del trabajo."""
+        source = published_source(**self.model_paths)
+        classes = load_job_engine(source).classes_
+        path = self.store.input_path(job)
+        plan = {
+            "source": {key: str(value) if value is not None else None
+                       for key, value in source.items()},
+            "result_format": job["result_format"],
+            "header": stream_header(job["result_format"], classes),
+            "columns": None, "matrix": None, "present": None,
+        }
+        if job["input_format"] == "csv":
+            plan["columns"], chunks = plan_csv(path, job["chunk_rows"])
+        else:
+            names = self.feature_info["feature_names"]
+            if job["input_format"] == "npy":
+                matrix = np.load(path, mmap_mode="r")
+                if matrix.dtype not in NPY_DTYPES or matrix.ndim != 2 or matrix.shape[1] != len(names):
+                    raise ValueError(
+                        f"Se esperaba una matriz (n, {len(names)}) float32/float64, "
+                        f"se recibió {matrix.shape} {matrix.dtype}"
+                    )
+                plan["matrix"] = str(path)
+            else:
+                # Parquet y Arrow se decodifican una sola vez a una matriz .npy
+                matrix, present = read_matrix(
+                    path.read_bytes(), job["input_format"], names, return_columns=True
+                )
+                plan["matrix"] = str(path.with_name("matrix.npy"))
+                np.save(plan["matrix"], matrix)
+                plan["present"] = present.tolist()
+            chunks = plan_matrix(matrix.shape[0], job["chunk_rows"])
+        self.store.set_plan(job["id"], chunks, plan, source["version"])
+
+    def run_job(self, job):
+        job_id = job["id"]
+        if job["plan"] is None:
+            self.plan(job)
+            job = self.store.get(job_id)
+        plan = json.loads(job["plan"])
+        pending = self.store.pending_chunks(job_id)
+        self.logger.info(
+            f"Trabajo {job_id}: {len(pending)} de {job['chunks_total']} bloques pendientes"
+        )
+
+        futures = {
+            self.pool.submit(score_chunk, {
+                "idx": chunk["idx"], "start_row": chunk["start_row"], "rows": chunk["rows"],
+                "byte_offset": chunk["byte_offset"], "plan": plan,
+                "input": str(self.store.input_path(job)),
+                "part": str(self.store.part_path(job_id, chunk["idx"])),
+            })
+            for chunk in pending
+        }
+        try:
+            while futures:
+                done, futures = wait(futures, timeout=self.stale_seconds / 3,
+                                     return_when=FIRST_COMPLETED)
+                self.store.touch(job_id)
+                for future in done:
+                    idx, rows, rows_invalid = future.result()
+                    self.store.chunk_done(job_id, idx, rows, rows_invalid)
+        except Exception as e:
+            for future in futures:
+                future.cancel()
+            self.logger.error(f"Trabajo {job_id} falló: {str(e)}")
+            self.store.finish(job_id, "failed", str(e))
+            return
+        self.store.finish(job_id, "done")
+        self.logger.info(f"Trabajo {job_id} terminado")
+
+    def run_once(self):
+        """Procesa un trabajo si hay alguno. Devuelve True si procesó uno."""
+        job = self.store.claim(self.stale_seconds)
+        if job is None:
+            return False
+        try:
+            self.run_job(job)
+        except Exception as e:
+            self.logger.error(f"Trabajo {job['id']} falló: {str(e)}")
+            self.store.finish(job["id"], "failed", str(e))
+        return True
+
+    def run_forever(self):
+        while True:
+            if not self.run_once():
+                time.sleep(self.poll_interval)
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
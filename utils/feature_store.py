@@ -0,0 +1,321 @@
+"""
+===========================================================
+📌 feature_store.py — Entrenamiento fuera de memoria
+===========================================================
+
+Para conjuntos que no entran en un DataFrame:
+
+- `build_store` convierte una sola vez archivos CSV o Parquet
+  (uno o una carpeta de partes) en un almacén en disco: la
+  matriz float32 con las 30 columnas en el orden de
+  `feature_info["feature_names"]` y las etiquetas int32. Se lee
+  por bloques y el almacén se abre mapeado en memoria
+  (`FeatureStore`). Si la fuente no cambió, se reutiliza.
+- `StoreRows` selecciona filas con un hash determinista del
+  índice (división train/test reproducible sin índices en RAM).
+- `fit_forest` hace crecer el bosque por fragmentos con
+  `warm_start`: cada fragmento de filas agrega sus árboles, así
+  la memoria pico depende del tamaño del fragmento y no del
+  conjunto completo.
+===========================================================
+"""
+import hashlib
+import json
+import math
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+from utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+pq = lazy_import("pyarrow.parquet", optional=True)
+
+# Sube si cambia el formato del almacén: invalida los ya convertidos
+STORE_VERSION = 1
+# Filas por bloque al convertir y al recorrer el almacén
+CHUNK_ROWS = 100_000
+SOURCE_SUFFIXES = (".csv", ".parquet")
+
+
+# === FUENTES ===
+def source_files(source):
+    """Archivo o carpeta de partes (.csv/.parquet, en orden de nombre)."""
+    source = Path(source)
+    files = sorted(p for p in source.iterdir() if p.suffix in SOURCE_SUFFIXES) \
+        if source.is_dir() else [source]
+    if not files:
+        raise ValueError(f"No hay archivos .csv ni .parquet en {source}")
+    for path in files:
+        if path.suffix not in SOURCE_SUFFIXES:
+            raise ValueError(f"Formato no soportado: {path.name} (se espera .csv o .parquet)")
+    return files
+
+
+def source_fingerprint(source):
+    """Huella de la fuente por ruta, tamaño y fecha de modificación (sin leerla)."""
+    digest = hashlib.blake2b(digest_size=10)
+    for path in source_files(source):
+        stat = path.stat()
+        digest.update(f"{path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def read_chunks(path, columns, chunk_rows=CHUNK_ROWS):
+    """DataFrames de a `chunk_rows` filas con solo `columns`."""
+    if path.suffix == ".csv":
+        header = pd.read_csv(path, nrows=0).columns
+        check_columns(path, header, columns)
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_rows)
+        return
+    if pq is None:
+        raise ValueError("Leer Parquet requiere pyarrow")
+    parquet = pq.ParquetFile(path)
+    check_columns(path, parquet.schema_arrow.names, columns)
+    for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns):
+        yield batch.to_pandas()
+
+
+def check_columns(path, available, columns):
+    missing = [name for name in columns if name not in set(available)]
+    if missing:
+        raise ValueError(f"Faltan columnas en {path.name}: {', '.join(missing)}")
+
+
+def chunk_arrays(chunk, feature_names, target_column, n_classes):
+    """Bloque → (X float32 en el orden del modelo, y int32), validando tipos y etiquetas."""
+    features = chunk[feature_names]
+    non_numeric = [name for name, dtype in features.dtypes.items()
+                   if not pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)]
+    if non_numeric:
+        raise ValueError(f"Columnas no numéricas: {', '.join(non_numeric)}")
+    X = features.to_numpy(dtype=np.float32, na_value=np.nan)
+    target = chunk[target_column]
+    if target.isna().any() or not pd.api.types.is_integer_dtype(target):
+        raise ValueError(f"'{target_column}' debe ser un entero sin faltantes")
+    y = target.to_numpy(dtype=np.int64)
+    if y.size and (y.min() < 0 or y.max() >= n_classes):
+        raise ValueError(f"'{target_column}' debe estar entre 0 y {n_classes - 1}")
+    return X, y.astype(np.int32)
+
+
+# === ALMACÉN ===
+class FeatureStore:
+    """Almacén convertido: `X` (n, 30) float32 y `y` (n,) int32 mapeados en memoria."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / "meta.json").read_text())
+        self.n_rows = self.meta["n_rows"]
+        self.feature_names = self.meta["feature_names"]
+        self.target_names = self.meta["target_names"]
+        shape = (self.n_rows, len(self.feature_names))
+        self.X = np.memmap(self.path / "X.f32", dtype=np.float32, mode="r", shape=shape)
+        self.y = np.memmap(self.path / "y.i32", dtype=np.int32, mode="r", shape=(self.n_rows,))
+
+    def __reduce__(self):
+        # Al cachear o pasar entre procesos solo viaja la ruta, no los datos
+        return FeatureStore, (str(self.path),)
+
+    @property
+    def feature_bounds(self):
+        return self.meta["feature_bounds"]
+
+    @property
+    def class_counts(self):
+        return np.asarray(self.meta["class_counts"])
+
+    def ranges(self, rows=CHUNK_ROWS):
+        """(inicio, fin) de bloques contiguos de `rows` filas."""
+        for start in range(0, self.n_rows, rows):
+            yield start, min(start + rows, self.n_rows)
+
+
+def build_store(source, root, feature_names, target_names, target_column="target",
+                chunk_rows=CHUNK_ROWS, fingerprint=None, log=print):
+    """
+    Convierte `source` en un almacén bajo `root/<huella>` y lo abre. Si ya
+    existe uno para la misma fuente (ruta, tamaño y fecha), no se relee.
+    """
+    fingerprint = fingerprint or source_fingerprint(source)
+    path = Path(root) / f"{fingerprint}-v{STORE_VERSION}"
+    if (path / "meta.json").exists():
+        return FeatureStore(path)
+
+    started = time.perf_counter()
+    feature_names, n_classes = list(feature_names), len(target_names)
+    columns = feature_names + [target_column]
+    low = np.full(len(feature_names), np.inf)
+    high = np.full(len(feature_names), -np.inf)
+    class_counts = np.zeros(n_classes, dtype=np.int64)
+    n_rows = 0
+
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    try:
+        with open(tmp / "X.f32", "wb") as fx, open(tmp / "y.i32", "wb") as fy:
+            for file in source_files(source):
+                for chunk in read_chunks(file, columns, chunk_rows):
+                    X, y = chunk_arrays(chunk, feature_names, target_column, n_classes)
+                    X.tofile(fx)
+                    y.tofile(fy)
+                    if len(X):
+                        low = np.fmin(low, np.nanmin(X, axis=0))
+                        high = np.fmax(high, np.nanmax(X, axis=0))
+                    class_counts += np.bincount(y, minlength=n_classes)
+                    n_rows += len(X)
+        if n_rows == 0:
+            raise ValueError(f"{source} no tiene filas")
+        meta = {
+            "version": STORE_VERSION,
+            "source": str(source),
+            "fingerprint": fingerprint,
+            "n_rows": n_rows,
+            "feature_names": feature_names,
+            "target_names": list(target_names),
+            "feature_bounds": {
+                name: {"min": float(lo), "max": float(hi)}
+                for name, lo, hi in zip(feature_names, low, high)
+            },
+            "class_counts": class_counts.tolist(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        }
+        (tmp / "meta.json").write_text(json.dumps(meta, indent=2))
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    log(f"🗄️ Almacén de features: {n_rows} filas convertidas en "
+        f"{time.perf_counter() - started:.1f} s ({path})")
+    return FeatureStore(path)
+
+
+# === SELECCIÓN DE FILAS ===
+def row_uniform(start, stop, seed):
+    """Valor en [0, 1) por índice de fila (splitmix64): no depende del bloque."""
+    z = np.arange(start, stop, dtype=np.uint64) + np.uint64(seed * 0x9E3779B97F4A7C15 % 2 ** 64)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z ^= z >> np.uint64(31)
+    return (z >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+
+class StoreRows:
+    """Filas del almacén cuyo valor `row_uniform` cae en [lower, upper)."""
+
+    def __init__(self, store, lower=0.0, upper=1.0, seed=42):
+        self.store = store
+        self.lower = lower
+        self.upper = upper
+        self.seed = seed
+
+    @property
+    def expected_rows(self):
+        return self.store.n_rows * (self.upper - self.lower)
+
+    def select(self, start, stop, lower=None, upper=None):
+        """Máscara de las filas elegidas en el bloque [start, stop)."""
+        u = row_uniform(start, stop, self.seed)
+        return (u >= (self.lower if lower is None else lower)) & \
+            (u < (self.upper if upper is None else upper))
+
+    def shards(self, shard_rows):
+        """(inicio, X, y) de cada fragmento: solo las filas elegidas de `shard_rows` contiguas."""
+        for start, stop in self.store.ranges(shard_rows):
+            mask = self.select(start, stop)
+            yield start, self.store.X[start:stop][mask], self.store.y[start:stop][mask]
+
+    def collect(self):
+        """Todas las filas elegidas en memoria (para subconjuntos chicos: test, muestras)."""
+        parts = [(self.store.X[start:stop][mask], self.store.y[start:stop][mask])
+                 for start, stop in self.store.ranges()
+                 for mask in [self.select(start, stop)]]
+        return np.concatenate([X for X, _ in parts]), np.concatenate([y for _, y in parts])
+
+
+# === ENTRENAMIENTO POR FRAGMENTOS ===
+def trees_per_shard(n_estimators, n_shards):
+    """Reparte los árboles entre fragmentos; cada fragmento aporta al menos uno."""
+    if n_shards >= n_estimators:
+        return [1] * n_shards
+    edges = np.linspace(0, n_estimators, n_shards + 1).round().astype(int)
+    return np.diff(edges).tolist()
+
+
+def balanced_weights(class_counts):
+    """`class_weight="balanced"` con las frecuencias de todo el almacén, no del fragmento."""
+    counts = np.asarray(class_counts, dtype=np.float64)
+    return {c: counts.sum() / (len(counts) * n) for c, n in enumerate(counts) if n}
+
+
+def fit_forest(rows, params, shard_rows, oob_rows=10000, log=print):
+    """
+    Entrena un RandomForest sobre `rows` (StoreRows) de a `shard_rows` filas
+    contiguas del almacén: con `warm_start`, cada fragmento agrega sus árboles
+    entrenados solo con sus filas. En memoria hay a lo sumo un fragmento.
+
+    Devuelve (modelo, muestra OOB, reporte). La muestra son ~`oob_rows` filas
+    de entrenamiento con la máscara (filas × árboles) de las que cada árbol no
+    vio: las de otros fragmentos y las que quedaron fuera de su bootstrap.
+    Sirve para podar el bosque con `prune_forest(..., oob=mask)`.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    store = rows.store
+    n_shards = math.ceil(store.n_rows / shard_rows)
+    plan = trees_per_shard(params["n_estimators"], n_shards)
+    model = RandomForestClassifier(
+        **{**params, "n_estimators": 0}, warm_start=True,
+        class_weight=balanced_weights(store.class_counts),
+    )
+    sample_upper = rows.lower + (rows.upper - rows.lower) * min(1.0, oob_rows / max(rows.expected_rows, 1))
+
+    sample_X, sample_y, in_bag = [], [], []
+    started = time.perf_counter()
+    max_shard = 0
+    for (start, X, y), n_trees in zip(rows.shards(shard_rows), plan):
+        missing = set(range(len(store.target_names))) - set(np.unique(y).tolist())
+        if missing:
+            raise ValueError(
+                f"El fragmento que empieza en la fila {start} no tiene la clase "
+                f"{sorted(missing)}: mezclá las filas de la fuente o aumentá el tamaño de fragmento"
+            )
+        model.set_params(n_estimators=model.n_estimators + n_trees)
+        # Con nombres de columnas, como el modelo en memoria (la API le pasa DataFrames)
+        model.fit(pd.DataFrame(X, columns=store.feature_names, copy=False), y)
+        max_shard = max(max_shard, len(X))
+
+        # Muestra OOB: posiciones (dentro del fragmento) de las filas de la muestra
+        stop = min(start + shard_rows, store.n_rows)
+        chosen = rows.select(start, stop)
+        local = np.flatnonzero(rows.select(start, stop, upper=sample_upper)[chosen])
+        sample_X.append(X[local])
+        sample_y.append(y[local])
+        in_bag.append([np.isin(local, samples) for samples in model.estimators_samples_[-n_trees:]])
+
+    # Cada árbol solo pudo ver filas de su fragmento: el resto es OOB
+    offsets = np.cumsum([0] + [len(part) for part in sample_y])
+    mask = np.ones((offsets[-1], len(model.estimators_)), dtype=bool)
+    t = 0
+    for s, shard_bags in enumerate(in_bag):
+        for bag in shard_bags:
+            mask[offsets[s]:offsets[s + 1], t] = ~bag
+            t += 1
+
+    model.set_params(warm_start=False)
+    report = {
+        "n_rows": store.n_rows,
+        "n_shards": n_shards,
+        "shard_rows": shard_rows,
+        "max_shard_train_rows": max_shard,
+        "trees_per_shard": sorted(set(plan)),
+        "fit_seconds": round(time.perf_counter() - started, 3),
+    }
+    log(f"🧱 Bosque por fragmentos: {len(model.estimators_)} árboles en {n_shards} "
+        f"fragmentos de hasta {max_shard} filas ({report['fit_seconds']:.1f} s)")
+    return model, (np.concatenate(sample_X), np.concatenate(sample_y), mask), report
@@ -0,0 +1,227 @@
+"""
+===========================================================
+📌 figures.py — Gráficas del entrenamiento en paralelo
+===========================================================
+
+Cada gráfica (matriz de confusión, curva ROC, importancia de
+características y matriz de correlación) se dibuja dos veces,
+con tema claro y oscuro. Cada (gráfica, tema) es un trabajo
+independiente:
+
+- Se ejecuta en un pool de procesos con el backend `Agg` (sin
+  ventana). El tema se aplica con `plt.style.context`, así
+  el estilo oscuro no queda activo para la gráfica siguiente.
+- El PNG se guarda en una caché con una clave derivada de los
+  datos de la gráfica, el tema, el código que la dibuja y las
+  versiones de matplotlib/seaborn. Si nada cambió, se copia de
+  la caché en vez de volver a dibujarse.
+- `render_figures` informa el tiempo de cada gráfica.
+===========================================================
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np  # noqa: E402
+
+from utils.pipeline import code_fingerprint  # noqa: E402
+
+THEMES = ("light", "dark")
+
+
+# === DIBUJO (en los procesos del pool) ===
+def themed(theme):
+    """Contexto de estilo del tema: el oscuro se revierte al salir."""
+    import matplotlib.pyplot as plt
+    return plt.style.context(["dark_background"] if theme == "dark" else [])
+
+
+def render_confusion(path, theme, cm):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    cmap = "RdPu" if theme == "light" else "magma"
+    annot_color = "black" if theme == "light" else "white"
+    facecolor = "white" if theme == "light" else "black"
+    with themed(theme):
+        fig = plt.figure(figsize=(6, 5))
+        sns.heatmap(
+            cm, annot=True, fmt="d", cmap=cmap, cbar=True,
+            xticklabels=["Benigno", "Maligno"],
+            yticklabels=["Benigno", "Maligno"],
+            annot_kws={"color": annot_color}
+        )
+        plt.title("Matriz de Confusión — Clasificador de Cáncer de Mama",
+                  fontsize=14, pad=15, color=annot_color)
+        plt.xlabel("Predicción", fontsize=12, color=annot_color)
+        plt.ylabel("Real", fontsize=12, color=annot_color)
+        plt.tight_layout()
+        fig.savefig(path, format="png", dpi=150, facecolor=facecolor)
+        plt.close(fig)
+
+
+def render_roc(path, theme, fpr, tpr, auc):
+    import matplotlib.pyplot as plt
+
+    color = "deeppink" if theme == "light" else "cyan"
+    text_color = "black" if theme == "light" else "white"
+    facecolor = "white" if theme == "light" else "black"
+    with themed(theme):
+        fig = plt.figure(figsize=(6, 5))
+        plt.plot(fpr, tpr, color=color, linewidth=2, label=f"AUC = {auc:.2f}")
+        plt.plot([0, 1], [0, 1], linestyle="--", color="gray")
+        plt.xlabel("Tasa de Falsos Positivos", fontsize=12, color=text_color)
+        plt.ylabel("Tasa de Verdaderos Positivos", fontsize=12, color=text_color)
+        plt.title("Curva ROC — Clasificador de Cáncer de Mama",
+                  fontsize=14, pad=15, color=text_color)
+        plt.legend(loc="lower right")
+        plt.tight_layout()
+        fig.savefig(path, format="png", dpi=150, facecolor=facecolor)
+        plt.close(fig)
+
+
+def render_importance(path, theme, values, labels):
+    import matplotlib.pyplot as plt
+
+    colors = (plt.cm.PuRd if theme == "light" else plt.cm.plasma)(
+        np.linspace(0.4, 0.9, len(values))
+    )
+    text_color = "black" if theme == "light" else "white"
+    facecolor = "white" if theme == "light" else "black"
+    with themed(theme):
+        fig = plt.figure(figsize=(8, 6))
+        plt.barh(range(len(values)), values, align="center", color=colors)
+        plt.yticks(range(len(values)), labels, fontsize=10, color=text_color)
+        plt.title("Top 10 Características más Importantes",
+                  fontsize=14, pad=15, color=text_color)
+        plt.xlabel("Importancia", fontsize=12, color=text_color)
+        plt.ylabel("Características", fontsize=12, color=text_color)
+        plt.tight_layout()
+        fig.savefig(path, format="png", dpi=150, facecolor=facecolor)
+        plt.close(fig)
+
+
+def render_correlation(path, theme, corr, labels):
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    import seaborn as sns
+
+    cmap = "RdPu" if theme == "light" else "inferno"
+    text_color = "black" if theme == "light" else "white"
+    facecolor = "white" if theme == "light" else "black"
+    with themed(theme):
+        fig = plt.figure(figsize=(12, 10))
+        sns.heatmap(pd.DataFrame(corr, index=labels, columns=labels),
+                    cmap=cmap, center=0, xticklabels=True, yticklabels=True)
+        plt.title("Matriz de Correlación (Características)",
+                  fontsize=14, pad=15, color=text_color)
+        plt.xticks(rotation=90, ha="right", fontsize=8, color=text_color)
+        plt.yticks(rotation=0, fontsize=8, color=text_color)
+        plt.tight_layout()
+        fig.savefig(path, format="png", dpi=200, facecolor=facecolor)
+        plt.close(fig)
+
+
+# Nombre de archivo → función que la dibuja
+RENDERERS = {
+    "confusion_matrix": render_confusion,
+    "roc_curve": render_roc,
+    "feature_importance": render_importance,
+    "correlation_matrix": render_correlation,
+}
+
+
+def render_job(job):
+    """Dibuja una gráfica en su archivo de caché (temporal + rename). Devuelve segundos."""
+    started = time.perf_counter()
+    path = Path(job["cache_path"])
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    RENDERERS[job["figure"]](tmp, job["theme"], **job["payload"])
+    os.replace(tmp, path)
+    return time.perf_counter() - started
+
+
+# === CACHÉ Y POOL ===
+def figure_key(figure, theme, payload):
+    """Clave de la gráfica: datos, tema, código y versiones de las librerías."""
+    import seaborn
+
+    digest = hashlib.blake2b(digest_size=10)
+    digest.update(json.dumps([figure, theme, code_fingerprint(RENDERERS[figure], (themed,)),
+                              matplotlib.__version__, seaborn.__version__]).encode())
+    for name in sorted(payload):
+        value = payload[name]
+        if isinstance(value, np.ndarray):
+            digest.update(f"{name}|{value.dtype.str}|{value.shape}|".encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+        else:
+            digest.update(f"{name}|{json.dumps(value, default=str)}|".encode())
+    return digest.hexdigest()
+
+
+def render_figures(payloads, out_dir, cache_dir, workers=None, themes=THEMES, keep=3, log=print):
+    """
+    Escribe `<gráfica>_<tema>.png` en `out_dir` para cada gráfica de `payloads`
+    (nombre → argumentos de su función de dibujo). Solo se dibujan las que no
+    están en `cache_dir`; las demás se copian. Devuelve el tiempo de cada una.
+    """
+    out_dir, cache_dir = Path(out_dir), Path(cache_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+
+    jobs = []
+    for figure, payload in payloads.items():
+        for theme in themes:
+            name = f"{figure}_{theme}"
+            jobs.append({
+                "name": name, "figure": figure, "theme": theme, "payload": payload,
+                "cache_path": str(cache_dir / f"{name}-{figure_key(figure, theme, payload)}.png"),
+            })
+    pending = [job for job in jobs if not os.path.exists(job["cache_path"])]
+
+    workers = min(workers or os.cpu_count() or 1, len(pending)) or 1
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            seconds = list(pool.map(render_job, pending))
+    else:
+        seconds = [render_job(job) for job in pending]
+    rendered = {job["name"]: s for job, s in zip(pending, seconds)}
+
+    timings = []
+    for job in jobs:
+        copy_started = time.perf_counter()
+        path = out_dir / f"{job['name']}.png"
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        shutil.copyfile(job["cache_path"], tmp)
+        os.replace(tmp, path)
+        os.utime(job["cache_path"])  # las usadas son las últimas en borrarse
+        status = "rendered" if job["name"] in rendered else "cached"
+        seconds = rendered.get(job["name"], 0.0) + time.perf_counter() - copy_started
+        timings.append({"figure": job["name"], "status": status, "seconds": round(seconds, 3)})
+        prune_cache(cache_dir, job["name"], keep)
+
+    total = time.perf_counter() - started
+    log(f"🖼️ Gráficas ({workers} proceso{'s' if workers > 1 else ''}):")
+    for t in timings:
+        log(f"   {t['figure']:<26} {t['status']:<9} {t['seconds']:>6.2f} s")
+    log(f"   {'total':<26} {'':<9} {total:>6.2f} s")
+    (cache_dir / "last_run.json").write_text(json.dumps(
+        {"workers": workers, "figures": timings, "total_seconds": round(total, 3)}, indent=2
+    ))
+    return timings
+
+
+def prune_cache(cache_dir, name, keep):
+    """Conserva las `keep` versiones más recientes de cada gráfica."""
+    entries = sorted(cache_dir.glob(f"{name}-*.png"), key=lambda p: p.stat().st_mtime_ns)
+    for old in entries[:-keep]:
+        old.unlink(missing_ok=True)
@@ -0,0 +1,316 @@
+"""
+===========================================================
+📌 forest_engine.py — Motor de inferencia nativo para bosques
+===========================================================
+
+Aplana un RandomForestClassifier entrenado en arreglos NumPy
+contiguos (feature, umbral, hijos, valores de hoja) y evalúa
+lotes completos recorriendo todos los árboles a la vez.
+
+Reproduce exactamente `predict` y `predict_proba` de sklearn:
+- Las entradas se convierten a float32 (igual que los árboles).
+- Los NaN siguen `missing_go_to_left` como en sklearn.
+- Las probabilidades se acumulan árbol por árbol en el mismo orden.
+
+Opcionalmente evalúa los árboles por bloques y se detiene en cada
+fila cuando los árboles que faltan ya no pueden cambiar la clase
+predicha, o cuando la probabilidad quedó dentro de una tolerancia
+(`predict_proba_early_exit`).
+
+El bosque se puede guardar en un único archivo binario y cargarse
+mapeado en memoria (solo lectura): todos los workers de gunicorn
+comparten las mismas páginas físicas del caché del sistema.
+===========================================================
+"""
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+# Filas evaluadas por bloque: acota la memoria de (filas × árboles) índices
+CHUNK_ROWS = 8192
+
+# Árboles evaluados entre dos comprobaciones de salida anticipada
+BLOCK_TREES = 16
+
+# Formato de archivo: MAGIC + largo del encabezado (uint64) + encabezado JSON
+# + arreglos alineados a ALIGNMENT bytes.
+MAGIC = b"FLATFOREST\x00\x01"
+ALIGNMENT = 64
+ARRAY_NAMES = ("feature", "threshold", "left", "right", "missing_left", "leaf_values", "roots")
+
+
+class FlatForest:
+    """Bosque aplanado en arreglos NumPy para inferencia vectorizada."""
+
+    def __init__(self, feature, threshold, left, right, missing_left,
+                 leaf_values, roots, max_depth, classes, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.leaf_values = leaf_values
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.n_features_in_ = int(n_features)
+        self._suffix_bounds = None
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Construye el motor a partir de un RandomForest/ExtraTrees de sklearn."""
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Solo se soportan bosques de una salida")
+
+        features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            left = tree.children_left.astype(np.int32)
+            right = tree.children_right.astype(np.int32)
+            is_leaf = left == -1
+            node_ids = np.arange(n_nodes, dtype=np.int32)
+
+            # Las hojas apuntan a sí mismas: el recorrido puede dar siempre
+            # `max_depth` pasos sin ramas especiales por árbol.
+            left = np.where(is_leaf, node_ids, left) + offset
+            right = np.where(is_leaf, node_ids, right) + offset
+
+            # sklearn >= 1.4 ya guarda fracciones por clase; las versiones
+            # anteriores guardan conteos y normalizan al predecir.
+            proba = tree.value[:, 0, :model.n_classes_].astype(np.float64)
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            if not np.allclose(normalizer, 1.0):
+                normalizer[normalizer == 0.0] = 1.0
+                proba /= normalizer
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(left)
+            rights.append(right)
+            missing.append(np.asarray(
+                getattr(tree, "missing_go_to_left", np.zeros(n_nodes)), dtype=bool
+            ))
+            values.append(proba)
+            roots.append(offset)
+
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features)),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds)),
+            left=np.ascontiguousarray(np.concatenate(lefts)),
+            right=np.ascontiguousarray(np.concatenate(rights)),
+            missing_left=np.ascontiguousarray(np.concatenate(missing)),
+            leaf_values=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            classes=np.asarray(model.classes_),
+            n_features=model.n_features_in_,
+        )
+
+    # === Persistencia ===
+    def save(self, path):
+        """Guarda el bosque en un archivo mapeable (escritura atómica)."""
+        arrays = {name: np.ascontiguousarray(getattr(self, name)) for name in ARRAY_NAMES}
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+        header = json.dumps({
+            "arrays": layout,
+            "max_depth": self.max_depth,
+            "n_features": self.n_features_in_,
+            "classes": self.classes_.tolist(),
+        }).encode()
+        data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+            for name, array in arrays.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(array.tobytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode=True):
+        """
+        Carga un bosque guardado con `save`. Con `mmap_mode=True` los arreglos
+        son vistas de solo lectura sobre un único mapeo del archivo.
+        """
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} no es un bosque aplanado")
+            (header_len,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_len))
+            data_start = -(-(len(MAGIC) + 8 + header_len) // ALIGNMENT) * ALIGNMENT
+            if mmap_mode:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                f.seek(0)
+                buffer = f.read()
+
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"]))
+            arrays[name] = np.frombuffer(
+                buffer, dtype=dtype, count=count, offset=data_start + spec["offset"]
+            ).reshape(spec["shape"])
+
+        return cls(
+            **arrays,
+            max_depth=header["max_depth"],
+            classes=np.asarray(header["classes"]),
+            n_features=header["n_features"],
+        )
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ARRAY_NAMES)
+
+    # === Entrada ===
+    def _validate(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"Se esperaban {self.n_features_in_} características, "
+                f"se recibieron {X.shape[-1]}"
+            )
+        # sklearn rechaza infinitos (incluye desbordes al pasar a float32)
+        if np.isinf(X).any():
+            raise ValueError("La entrada contiene valores infinitos")
+        return X
+
+    # === Recorrido vectorizado ===
+    def _traverse(self, X, roots):
+        """Índice global de la hoja alcanzada en cada árbol de `roots`."""
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.broadcast_to(roots, (X.shape[0], len(roots)))
+        for _ in range(self.max_depth):
+            values = X[rows, self.feature[nodes]]
+            go_left = values <= self.threshold[nodes]
+            nan_mask = np.isnan(values)
+            if nan_mask.any():
+                go_left = np.where(nan_mask, self.missing_left[nodes], go_left)
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def apply(self, X):
+        """Índice global de la hoja alcanzada en cada árbol: (n_filas, n_árboles)."""
+        return self._traverse(self._validate(X), self.roots)
+
+    def predict_proba(self, X):
+        X = self._validate(X)
+        proba = np.empty((X.shape[0], len(self.classes_)), dtype=np.float64)
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            leaves = self.apply(X[start:start + CHUNK_ROWS])
+            # La suma sobre el eje de árboles es secuencial, igual que sklearn
+            proba[start:start + CHUNK_ROWS] = (
+                self.leaf_values[leaves].sum(axis=1) / len(self.roots)
+            )
+        return proba
+
+    # === Salida anticipada ===
+    def suffix_bounds(self):
+        """
+        Cotas de lo que aún pueden sumar los árboles t..T-1 a cada clase:
+        (mínimo, máximo), ambos de forma (T + 1, n_clases). Se calculan una
+        vez a partir del menor y mayor valor de hoja de cada árbol.
+        """
+        if self._suffix_bounds is None:
+            n_nodes = len(self.left)
+            is_leaf = (self.left == np.arange(n_nodes))[:, np.newaxis]
+            tree_min = np.minimum.reduceat(np.where(is_leaf, self.leaf_values, np.inf), self.roots)
+            tree_max = np.maximum.reduceat(np.where(is_leaf, self.leaf_values, -np.inf), self.roots)
+            zeros = np.zeros((1, len(self.classes_)))
+            self._suffix_bounds = (
+                np.concatenate([np.cumsum(tree_min[::-1], axis=0)[::-1], zeros]),
+                np.concatenate([np.cumsum(tree_max[::-1], axis=0)[::-1], zeros]),
+            )
+        return self._suffix_bounds
+
+    def predict_proba_early_exit(self, X, tolerance=0.0, block_trees=None):
+        """
+        Evalúa los árboles por bloques y deja de evaluar cada fila cuando:
+
+        - los árboles restantes ya no pueden cambiar la clase de mayor
+          probabilidad (la etiqueta es la misma que con el bosque completo), o
+        - la probabilidad de todas las clases está a `tolerance` o menos de
+          la del bosque completo.
+
+        Con `tolerance=0` solo aplica la primera regla: las etiquetas no
+        cambian. Las probabilidades de las filas que salen antes suponen que
+        los árboles restantes votan como los ya evaluados (acotadas a lo
+        alcanzable); las que recorren todos los árboles dan lo mismo que
+        `predict_proba`.
+
+        Devuelve (probabilidades, árboles usados por fila, cota del error
+        absoluto de la probabilidad por fila).
+        """
+        X = self._validate(X)
+        if tolerance < 0:
+            raise ValueError("La tolerancia no puede ser negativa")
+        block_trees = int(block_trees or BLOCK_TREES)
+        n_trees = len(self.roots)
+        suffix_min, suffix_max = self.suffix_bounds()
+        # Margen contra el redondeo de la suma acumulada
+        margin = 1e-9 * n_trees
+
+        proba = np.empty((X.shape[0], len(self.classes_)), dtype=np.float64)
+        trees_used = np.full(X.shape[0], n_trees, dtype=np.int32)
+        error_bound = np.zeros(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            chunk = X[start:start + CHUNK_ROWS]
+            sums = np.zeros((chunk.shape[0], len(self.classes_)), dtype=np.float64)
+            active = np.arange(chunk.shape[0])
+            for t in range(0, n_trees, block_trees):
+                stop = min(t + block_trees, n_trees)
+                leaves = self._traverse(chunk[active], self.roots[t:stop])
+                partial = sums[active]
+                # Árbol por árbol, en el mismo orden que predict_proba
+                for j in range(stop - t):
+                    partial += self.leaf_values[leaves[:, j]]
+                sums[active] = partial
+                if stop == n_trees:
+                    break
+
+                lo, hi = partial + suffix_min[stop], partial + suffix_max[stop]
+                # Estimación: los árboles restantes votan como los ya evaluados,
+                # acotada a lo que todavía es alcanzable
+                estimate = np.clip(partial * (n_trees / stop), lo, hi)
+                best = np.argmax(estimate, axis=1)
+                rows = np.arange(len(active))
+                rivals = hi.copy()
+                rivals[rows, best] = -np.inf
+                settled = lo[rows, best] - rivals.max(axis=1) > margin
+                bound = np.maximum(estimate - lo, hi - estimate).max(axis=1) / n_trees
+                done = settled | (bound <= tolerance) if tolerance > 0 else settled
+                if done.any():
+                    finished = start + active[done]
+                    proba[finished] = estimate[done] / n_trees
+                    trees_used[finished] = stop
+                    error_bound[finished] = bound[done]
+                    active = active[~done]
+                    if not len(active):
+                        break
+            if len(active):
+                proba[start + active] = sums[active] / n_trees
+        return proba, trees_used, error_bound
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
@@ -0,0 +1,221 @@
+"""
+===========================================================
+📌 forest_pruning.py — Poda del bosque a un presupuesto
+===========================================================
+
+El costo de servir el bosque crece linealmente con la cantidad
+de árboles. Este módulo busca el subconjunto más chico de los
+árboles ya entrenados que mantiene las métricas del bosque
+completo dentro de una tolerancia:
+
+1. Ordena los árboles de forma voraz: en cada paso agrega el que
+   más baja el Brier score out-of-bag (OOB) del conjunto.
+2. Recorre la curva de prefijos de ese orden midiendo métricas
+   OOB y de test, tamaño del bosque aplanado y latencia.
+3. Elige el prefijo más chico cuyas métricas OOB estén a
+   `tolerance` o menos de las del bosque completo.
+4. Si hay presupuesto de latencia (µs por fila en lote) o de
+   tamaño y ese prefijo no lo cumple, usa el prefijo más grande
+   que sí lo cumple, aunque se salga de la tolerancia.
+
+La selección usa solo datos OOB (cada árbol se evalúa con las
+filas que no vio al entrenar), divididos en dos mitades: una
+para ordenar y otra para medir la curva, porque el orden voraz
+sobreajusta las filas con las que se construyó. El conjunto de
+test queda para informar, no para elegir.
+===========================================================
+"""
+import copy
+import time
+
+import numpy as np
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+
+from utils.forest_engine import FlatForest
+
+METRICS = ("accuracy", "f1_score", "roc_auc")
+
+
+def score(y, proba):
+    """Métricas de train_model.py a partir de probabilidades (clasificación binaria)."""
+    return {
+        "accuracy": accuracy_score(y, np.argmax(proba, axis=1)),
+        "f1_score": f1_score(y, np.argmax(proba, axis=1)),
+        "roc_auc": roc_auc_score(y, proba[:, 1]),
+    }
+
+
+def oob_mask(model, n_samples):
+    """(n_filas, n_árboles): True donde la fila quedó fuera del bootstrap del árbol."""
+    if not getattr(model, "bootstrap", False):
+        raise ValueError("La poda por OOB requiere un bosque entrenado con bootstrap")
+    mask = np.ones((n_samples, len(model.estimators_)), dtype=bool)
+    for t, samples in enumerate(model.estimators_samples_):
+        mask[samples, t] = False
+    return mask
+
+
+def tree_probas(engine, X):
+    """Probabilidades de cada árbol por separado: (n_filas, n_árboles, n_clases)."""
+    return engine.leaf_values[engine.apply(X)]
+
+
+def greedy_order(P, mask, y):
+    """
+    Orden voraz de los árboles por Brier score OOB. Las filas que ningún
+    árbol elegido dejó fuera del bootstrap cuentan con la probabilidad a
+    priori: así el orden también premia la cobertura.
+    """
+    n, n_trees, n_classes = P.shape
+    target = np.eye(n_classes)[y]
+    prior = np.full(n_classes, 1.0 / n_classes)
+    contrib = P * mask[:, :, np.newaxis]
+    sums = np.zeros((n, n_classes))
+    counts = np.zeros(n)
+    remaining = list(range(n_trees))
+    order = []
+    while remaining:
+        cand_sums = sums[:, np.newaxis, :] + contrib[:, remaining]
+        cand_counts = (counts[:, np.newaxis] + mask[:, remaining])[:, :, np.newaxis]
+        proba = np.where(cand_counts > 0, cand_sums / np.maximum(cand_counts, 1), prior)
+        brier = ((proba - target[:, np.newaxis, :]) ** 2).sum(axis=2).mean(axis=0)
+        best = remaining.pop(int(np.argmin(brier)))
+        order.append(best)
+        sums += contrib[:, best]
+        counts += mask[:, best]
+    return np.asarray(order)
+
+
+def subset_forest(model, trees):
+    """Copia del bosque con solo los árboles `trees` (en ese orden)."""
+    pruned = copy.copy(model)
+    pruned.estimators_ = [model.estimators_[t] for t in trees]
+    pruned.n_estimators = len(pruned.estimators_)
+    return pruned
+
+
+def measure_latency(engine, X, repeats=200, batch_rows=1000):
+    """
+    Latencia del motor nativo: mediana de `predict_proba` con una fila (µs) y
+    costo por fila de un lote de `batch_rows` filas (µs).
+    """
+    row = np.asarray(X[:1], dtype=np.float32)
+    engine.predict_proba(row)
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        engine.predict_proba(row)
+        timings.append(time.perf_counter() - started)
+
+    batch = np.resize(np.asarray(X, dtype=np.float32), (batch_rows, engine.n_features_in_))
+    started = time.perf_counter()
+    engine.predict_proba(batch)
+    batch_seconds = time.perf_counter() - started
+    return {
+        "single_row_us": round(float(np.median(timings)) * 1e6, 2),
+        "batch_row_us": round(batch_seconds / batch_rows * 1e6, 3),
+    }
+
+
+def default_grid(n_trees):
+    """Tamaños de la curva: todos hasta 10, luego de a 5 y de a 10 desde 50."""
+    sizes = set(range(1, min(n_trees, 10) + 1))
+    sizes.update(range(15, min(n_trees, 50) + 1, 5))
+    sizes.update(range(60, n_trees + 1, 10))
+    sizes.add(n_trees)
+    return sorted(sizes)
+
+
+def prune_forest(model, X_train, y_train, X_test, y_test, tolerance=0.005,
+                 latency_budget_us=None, size_budget_bytes=None, max_rows=10000, seed=0,
+                 oob=None):
+    """
+    Poda `model` (RandomForest con bootstrap) al prefijo más chico del orden
+    voraz cuyas métricas OOB no caen más de `tolerance` respecto del bosque
+    completo. Los presupuestos de latencia (µs por fila en lote: con una sola
+    fila domina el costo fijo de la llamada) y de tamaño (bytes del bosque
+    aplanado) mandan sobre la tolerancia: si ese prefijo no los cumple
+    (`budget_met` falso) se elige el más grande que sí, y si ninguno los
+    cumple se lanza ValueError. Se usan a lo sumo `max_rows` filas de
+    entrenamiento y de test.
+
+    `oob` es la máscara (filas de X_train × árboles) de las filas que cada
+    árbol no vio; por defecto sale del bootstrap (`oob_mask`). Hace falta
+    pasarla si el bosque no se entrenó de una vez con X_train (p. ej. por
+    fragmentos, ver utils/feature_store.py).
+
+    Devuelve (bosque podado, reporte con la curva de compromiso).
+    """
+    X_train = np.asarray(X_train, dtype=np.float64)
+    y_train = np.asarray(y_train)
+    y_index = np.searchsorted(model.classes_, y_train)
+    mask = oob_mask(model, len(X_train)) if oob is None else np.asarray(oob, dtype=bool)
+    rows = np.random.default_rng(seed).permutation(len(X_train))[:max_rows]
+    X_train, y_train, y_index, mask = X_train[rows], y_train[rows], y_index[rows], mask[rows]
+    # La curva de test guarda (filas × árboles × clases): también se acota
+    test_rows = np.sort(np.random.default_rng(seed).permutation(len(X_test))[:max_rows])
+    X_test, y_test = np.asarray(X_test, dtype=np.float64)[test_rows], np.asarray(y_test)[test_rows]
+    half = len(rows) // 2
+
+    engine = FlatForest.from_sklearn(model)
+    P_train = tree_probas(engine, X_train)
+    P_test = tree_probas(engine, X_test)
+    order = greedy_order(P_train[:half], mask[:half], y_index[:half])
+
+    # Curva sobre la otra mitad, con sumas acumuladas en el orden voraz:
+    # cada punto sale sin reevaluar árboles
+    y_train, P_train, mask = y_train[half:], P_train[half:], mask[half:]
+    oob_sums = np.cumsum((P_train * mask[:, :, np.newaxis])[:, order], axis=1)
+    oob_counts = np.cumsum(mask[:, order], axis=1)[:, :, np.newaxis]
+    test_sums = np.cumsum(P_test[:, order], axis=1)
+    prior = 1.0 / len(model.classes_)
+
+    def oob_proba(k):
+        counts = oob_counts[:, k - 1]
+        return np.where(counts > 0, oob_sums[:, k - 1] / np.maximum(counts, 1), prior)
+
+    n_trees = len(order)
+    oob_full = score(y_train, oob_proba(n_trees))
+    curve = []
+    for k in default_grid(n_trees):
+        pruned_engine = FlatForest.from_sklearn(subset_forest(model, order[:k]))
+        oob_scores = score(y_train, oob_proba(k))
+        curve.append({
+            "n_estimators": k,
+            "oob": {name: round(value, 6) for name, value in oob_scores.items()},
+            "test": {name: round(value, 6)
+                     for name, value in score(y_test, test_sums[:, k - 1] / k).items()},
+            "nbytes": pruned_engine.nbytes,
+            **measure_latency(pruned_engine, X_test),
+            "within_tolerance": all(oob_full[m] - oob_scores[m] <= tolerance for m in METRICS),
+        })
+
+    def fits(point):
+        return ((latency_budget_us is None or point["batch_row_us"] <= latency_budget_us)
+                and (size_budget_bytes is None or point["nbytes"] <= size_budget_bytes))
+
+    smallest = next(point for point in curve if point["within_tolerance"])
+    budget_met = fits(smallest)
+    chosen = smallest
+    if not budget_met:
+        fitting = [point for point in curve if fits(point)]
+        if not fitting:
+            raise ValueError(
+                f"Ningún subconjunto de árboles cumple el presupuesto (latencia "
+                f"{latency_budget_us} µs/fila en lote, tamaño {size_budget_bytes} bytes)"
+            )
+        chosen = fitting[-1]  # el más grande que entra: el de mejores métricas
+    report = {
+        "criterion": "greedy_oob_brier",
+        "tolerance": tolerance,
+        "n_estimators_full": n_trees,
+        "n_estimators": chosen["n_estimators"],
+        "n_estimators_tolerance": smallest["n_estimators"],
+        "tree_order": order[:chosen["n_estimators"]].tolist(),
+        "oob_full": {name: round(value, 6) for name, value in oob_full.items()},
+        "latency_budget_us": latency_budget_us,
+        "size_budget_bytes": size_budget_bytes,
+        "budget_met": budget_met,
+        "curve": curve,
+    }
+    return subset_forest(model, order[:chosen["n_estimators"]]), report
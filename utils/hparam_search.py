@@ -0,0 +1,241 @@
+"""
+===========================================================
+📌 hparam_search.py — Búsqueda de hiperparámetros por halving
+===========================================================
+
+Explora profundidad, cantidad de árboles y muestreo de
+características del RandomForest con successive halving:
+todas las configuraciones se evalúan con pocas filas, la
+mejor tercera parte (`factor=3`) pasa a la ronda siguiente
+con el triple de filas, hasta usar el conjunto completo.
+
+- Cada (configuración, filas, fold) es una tarea de un pool de
+  procesos. La matriz de entrenamiento se guarda una sola vez
+  como .npy y cada proceso la mapea en memoria al iniciar: no
+  se serializa en cada tarea.
+- El resultado de cada tarea se guarda en disco con una clave
+  derivada de los datos y de la tarea; una búsqueda
+  interrumpida retoma sin repetir lo ya evaluado.
+- Además de las métricas se informa el tiempo de entrenamiento
+  y el costo de inferencia (µs por fila con el motor nativo y
+  nodos del bosque) de cada candidata.
+===========================================================
+"""
+import hashlib
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+
+from utils.forest_engine import FlatForest
+
+# Espacio de búsqueda por defecto (36 configuraciones)
+SEARCH_SPACE = {
+    "max_depth": [4, 6, 8, None],
+    "n_estimators": [50, 100, 200],
+    "max_features": ["sqrt", "log2", 0.5],
+}
+# Parámetros fijos de train_model.py
+BASE_PARAMS = {"random_state": 42, "class_weight": "balanced"}
+# Sube si cambia cómo se evalúa una tarea: invalida la caché
+CACHE_VERSION = 1
+
+
+def candidates(space):
+    """Producto cartesiano del espacio: lista de dicts de parámetros."""
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def data_fingerprint(X, y):
+    digest = hashlib.blake2b(digest_size=8)
+    for array in (X, y):
+        array = np.ascontiguousarray(array)
+        digest.update(str((array.dtype.str, array.shape)).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def task_key(fingerprint, params, n_rows, fold, n_splits, seed):
+    payload = json.dumps(
+        [CACHE_VERSION, fingerprint, params, n_rows, fold, n_splits, seed, BASE_PARAMS],
+        sort_keys=True, default=str,
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=12).hexdigest()
+
+
+# === EVALUACIÓN DE UNA TAREA (en los procesos del pool) ===
+_worker = {}
+
+
+def init_worker(X_path, y_path):
+    """Mapea la matriz de entrenamiento una vez por proceso."""
+    _worker["X"] = np.load(X_path, mmap_mode="r")
+    _worker["y"] = np.load(y_path, mmap_mode="r")
+
+
+def inference_cost(model, X, repeats=5):
+    """µs por fila de `predict_proba` con el motor nativo y nodos del bosque."""
+    engine = FlatForest.from_sklearn(model)
+    X = np.asarray(X, dtype=np.float32)
+    engine.predict_proba(X)
+    best = math.inf
+    for _ in range(repeats):
+        started = time.perf_counter()
+        engine.predict_proba(X)
+        best = min(best, time.perf_counter() - started)
+    return round(best / len(X) * 1e6, 3), int(len(engine.left))
+
+
+def evaluate(task):
+    """Entrena una configuración con `n_rows` filas del fold y la evalúa en su validación."""
+    X, y = _worker["X"], _worker["y"]
+    train_idx = np.asarray(task["train_idx"])[:task["n_rows"]]
+    val_idx = np.asarray(task["val_idx"])
+
+    model = RandomForestClassifier(**BASE_PARAMS, **task["params"], n_jobs=1)
+    started = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - started
+
+    proba = model.predict_proba(X[val_idx])
+    y_val = y[val_idx]
+    us_per_row, n_nodes = inference_cost(model, X[val_idx])
+    result = {
+        "roc_auc": roc_auc_score(y_val, proba[:, 1]),
+        "accuracy": accuracy_score(y_val, proba.argmax(axis=1)),
+        "f1_score": f1_score(y_val, proba.argmax(axis=1)),
+        "fit_seconds": round(fit_seconds, 4),
+        "inference_us_per_row": us_per_row,
+        "n_nodes": n_nodes,
+    }
+    path = Path(task["cache_path"])
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(result))
+    os.replace(tmp, path)
+    return task["candidate"], task["fold"], result
+
+
+# === BÚSQUEDA ===
+def schedule(n_candidates, n_rows, factor, min_rows):
+    """
+    Filas por ronda: crecen `factor` veces por ronda y la última usa todas.
+    Hay tantas rondas como hacen falta para quedar con una candidata, salvo
+    que `min_rows` no deje espacio (como `HalvingGridSearchCV` de sklearn).
+    """
+    required = math.ceil(math.log(n_candidates, factor)) if n_candidates > 1 else 1
+    possible = int(math.log(max(n_rows / min_rows, 1), factor) + 1e-9) + 1
+    n_rounds = max(1, min(required, possible))
+    return [int(n_rows / factor ** (n_rounds - 1 - r)) for r in range(n_rounds)]
+
+
+def summarize(params, folds):
+    """Promedio por candidata de las métricas de sus folds."""
+    return {
+        "params": params,
+        **{name: round(float(np.mean([f[name] for f in folds])), 6)
+           for name in ("roc_auc", "accuracy", "f1_score", "inference_us_per_row")},
+        "fit_seconds": round(float(np.sum([f["fit_seconds"] for f in folds])), 4),
+        "n_nodes": int(np.mean([f["n_nodes"] for f in folds])),
+    }
+
+
+def successive_halving(X, y, cache_dir, space=None, metric="roc_auc", factor=3,
+                       n_splits=5, workers=None, min_rows=None, seed=42, log=print):
+    """
+    Búsqueda por successive halving con validación cruzada estratificada.
+    Las candidatas se ordenan por `metric` (mayor es mejor) y, a igualdad, por
+    menor costo de inferencia. Devuelve el reporte con todas las rondas.
+    """
+    started = time.perf_counter()
+    X = np.ascontiguousarray(X, dtype=np.float32)  # los árboles de sklearn usan float32
+    y = np.ascontiguousarray(y)
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    fingerprint = data_fingerprint(X, y)
+    X_path, y_path = cache_dir / f"X-{fingerprint}.npy", cache_dir / f"y-{fingerprint}.npy"
+    for path, array in ((X_path, X), (y_path, y)):
+        if not path.exists():
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp, path)
+
+    # Filas de entrenamiento de cada fold en orden aleatorio fijo: cada ronda
+    # toma un prefijo más largo (estratificado en promedio)
+    rng = np.random.default_rng(seed)
+    folds = [
+        (rng.permutation(train_idx).tolist(), val_idx.tolist())
+        for train_idx, val_idx in StratifiedKFold(n_splits, shuffle=True, random_state=seed).split(X, y)
+    ]
+    pool_candidates = candidates(space or SEARCH_SPACE)
+    n_train = min(len(train) for train, _ in folds)
+    rounds_rows = schedule(len(pool_candidates), n_train, factor,
+                           min_rows or min(n_train, 20 * len(np.unique(y))))
+
+    workers = workers or os.cpu_count() or 1
+    alive = list(range(len(pool_candidates)))
+    rounds, cached_total, evaluated_total = [], 0, 0
+    with ProcessPoolExecutor(workers, initializer=init_worker,
+                             initargs=(str(X_path), str(y_path))) as pool:
+        for r, n_rows in enumerate(rounds_rows):
+            round_started = time.perf_counter()
+            results = {c: {} for c in alive}
+            futures = []
+            for c, fold in itertools.product(alive, range(n_splits)):
+                params = pool_candidates[c]
+                path = cache_dir / f"{task_key(fingerprint, params, n_rows, fold, n_splits, seed)}.json"
+                if path.exists():
+                    results[c][fold] = json.loads(path.read_text())
+                    cached_total += 1
+                    continue
+                train_idx, val_idx = folds[fold]
+                futures.append(pool.submit(evaluate, {
+                    "candidate": c, "fold": fold, "params": params, "n_rows": n_rows,
+                    "train_idx": train_idx, "val_idx": val_idx, "cache_path": str(path),
+                }))
+            for future in as_completed(futures):
+                c, fold, result = future.result()
+                results[c][fold] = result
+                evaluated_total += 1
+
+            summaries = sorted(
+                (summarize(pool_candidates[c], list(results[c].values())) | {"candidate": c}
+                 for c in alive),
+                key=lambda s: (-s[metric], s["inference_us_per_row"]),
+            )
+            keep = max(1, math.ceil(len(alive) / factor)) if r < len(rounds_rows) - 1 else 1
+            alive = [s["candidate"] for s in summaries[:keep]]
+            rounds.append({
+                "round": r,
+                "n_rows": n_rows,
+                "n_candidates": len(summaries),
+                "wall_seconds": round(time.perf_counter() - round_started, 3),
+                "candidates": summaries,
+            })
+            log(f"🔎 Ronda {r}: {len(summaries)} candidatas con {n_rows} filas, "
+                f"mejor {metric}={summaries[0][metric]:.4f} {summaries[0]['params']}")
+
+    best = rounds[-1]["candidates"][0]
+    return {
+        "metric": metric,
+        "factor": factor,
+        "n_splits": n_splits,
+        "workers": workers,
+        "space": space or SEARCH_SPACE,
+        "best_params": best["params"],
+        "best": best,
+        "tasks_evaluated": evaluated_total,
+        "tasks_cached": cached_total,
+        "wall_seconds": round(time.perf_counter() - started, 3),
+        "rounds": rounds,
+    }
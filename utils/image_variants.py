@@ -0,0 +1,189 @@
+"""
+===========================================================
+📌 image_variants.py — Variantes redimensionadas de las gráficas
+===========================================================
+
+Las gráficas de artifacts/visualizations/ se guardan en alta
+resolución (la matriz de correlación es de 12x10 pulgadas a
+dpi=200), pero el frontend las muestra en columnas angostas.
+Este módulo genera, la primera vez que se piden, variantes con
+otro ancho y formato (AVIF o WebP si Pillow los soporta, si no
+PNG optimizado) y las guarda en una caché en disco.
+
+- Los anchos se ajustan a una lista fija (VISUALIZATION_WIDTHS)
+  para acotar cuántas variantes puede haber por imagen.
+- El nombre de cada variante incluye mtime y tamaño del
+  original: una gráfica regenerada nunca reutiliza variantes.
+- La caché tiene un tamaño máximo en bytes; al superarlo se
+  borran las variantes usadas hace más tiempo (LRU por mtime,
+  que se actualiza en cada acierto).
+- Es compartida por todos los workers: cada variante se
+  escribe en un temporal y se publica con os.replace().
+===========================================================
+"""
+import hashlib
+import io
+import os
+import threading
+import time
+from pathlib import Path
+
+from utils.lazy_import import lazy_import
+
+# Pillow solo se importa al generar la primera variante
+Image = lazy_import("PIL.Image")
+features = lazy_import("PIL.features")
+
+# Formato → (tipo MIME, opciones de Pillow)
+FORMATS = {
+    "webp": ("image/webp", {"format": "WEBP", "lossless": True, "method": 6}),
+    "avif": ("image/avif", {"format": "AVIF", "quality": 60}),
+    "png": ("image/png", {"format": "PNG", "optimize": True}),
+}
+# Preferencia al negociar con `Accept` (format=auto). Con las gráficas ya
+# reducidas a paleta, WebP sin pérdida ocupa menos que AVIF con pérdida
+# (≈ 39 KB frente a 50 KB las cuatro del panel a 640 px) y no difumina el texto.
+PREFERENCE = ("webp", "avif", "png")
+
+
+def supported_formats():
+    """Formatos que este Pillow puede escribir."""
+    return [name for name in PREFERENCE if name == "png" or features.check(name)]
+
+
+class VariantCache:
+    """Variantes de imágenes en disco con tamaño máximo y desalojo LRU."""
+
+    def __init__(self, root, max_bytes, widths):
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self.widths = sorted(int(w) for w in widths)
+        self._formats = None
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def formats(self):
+        if self._formats is None:
+            self._formats = supported_formats()
+        return self._formats
+
+    def snap_width(self, width):
+        """Menor ancho permitido >= `width` (el mayor si lo supera)."""
+        for allowed in self.widths:
+            if allowed >= width:
+                return allowed
+        return self.widths[-1]
+
+    def negotiate(self, accept_mimetypes):
+        """
+        Mejor formato soportado que el cliente nombra en `Accept` (PNG si no
+        nombra otro): `*/*` no basta para suponer que decodifica AVIF o WebP.
+        """
+        explicit = {value for value, quality in accept_mimetypes if quality > 0}
+        for name in self.formats:
+            if FORMATS[name][0] in explicit:
+                return name
+        return "png"
+
+    def _path(self, source, stat, width, fmt):
+        fingerprint = hashlib.blake2b(
+            f"{source.name}:{stat.st_mtime_ns}:{stat.st_size}".encode(), digest_size=8
+        ).hexdigest()
+        return self.root / f"{source.stem}-{width}w-{fingerprint}.{fmt}"
+
+    def get(self, source, width, fmt):
+        """
+        Bytes de `source` con ancho `width` (en píxeles) y formato `fmt`.
+        Genera y guarda la variante si no está en la caché.
+        """
+        source = Path(source)
+        stat = source.stat()
+        path = self._path(source, stat, width, fmt)
+        try:
+            body = path.read_bytes()
+            _touch(path)
+            self.hits += 1
+            return body
+        except FileNotFoundError:
+            pass
+
+        self.misses += 1
+        body = render_variant(source, width, fmt)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(body)
+        _touch(tmp)
+        os.replace(tmp, path)
+        self.evict()
+        return body
+
+    def evict(self):
+        """Borra las variantes menos usadas hasta quedar bajo `max_bytes`."""
+        with self._lock:
+            entries = []
+            for path in self.root.iterdir():
+                if path.name.startswith("."):
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue  # otro worker la borró
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                self.evictions += 1
+
+    def stats(self):
+        sizes = []
+        for path in self.root.iterdir():
+            try:
+                if not path.name.startswith("."):
+                    sizes.append(path.stat().st_size)
+            except FileNotFoundError:
+                continue
+        return {
+            "dir": str(self.root),
+            "files": len(sizes),
+            "bytes": sum(sizes),
+            "max_bytes": self.max_bytes,
+            "widths": self.widths,
+            "formats": self.formats,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def _touch(path):
+    """
+    Marca de uso para el desalojo LRU. Con hora explícita en nanosegundos:
+    la del sistema de archivos avanza a saltos de varios ms y empataría.
+    """
+    now = time.time_ns()
+    os.utime(path, ns=(now, now))
+
+
+def render_variant(source, width, fmt):
+    """
+    Redimensiona (LANCZOS, manteniendo proporción, nunca agrandando) y
+    codifica en `fmt`. Antes se reduce a una paleta de 256 colores: las
+    gráficas tienen pocos colores y el archivo baja varias veces.
+    """
+    with Image.open(source) as image:
+        image.load()
+        if width < image.width:
+            height = round(image.height * width / image.width)
+            image = image.resize((width, height), Image.LANCZOS)
+        image = image.convert("RGBA").quantize(256, method=Image.Quantize.FASTOCTREE)
+        if fmt == "avif":
+            image = image.convert("RGBA")  # AVIF no admite paletas
+        buffer = io.BytesIO()
+        image.save(buffer, **FORMATS[fmt][1])
+    return buffer.getvalue()
@@ -0,0 +1,217 @@
+"""
+===========================================================
+📌 input_schema.py — Esquema de entrada compilado y validación
+===========================================================
+
+Se compila una sola vez desde `feature_info.json`:
+- nombre → índice de columna en el orden del modelo,
+- límites de valores derivados de los datos de entrenamiento
+  (`feature_bounds`), ampliados en `margin` veces el rango
+  observado; una variable que nunca fue negativa no puede serlo.
+
+Las filas individuales se validan con un camino rápido sobre el
+dict. Los lotes se validan con máscaras de NumPy y devuelven un
+reporte por fila: las filas inválidas se excluyen y el resto del
+archivo se evalúa igual. Los NaN (celdas vacías) se aceptan como
+valores faltantes, igual que en el modelo; las columnas ausentes se
+completan con 0 y no se validan.
+===========================================================
+"""
+import numpy as np
+
+from utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+
+# Filas con detalle en el reporte; el resto solo se cuenta
+MAX_REPORTED_ROWS = 1000
+
+TYPE_ERROR = "valor no numérico"
+INF_ERROR = "valor infinito"
+
+
+def _original_value(source, name, i):
+    if source is None:
+        return None
+    if isinstance(source, list):
+        return source[i].get(name)
+    if isinstance(source, dict):
+        return source[name][i]
+    return source[name].iloc[i]  # DataFrame
+
+
+class InputSchema:
+    """Columnas del modelo y límites de valores válidos."""
+
+    def __init__(self, feature_names, lower=None, upper=None):
+        self.feature_names = list(feature_names)
+        self.index = {name: j for j, name in enumerate(self.feature_names)}
+        n = len(self.feature_names)
+        self.lower = np.full(n, -np.inf) if lower is None else np.asarray(lower, dtype=np.float64)
+        self.upper = np.full(n, np.inf) if upper is None else np.asarray(upper, dtype=np.float64)
+
+    @classmethod
+    def from_feature_info(cls, feature_info, margin=1.0):
+        names = feature_info["feature_names"]
+        bounds = feature_info.get("feature_bounds")
+        if not bounds:
+            return cls(names)
+        observed_min = np.array([bounds[name]["min"] for name in names], dtype=np.float64)
+        observed_max = np.array([bounds[name]["max"] for name in names], dtype=np.float64)
+        span = observed_max - observed_min
+        lower = observed_min - margin * span
+        lower = np.where(observed_min >= 0, np.maximum(lower, 0.0), lower)
+        return cls(names, lower, observed_max + margin * span)
+
+    @property
+    def n_features(self):
+        return len(self.feature_names)
+
+    def _range_error(self, j):
+        return f"fuera de rango [{self.lower[j]:.6g}, {self.upper[j]:.6g}]"
+
+    # === Fila individual ===
+    def unknown_features(self, data):
+        return [name for name in data if name not in self.index]
+
+    def row_from_dict(self, data, fill_value=0.0):
+        """
+        Vector en el orden del modelo (ausentes en `fill_value`) y lista de
+        errores [{"feature", "error", "value"}]; vacía si la fila es válida.
+        """
+        row = np.full(self.n_features, fill_value, dtype=np.float64)
+        present = np.zeros(self.n_features, dtype=bool)
+        errors = []
+        for name, value in data.items():
+            j = self.index[name]
+            present[j] = True
+            if value is None:
+                row[j] = np.nan
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+                errors.append({"feature": name, "error": TYPE_ERROR, "value": value})
+                continue
+            try:
+                row[j] = float(value)
+            except ValueError:
+                errors.append({"feature": name, "error": TYPE_ERROR, "value": value})
+
+        for j in np.flatnonzero(self._invalid_values(row, present)):
+            error = INF_ERROR if np.isinf(row[j]) else self._range_error(j)
+            errors.append({"feature": self.feature_names[j], "error": error,
+                           "value": float(row[j])})
+        return row, errors
+
+    def _invalid_values(self, X, present=None):
+        # Las comparaciones con NaN son falsas: los faltantes pasan
+        invalid = np.isinf(X) | (X < self.lower) | (X > self.upper)
+        if present is not None:
+            invalid &= present
+        return invalid
+
+    # === Lotes ===
+    def frame_to_matrix(self, df):
+        """
+        DataFrame (p. ej. de un CSV) → (matriz float64 en el orden del modelo,
+        máscara de celdas no numéricas, máscara de columnas presentes).
+        Las columnas ausentes quedan en 0.
+        """
+        X = np.zeros((len(df), self.n_features), dtype=np.float64)
+        type_errors = np.zeros(X.shape, dtype=bool)
+        present = np.zeros(self.n_features, dtype=bool)
+        for name in df.columns:
+            j = self.index.get(name)
+            if j is None:
+                continue
+            present[j] = True
+            column = df[name]
+            if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+                X[:, j] = column.to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                numeric = pd.to_numeric(column, errors="coerce")
+                X[:, j] = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+                type_errors[:, j] = numeric.isna().to_numpy() & column.notna().to_numpy()
+        return X, type_errors, present
+
+    def _column_values(self, values, X, type_errors, j):
+        """Llena la columna j; si algún valor no es numérico, celda por celda."""
+        try:
+            X[:, j] = np.asarray(values, dtype=np.float64)
+            return
+        except (TypeError, ValueError):
+            pass
+        for i, value in enumerate(values):
+            try:
+                if isinstance(value, bool) or not isinstance(value, (int, float, str, type(None))):
+                    raise TypeError
+                X[i, j] = np.nan if value is None else float(value)
+            except (TypeError, ValueError):
+                X[i, j] = np.nan
+                type_errors[i, j] = True
+
+    def records_to_matrix(self, records, fill_value=0.0):
+        """
+        Lista de dicts (filas JSON) → (matriz, celdas no numéricas, celdas
+        presentes), columna a columna y sin pasar por un DataFrame.
+        """
+        X = np.empty((len(records), self.n_features), dtype=np.float64)
+        type_errors = np.zeros(X.shape, dtype=bool)
+        present = np.zeros(X.shape, dtype=bool)
+        for j, name in enumerate(self.feature_names):
+            present[:, j] = [name in record for record in records]
+            values = [record.get(name, fill_value) for record in records]
+            self._column_values(values, X, type_errors, j)
+        return X, type_errors, present
+
+    def columns_to_matrix(self, columns, n_rows):
+        """{feature: [valores]} → (matriz, celdas no numéricas, columnas presentes)."""
+        X = np.zeros((n_rows, self.n_features), dtype=np.float64)
+        type_errors = np.zeros(X.shape, dtype=bool)
+        present = np.zeros(self.n_features, dtype=bool)
+        for name, values in columns.items():
+            j = self.index[name]
+            present[j] = True
+            self._column_values(values, X, type_errors, j)
+        return X, type_errors, present
+
+    def validate_matrix(self, X, type_errors=None, source=None, row_offset=0,
+                        max_reported=MAX_REPORTED_ROWS, present=None):
+        """
+        Valida un lote completo. Devuelve (máscara de filas válidas, reporte),
+        con reporte [{"row": i, "errors": [...]}] de hasta `max_reported`
+        filas inválidas (numeradas desde `row_offset`). Con `present` (por
+        columna o por celda) solo se valida lo que venía en la petición.
+        `source` da los valores originales de las celdas no numéricas: un
+        DataFrame, una lista de filas o un dict de columnas.
+        """
+        invalid = self._invalid_values(X, present)
+        if type_errors is not None:
+            invalid |= type_errors
+        bad_rows = np.flatnonzero(invalid.any(axis=1))
+        report = []
+        for i in bad_rows[:max_reported]:
+            errors = []
+            for j in np.flatnonzero(invalid[i]):
+                name = self.feature_names[j]
+                if type_errors is not None and type_errors[i, j]:
+                    value = _original_value(source, name, i)
+                    errors.append({"feature": name, "error": TYPE_ERROR,
+                                   "value": None if value is None else str(value)})
+                else:
+                    value = float(X[i, j])
+                    error = INF_ERROR if np.isinf(value) else self._range_error(j)
+                    errors.append({"feature": name, "error": error, "value": value})
+            report.append({"row": int(i) + row_offset, "errors": errors})
+
+        valid = np.ones(X.shape[0], dtype=bool)
+        valid[bad_rows] = False
+        return valid, report
+
+    def column_report(self, columns):
+        """Columnas desconocidas (se ignoran) y ausentes (se completan con 0)."""
+        columns = [str(c) for c in columns]
+        present = set(columns)
+        return {
+            "unknown_columns": [c for c in columns if c not in self.index],
+            "missing_columns": [n for n in self.feature_names if n not in present],
+        }
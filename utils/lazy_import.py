@@ -0,0 +1,48 @@
+"""
+===========================================================
+📌 lazy_import.py — Importación diferida de módulos pesados
+===========================================================
+
+pandas, joblib, pyarrow y Pillow tardan cientos de ms en
+importarse y /predict no los usa. `lazy_import("pandas")`
+devuelve un módulo vacío que importa el real en el primer
+acceso a un atributo, así que el código sigue escribiendo
+`pd.read_csv(...)` sin cambios.
+
+Con `optional=True` devuelve None si el paquete no está
+instalado (equivale al `try: import ... except ImportError`).
+===========================================================
+"""
+import importlib
+import importlib.util
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Módulo que se importa de verdad en el primer acceso a un atributo."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_target"] = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__dict__["_lazy_target"])
+        # Los accesos siguientes ya no pasan por __getattr__
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name, optional=False):
+    if optional:
+        try:
+            if importlib.util.find_spec(name.partition(".")[0]) is None:
+                return None
+        except ValueError:
+            return None
+    return LazyModule(name)
+
+
+def is_loaded(name):
+    """True si el módulo ya se importó en este proceso."""
+    return name in sys.modules
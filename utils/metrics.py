@@ -0,0 +1,229 @@
+"""
+===========================================================
+📌 metrics.py — Métricas de la API en formato Prometheus
+===========================================================
+
+Registro liviano de contadores e histogramas en memoria. Cada
+worker vuelca su estado (como máximo una vez por intervalo) a
+`METRICS_DIR/<pid>.json`; `/metrics` suma los contadores e
+histogramas de todos los workers, incluidos los que ya
+terminaron, para que no retrocedan tras un reinicio. Los gauges
+no se suman: se exponen por worker (etiqueta `pid`) y solo los
+de procesos vivos, así un worker reciclado no deja su último
+valor para siempre.
+===========================================================
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Límites superiores (segundos y bytes) de los buckets por defecto
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576,
+                4194304, 16777216, 67108864, 268435456)
+
+
+class Histogram:
+    """Histograma con buckets fijos, seguro entre hilos."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self.counts)
+            total, acc = self.count, self.sum
+        labels = [str(bound) for bound in self.buckets] + ["+Inf"]
+        return {"buckets": dict(zip(labels, counts)), "count": total, "sum": acc}
+
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # existe, pero es de otro usuario
+    return True
+
+
+def _format_labels(key, extra=None):
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{str(value)}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+class MetricsRegistry:
+    """Contadores e histogramas etiquetados, con agregación entre procesos."""
+
+    def __init__(self, multiproc_dir=None, flush_interval=1.0):
+        self.multiproc_dir = Path(multiproc_dir) if multiproc_dir else None
+        self.flush_interval = float(flush_interval)
+        self._help = {}
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        if self.multiproc_dir is not None:
+            self.multiproc_dir.mkdir(parents=True, exist_ok=True)
+
+    # === Registro ===
+    def describe(self, name, kind, help_text):
+        self._help[name] = (kind, help_text)
+
+    def add_collector(self, collector):
+        """
+        `collector()` devuelve [(nombre, etiquetas, valor)] de contadores o
+        gauges externos (el tipo se toma de `describe`). Entre workers los
+        contadores se suman y los gauges se exponen por `pid`.
+        """
+        self._collectors.append(collector)
+
+    def inc(self, name, labels=None, value=1):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def histogram(self, name, labels=None, buckets=LATENCY_BUCKETS):
+        key = (name, _label_key(labels))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(buckets))
+        return histogram
+
+    def observe(self, name, value, labels=None, buckets=LATENCY_BUCKETS):
+        self.histogram(name, labels, buckets).observe(value)
+
+    @contextmanager
+    def time(self, name, labels=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, labels)
+
+    # === Estado por proceso ===
+    def _is_gauge(self, name):
+        return self._help.get(name, ("counter",))[0] == "gauge"
+
+    def _state(self):
+        with self._lock:
+            counters = [[name, dict(key), value] for (name, key), value in self._counters.items()]
+            histograms = list(self._histograms.items())
+        gauges = []
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                (gauges if self._is_gauge(name) else counters).append([name, labels, value])
+        return {
+            "pid": os.getpid(),
+            "counters": counters,
+            "gauges": gauges,
+            "histograms": [
+                [name, dict(key), list(h.buckets), list(h.counts), h.sum, h.count]
+                for (name, key), h in histograms
+            ],
+        }
+
+    def flush(self, force=False):
+        """Vuelca el estado de este worker para que otros lo agreguen."""
+        if self.multiproc_dir is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        path = self.multiproc_dir / f"{os.getpid()}.json"
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self._state(), f)
+        os.replace(tmp, path)
+
+    def _states(self):
+        """Estado propio y los volcados por otros workers (sin gauges si ya terminaron)."""
+        states = [self._state()]
+        if self.multiproc_dir is None:
+            return states
+        own = f"{os.getpid()}.json"
+        for path in self.multiproc_dir.glob("*.json"):
+            if path.name == own:
+                continue
+            try:
+                with open(path) as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not (path.stem.isdigit() and _is_alive(int(path.stem))):
+                state["gauges"] = []
+            states.append(state)
+        return states
+
+    # === Exposición ===
+    def render(self):
+        """Texto en formato de exposición de Prometheus (todos los workers)."""
+        counters, gauges, histograms = {}, {}, {}
+        for state in self._states():
+            for name, labels, value in state["counters"]:
+                key = (name, _label_key(labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, value in state.get("gauges", []):
+                labels = {"pid": str(state.get("pid")), **labels}
+                gauges[(name, _label_key(labels))] = value
+            for name, labels, buckets, counts, total_sum, count in state["histograms"]:
+                key = (name, _label_key(labels))
+                merged = histograms.setdefault(key, [buckets, [0] * len(counts), 0.0, 0])
+                merged[1] = [a + b for a, b in zip(merged[1], counts)]
+                merged[2] += total_sum
+                merged[3] += count
+
+        lines, described = [], set()
+
+        def header(name, kind):
+            if name in described:
+                return
+            described.add(name)
+            help_text = self._help.get(name, (kind, name))[1]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for (name, key), value in sorted(counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{_format_labels(key)} {value}")
+
+        for (name, key), value in sorted(gauges.items()):
+            header(name, "gauge")
+            lines.append(f"{name}{_format_labels(key)} {value}")
+
+        for (name, key), (buckets, counts, total_sum, count) in sorted(histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(key, ('le', bound))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(key)} {total_sum}")
+            lines.append(f"{name}_count{_format_labels(key)} {count}")
+
+        return "\n".join(lines) + "\n"
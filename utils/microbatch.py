@@ -0,0 +1,134 @@
+"""
+===========================================================
+📌 microbatch.py — Agrupación dinámica de peticiones /predict
+===========================================================
+
+Las peticiones concurrentes de una sola fila se encolan y un
+hilo de fondo las agrupa en una matriz (hasta `max_batch_size`
+filas o `max_wait_us` microsegundos desde la primera), las evalúa
+en una sola llamada al modelo y devuelve a cada cliente su fila.
+
+Solo tiene efecto si el servidor atiende peticiones en paralelo
+dentro del mismo proceso (servidor de desarrollo de Flask o
+gunicorn con `--threads`).
+===========================================================
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from utils.metrics import Histogram
+
+# Límites superiores de los buckets de los histogramas
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+QUEUE_WAIT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05)
+
+
+class MicroBatcher:
+    """Agrupa filas individuales y las evalúa juntas con `score_fn(X)`."""
+
+    def __init__(self, score_fn, max_batch_size=64, max_wait_us=1000, registry=None):
+        self.score_fn = score_fn
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = max_wait_us / 1_000_000
+        if registry is not None:
+            # Los histogramas también se exponen en /metrics
+            self.batch_sizes = registry.histogram(
+                "api_microbatch_size_rows", buckets=BATCH_SIZE_BUCKETS)
+            self.queue_wait = registry.histogram(
+                "api_microbatch_queue_wait_seconds", buckets=QUEUE_WAIT_BUCKETS)
+        else:
+            self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+            self.queue_wait = Histogram(QUEUE_WAIT_BUCKETS)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_worker(self):
+        # El hilo se arranca en el primer uso y de nuevo tras un fork:
+        # los hilos no sobreviven al fork de los workers de gunicorn.
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid != os.getpid() or self._thread is None:
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def submit(self, row, timeout=None, state=None):
+        """
+        Encola una fila y bloquea hasta tener (etiqueta, probabilidades).
+        `state` (el modelo que la petición ya eligió) se pasa a
+        `score_fn(X, state=...)`: solo se agrupan filas del mismo modelo.
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((np.asarray(row, dtype=np.float64), time.perf_counter(), future, state))
+        return future.result(timeout=timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        deadline = first[1] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            for _, enqueued, _, _ in batch:
+                self.queue_wait.observe(started - enqueued)
+            self.batch_sizes.observe(len(batch))
+
+            # Tras una recarga en caliente pueden convivir filas de dos modelos
+            groups = {}
+            for item in batch:
+                groups.setdefault(id(item[3]), []).append(item)
+            for group in groups.values():
+                self._score_group(group)
+
+    def _score(self, X, state):
+        return self.score_fn(X) if state is None else self.score_fn(X, state=state)
+
+    def _score_group(self, group):
+        state = group[0][3]
+        try:
+            labels, proba = self._score(np.vstack([row for row, _, _, _ in group]), state)
+        except Exception:
+            # Una fila inválida no debe hacer fallar al resto del lote
+            for row, _, future, _ in group:
+                self._score_single(row, future, state)
+            return
+
+        for i, (_, _, future, _) in enumerate(group):
+            future.set_result((labels[i], proba[i]))
+
+    def _score_single(self, row, future, state):
+        try:
+            labels, proba = self._score(row.reshape(1, -1), state)
+            future.set_result((labels[0], proba[0]))
+        except Exception as e:
+            future.set_exception(e)
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_us": int(self.max_wait * 1_000_000),
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+        }
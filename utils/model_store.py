@@ -0,0 +1,260 @@
+"""
+===========================================================
+📌 model_store.py — Versiones del modelo y recarga en caliente
+===========================================================
+
+train_model.py guarda cada entrenamiento en una carpeta
+versionada (`artifacts/model/versions/<versión>/`) y escribe
+`artifacts/model/manifest.json` de forma atómica apuntando a ella.
+
+Cada versión incluye `model.pkl`, `feature_info.json`,
+`example_cases.json` y, si se generó, `forest.bin` (el bosque
+aplanado que la API mapea en memoria). Los límites de validación
+salen del `feature_info.json` de la versión: se recargan con el
+modelo.
+
+La API vigila el manifiesto (o, si no existe, `model.pkl`):
+cuando cambia, carga y calienta el modelo nuevo en segundo plano
+y lo activa reemplazando una sola referencia. Las peticiones en
+curso terminan con el modelo con el que empezaron.
+===========================================================
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from utils.input_schema import InputSchema
+
+MANIFEST_NAME = "manifest.json"
+VERSIONS_DIR = "versions"
+
+
+def file_fingerprint(path):
+    """Huella corta del contenido de un archivo."""
+    digest = hashlib.blake2b(digest_size=8)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# === ESCRITURA (entrenamiento) ===
+def write_json_atomic(path, data):
+    """Escribe JSON en un temporal y lo renombra: los lectores nunca ven medio archivo."""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp, path)
+
+
+def publish_version(model_dir, model_file, metrics, forest_file=None, keep=5,
+                    feature_info_file=None, examples_file=None):
+    """
+    Copia el modelo (y el bosque aplanado, la información de las features y
+    los casos de ejemplo, si se indican) a `versions/<versión>/`, guarda sus
+    métricas y apunta el manifiesto a esa versión. Conserva las `keep`
+    versiones más recientes.
+    """
+    model_dir = Path(model_dir)
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{file_fingerprint(model_file)}"
+    version_dir = model_dir / VERSIONS_DIR / version
+    version_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest = {
+        "version": version,
+        "model": f"{VERSIONS_DIR}/{version}/model.pkl",
+        "metrics": f"{VERSIONS_DIR}/{version}/model_metrics.json",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    shutil.copy2(model_file, version_dir / "model.pkl")
+    if forest_file is not None:
+        shutil.copy2(forest_file, version_dir / "forest.bin")
+        manifest["forest"] = f"{VERSIONS_DIR}/{version}/forest.bin"
+    for key, path in (("feature_info", feature_info_file), ("examples", examples_file)):
+        if path is not None:
+            shutil.copy2(path, version_dir / Path(path).name)
+            manifest[key] = f"{VERSIONS_DIR}/{version}/{Path(path).name}"
+    write_json_atomic(version_dir / "model_metrics.json", metrics)
+    write_json_atomic(model_dir / MANIFEST_NAME, manifest)
+
+    previous = sorted(p for p in (model_dir / VERSIONS_DIR).iterdir() if p.is_dir())
+    for old in previous[:-keep]:
+        shutil.rmtree(old, ignore_errors=True)
+    return version
+
+
+# === LECTURA (API) ===
+def published_source(model_dir, fallback_model, fallback_metrics, fallback_forest=None,
+                     fallback_feature_info=None, fallback_examples=None):
+    """
+    Versión y rutas (modelo, métricas, bosque, features y ejemplos) de lo
+    publicado en disco: la versión del manifiesto o, si no existe, los
+    archivos sueltos de model/ e info/. Las versiones publicadas antes de
+    guardar features y ejemplos usan los sueltos.
+    """
+    model_dir = Path(model_dir)
+    manifest_path = model_dir / MANIFEST_NAME
+    fallback_feature_info = Path(fallback_feature_info) if fallback_feature_info else None
+    fallback_examples = Path(fallback_examples) if fallback_examples else None
+    if manifest_path.exists():
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        return {
+            "version": manifest["version"],
+            "model": model_dir / manifest["model"],
+            "metrics": model_dir / manifest["metrics"],
+            "forest": model_dir / manifest["forest"] if "forest" in manifest else None,
+            "feature_info": (model_dir / manifest["feature_info"]
+                             if "feature_info" in manifest else fallback_feature_info),
+            "examples": (model_dir / manifest["examples"]
+                         if "examples" in manifest else fallback_examples),
+        }
+    forest = Path(fallback_forest) if fallback_forest else None
+    return {
+        "version": file_fingerprint(fallback_model),
+        "model": Path(fallback_model),
+        "metrics": Path(fallback_metrics),
+        "forest": forest if forest is not None and forest.exists() else None,
+        "feature_info": fallback_feature_info,
+        "examples": fallback_examples,
+    }
+
+
+def read_json(path, default=None):
+    if path is None:
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+class LoadedModel:
+    """
+    Modelo activo con su motor de inferencia, métricas y versión, y lo que
+    depende de los datos de entrenamiento: features, esquema de validación
+    compilado y casos de ejemplo.
+    """
+
+    def __init__(self, version, model, engine, metrics, loaded_at, storage,
+                 feature_info=None, examples=None, schema=None):
+        self.version = version
+        self.model = model  # None si el motor se cargó directo de forest.bin
+        self.engine = engine
+        self.metrics = metrics
+        self.loaded_at = loaded_at
+        self.storage = storage
+        self.feature_info = feature_info
+        self.examples = examples
+        self.schema = schema
+
+
+class ModelStore:
+    """Carga la versión publicada y la reemplaza cuando aparece una nueva."""
+
+    def __init__(self, model_dir, fallback_model, fallback_metrics,
+                 load_engine, warmup, logger, on_swap=None, fallback_forest=None, load=True,
+                 fallback_feature_info=None, fallback_examples=None, bounds_margin=1.0,
+                 phase=None):
+        self.model_dir = Path(model_dir)
+        self.fallback_model = Path(fallback_model)
+        self.fallback_metrics = Path(fallback_metrics)
+        self.fallback_forest = Path(fallback_forest) if fallback_forest else None
+        self.fallback_feature_info = fallback_feature_info
+        self.fallback_examples = fallback_examples
+        self.bounds_margin = bounds_margin
+        # phase(nombre): contexto que cronometra una etapa de la carga (p. ej. el arranque)
+        self.phase = phase or (lambda name: nullcontext())
+        self.load_engine = load_engine
+        self.warmup = warmup
+        self.logger = logger
+        self.on_swap = on_swap
+        self._reload_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._signature = None
+        self._thread = None
+        self._pid = None
+        # Con load=False la primera versión se carga luego con load_active()
+        self.active = self._load(self._source()) if load else None
+
+    def load_active(self):
+        """Carga la versión publicada (arranque diferido) y la activa."""
+        with self._reload_lock:
+            self.active = self._load(self._source())
+        if self.on_swap is not None:
+            self.on_swap(self.active)
+        return self.active
+
+    def _signature_now(self):
+        """Señal barata de cambio: mtime y tamaño del manifiesto o del modelo."""
+        path = self.model_dir / MANIFEST_NAME
+        if not path.exists():
+            path = self.fallback_model
+        stat = path.stat()
+        return (str(path), stat.st_mtime_ns, stat.st_size)
+
+    def _source(self):
+        self._signature = self._signature_now()
+        return published_source(
+            self.model_dir, self.fallback_model, self.fallback_metrics, self.fallback_forest,
+            self.fallback_feature_info, self.fallback_examples
+        )
+
+    def _load(self, source):
+        with self.phase("artifacts"):
+            metrics = read_json(source["metrics"])
+            feature_info = read_json(source.get("feature_info"))
+            examples = read_json(source.get("examples"), {})
+            # Esquema compilado una sola vez por versión: índices y límites de valores
+            schema = (InputSchema.from_feature_info(feature_info, self.bounds_margin)
+                      if feature_info is not None else None)
+        model, engine, storage = self.load_engine(source)
+        state = LoadedModel(source["version"], model, engine, metrics, time.time(), storage,
+                            feature_info, examples, schema)
+        self.warmup(state)
+        return state
+
+    def check_for_update(self):
+        """Carga y activa una versión nueva si la hay. Devuelve True si cambió."""
+        with self._reload_lock:
+            if self.active is None or self._signature_now() == self._signature:
+                return False
+            source = self._source()
+            if source["version"] == self.active.version:
+                return False
+            try:
+                candidate = self._load(source)
+            except Exception as e:
+                # La versión activa sigue sirviendo si la nueva no carga
+                self.logger.error(f"No se pudo cargar el modelo {source['version']}: {str(e)}")
+                return False
+
+            previous, self.active = self.active.version, candidate
+            if self.on_swap is not None:
+                self.on_swap(candidate)
+            self.logger.info(f"Modelo actualizado: {previous} → {candidate.version}")
+            return True
+
+    def start_watcher(self, interval):
+        """Hilo de vigilancia; se arranca de nuevo tras un fork de gunicorn."""
+        if interval <= 0 or (self._thread is not None and self._pid == os.getpid()):
+            return
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._watch, args=(interval,), daemon=True
+                )
+                self._thread.start()
+
+    def _watch(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.check_for_update()
+            except Exception as e:
+                self.logger.error(f"Error al vigilar artefactos del modelo: {str(e)}")
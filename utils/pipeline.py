@@ -0,0 +1,164 @@
+"""
+===========================================================
+📌 pipeline.py — Etapas del entrenamiento con caché en disco
+===========================================================
+
+train_model.py se arma como un grafo de etapas (carga,
+división, entrenamiento, evaluación, guardado, gráficas).
+Cada etapa tiene una clave derivada de:
+
+- el código de la etapa (y de los módulos que declara usar),
+- sus parámetros,
+- las claves de las etapas de las que depende,
+- las versiones de numpy y scikit-learn.
+
+Si la clave ya está en la caché, el resultado se carga del
+disco en vez de recalcularse. Las etapas que escriben archivos
+los declaran en `outputs`: si alguno falta o cambió desde que
+se generó, la etapa se vuelve a ejecutar o, con `restore=True`,
+se copian los archivos guardados en la caché.
+
+`force` reejecuta las etapas indicadas (todas si está vacío) y
+las que dependen de ellas. `report()` imprime el tiempo y el
+origen (caché o ejecución) de cada etapa.
+===========================================================
+"""
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import sklearn
+
+from utils.model_store import file_fingerprint
+
+
+class StageResult:
+    """Valor de una etapa y su clave (la usan las etapas siguientes)."""
+
+    def __init__(self, name, key, value, forced):
+        self.name = name
+        self.key = key
+        self.value = value
+        self.forced = forced
+
+
+def code_fingerprint(fn, deps=()):
+    """Huella del código de la etapa y de los módulos de los que depende."""
+    digest = hashlib.blake2b(digest_size=8)
+    for obj in (fn, *deps):
+        digest.update(inspect.getsource(obj).encode())
+    return digest.hexdigest()
+
+
+class Pipeline:
+    """Ejecuta etapas con caché direccionada por contenido en `root`."""
+
+    def __init__(self, root, force=None, keep=3, log=print):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        # None: nada forzado; vacío: todas las etapas; si no, esos nombres
+        self.force = None if force is None else set(force)
+        self.keep = keep
+        self.log = log
+        self.timings = []
+
+    def _forced(self, name, inputs):
+        if any(result.forced for result in inputs):
+            return True
+        return self.force is not None and (not self.force or name in self.force)
+
+    def key(self, name, fn, params, inputs, deps):
+        payload = json.dumps({
+            "stage": name,
+            "code": code_fingerprint(fn, deps),
+            "params": params,
+            "inputs": [result.key for result in inputs],
+            "versions": [np.__version__, sklearn.__version__],
+        }, sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode(), digest_size=10).hexdigest()
+
+    def run(self, name, fn, *inputs, params=None, options=None, deps=(),
+            outputs=(), restore=False):
+        """
+        Ejecuta `fn(*valores de inputs, **params, **options)` o toma su resultado
+        de la caché. `options` no forma parte de la clave (p. ej. cantidad de
+        procesos): no cambia el resultado.
+        """
+        started = time.perf_counter()
+        params = params or {}
+        forced = self._forced(name, inputs)
+        key = self.key(name, fn, params, inputs, deps)
+        entry = self.root / f"{name}-{key}"
+
+        status = None if forced else self._cached(entry, restore)
+        if status is not None:
+            value = joblib.load(entry / "value.joblib")
+        else:
+            value = fn(*(result.value for result in inputs), **params, **(options or {}))
+            self._store(entry, value, outputs, restore)
+            status = "forced" if forced else "ran"
+
+        seconds = time.perf_counter() - started
+        self.timings.append({"stage": name, "status": status, "seconds": round(seconds, 3), "key": key})
+        return StageResult(name, key, value, forced)
+
+    def _cached(self, entry, restore):
+        """'cached', 'restored' o None (hay que ejecutar la etapa)."""
+        try:
+            meta = json.loads((entry / "meta.json").read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        os.utime(entry)  # las entradas usadas son las últimas en borrarse
+        stale = [(i, path) for i, (path, fingerprint) in enumerate(meta["outputs"].items())
+                 if not os.path.exists(path) or file_fingerprint(path) != fingerprint]
+        if not stale:
+            return "cached"
+        if not restore:
+            return None
+        for i, path in stale:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            shutil.copyfile(entry / "files" / str(i), tmp)
+            os.replace(tmp, path)
+        return "restored"
+
+    def _store(self, entry, value, outputs, restore):
+        """Guarda valor, huellas de los archivos generados y, si corresponde, copias."""
+        tmp = entry.with_name(f".{entry.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        joblib.dump(value, tmp / "value.joblib")
+        if restore:
+            (tmp / "files").mkdir()
+            for i, path in enumerate(outputs):
+                shutil.copyfile(path, tmp / "files" / str(i))
+        meta = {"outputs": {str(path): file_fingerprint(path) for path in outputs},
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+        (tmp / "meta.json").write_text(json.dumps(meta, indent=2))
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+        self._prune(entry.name.rsplit("-", 1)[0])
+
+    def _prune(self, name):
+        """Conserva las `keep` entradas más recientes de cada etapa."""
+        entries = sorted(self.root.glob(f"{name}-*"), key=lambda p: p.stat().st_mtime_ns)
+        for old in entries[:-self.keep]:
+            shutil.rmtree(old, ignore_errors=True)
+
+    def report(self):
+        """Imprime y guarda (last_run.json) el tiempo de cada etapa."""
+        total = sum(t["seconds"] for t in self.timings)
+        self.log("⏱️ Etapas del entrenamiento:")
+        for t in self.timings:
+            self.log(f"   {t['stage']:<10} {t['status']:<9} {t['seconds']:>8.2f} s")
+        self.log(f"   {'total':<10} {'':<9} {total:>8.2f} s")
+        (self.root / "last_run.json").write_text(
+            json.dumps({"stages": self.timings, "total_seconds": round(total, 3)}, indent=2)
+        )
+        return self.timings
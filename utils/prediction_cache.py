@@ -0,0 +1,183 @@
+"""
+===========================================================
+📌 prediction_cache.py — Caché de predicciones de /predict
+===========================================================
+
+Guarda (etiqueta, probabilidades) por vector de características
+canónico: las 30 columnas en el orden del modelo, convertidas a
+float32 (la precisión con la que comparan los árboles), con NaN
+y -0.0 normalizados. La clave incluye la versión del modelo, así
+que un modelo nuevo nunca reutiliza resultados antiguos.
+
+- Nivel local: LRU con TTL y tamaño máximo, por proceso.
+- Nivel compartido (opcional): SQLite en disco o en /dev/shm,
+  visible para todos los workers de gunicorn del nodo.
+===========================================================
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def canonical_key(row, model_version):
+    """Hash estable del vector de características para una versión del modelo."""
+    row = np.asarray(row, dtype=np.float32).ravel() + np.float32(0.0)  # -0.0 → 0.0
+    row[np.isnan(row)] = np.nan  # un único patrón de bits para NaN
+    digest = hashlib.blake2b(row.astype("<f4").tobytes(), digest_size=16)
+    digest.update(model_version.encode())
+    return digest.hexdigest()
+
+
+class SQLiteCacheBackend:
+    """Almacén compartido entre procesos sobre un archivo SQLite."""
+
+    def __init__(self, path, max_entries, prune_every=256):
+        self.path = str(path)
+        self.max_entries = int(max_entries)
+        self.prune_every = int(prune_every)
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self):
+        # Una conexión por proceso: no se comparten tras el fork
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=1.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "key TEXT PRIMARY KEY, version TEXT, label INTEGER, "
+                "proba BLOB, expires REAL)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, key, now):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT label, proba, expires FROM predictions WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[2] < now:
+            return None
+        return row[0], np.frombuffer(row[1], dtype="<f8").copy()
+
+    def put(self, key, version, label, proba, expires):
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?)",
+                (key, version, int(label), np.asarray(proba, dtype="<f8").tobytes(), expires)
+            )
+            conn.commit()
+            self._puts += 1
+            if self._puts % self.prune_every == 0:
+                self._prune(conn)
+
+    def _prune(self, conn):
+        conn.execute("DELETE FROM predictions WHERE expires < ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM predictions WHERE key NOT IN ("
+            "SELECT key FROM predictions ORDER BY expires DESC LIMIT ?)",
+            (self.max_entries,)
+        )
+        conn.commit()
+
+    def drop_other_versions(self, version):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM predictions WHERE version != ?", (version,))
+            conn.commit()
+
+
+class PredictionCache:
+    """LRU con TTL delante del modelo, con nivel compartido opcional."""
+
+    def __init__(self, max_entries=4096, ttl_seconds=3600, model_version="", shared=None):
+        self.max_entries = int(max_entries)
+        self.ttl = float(ttl_seconds)
+        self.model_version = model_version
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def set_model_version(self, version):
+        """Invalida todo lo cacheado si el modelo cargado cambió."""
+        with self._lock:
+            if version == self.model_version:
+                return
+            self.model_version = version
+            self._entries.clear()
+        if self.shared is not None:
+            self.shared.drop_other_versions(version)
+
+    def key(self, row, version=None):
+        """Clave de la fila para `version` (por defecto, la del modelo activo)."""
+        return canonical_key(row, self.model_version if version is None else version)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] >= now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], entry[2]
+                del self._entries[key]
+                self.expirations += 1
+
+        if self.shared is not None:
+            value = self.shared.get(key, now)
+            if value is not None:
+                self._store(key, value[0], value[1], now + self.ttl)
+                with self._lock:
+                    self.shared_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, label, proba, version=None):
+        """Guarda el resultado; si lo calculó otra versión que la activa, no."""
+        if version is not None and version != self.model_version:
+            return
+        expires = time.time() + self.ttl
+        self._store(key, label, proba, expires)
+        if self.shared is not None:
+            self.shared.put(key, self.model_version, label, proba, expires)
+
+    def _store(self, key, label, proba, expires):
+        with self._lock:
+            self._entries[key] = (expires, label, proba)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "model_version": self.model_version,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "shared_backend": self.shared.path if self.shared is not None else None,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,133 @@
+"""
+===========================================================
+📌 response_encoding.py — Codificación de respuestas por lotes
+===========================================================
+
+Codificaciones alternativas para /predict/batch, elegidas con
+el encabezado `Accept`:
+- application/vnd.columns+json → JSON por columnas (orjson si
+  está instalado, serializa arreglos NumPy sin pasar por listas).
+- application/vnd.apache.arrow.stream → Arrow IPC (requiere pyarrow).
+- application/octet-stream → probabilidades float32 crudas
+  (little-endian, fila por fila); forma y clases van en encabezados.
+===========================================================
+"""
+import json
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from utils.lazy_import import lazy_import
+
+pa = lazy_import("pyarrow", optional=True)
+pa_ipc = lazy_import("pyarrow.ipc", optional=True)
+
+COLUMNS_JSON = "application/vnd.columns+json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+RAW_FLOAT32 = "application/octet-stream"
+
+
+def encode_columns_json(labels, proba, classes):
+    """{"predictions": [...], "probabilities": {clase: [...]}}, sin objetos por celda."""
+    names = [str(c) for c in classes.tolist()]
+    if orjson is not None:
+        payload = {
+            "predictions": np.ascontiguousarray(labels),
+            "probabilities": {
+                name: np.ascontiguousarray(proba[:, j]) for j, name in enumerate(names)
+            },
+        }
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY), {}
+
+    payload = {
+        "predictions": labels.tolist(),
+        "probabilities": {name: proba[:, j].tolist() for j, name in enumerate(names)},
+    }
+    return json.dumps(payload, separators=(",", ":")).encode(), {}
+
+
+def encode_arrow(labels, proba, classes):
+    """Tabla Arrow IPC con columnas prediction y probability_<clase>."""
+    columns = {"prediction": labels}
+    for j, name in enumerate(classes.tolist()):
+        columns[f"probability_{name}"] = proba[:, j]
+
+    sink = pa.BufferOutputStream()
+    table = pa.table(columns)
+    with pa_ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes(), {}
+
+
+def encode_raw_float32(labels, proba, classes):
+    """Buffer float32 little-endian (n_filas × n_clases); etiquetas por argmax."""
+    data = np.ascontiguousarray(proba, dtype="<f4")
+    headers = {
+        "X-Shape": f"{data.shape[0]},{data.shape[1]}",
+        "X-Dtype": "float32",
+        "X-Classes": ",".join(str(c) for c in classes.tolist()),
+    }
+    return data.tobytes(), headers
+
+
+def proba_to_list(proba):
+    """
+    Convierte probabilidades a listas; float32 usa su representación corta
+    (0.1 y no 0.10000000149011612). orjson la escribe sin pasar por un
+    arreglo de cadenas; sin orjson se usa `astype(str)`, más lento.
+    """
+    if proba.dtype != np.float32:
+        return proba.tolist()
+    if orjson is not None:
+        return orjson.loads(orjson.dumps(np.ascontiguousarray(proba),
+                                         option=orjson.OPT_SERIALIZE_NUMPY))
+    return proba.astype(str).astype(np.float64).tolist()
+
+
+def stream_header(fmt, classes):
+    """Encabezado de la salida por bloques (solo CSV)."""
+    if fmt != "csv":
+        return ""
+    return "prediction," + ",".join(f"probability_{c}" for c in classes) + ",error\n"
+
+
+def encode_stream_block(fmt, labels, probas, report, offset, n_classes):
+    """
+    Líneas NDJSON o CSV de un bloque de filas que empieza en `offset`, con
+    las filas inválidas del reporte en su lugar (`labels` es None si no hay
+    ninguna válida).
+    """
+    if labels is None:
+        lines = [None] * len(report)
+    else:
+        rows = list(zip(labels.tolist(), proba_to_list(probas)))
+        if fmt == "csv":
+            lines = [f"{label}," + ",".join(map(str, proba)) + "," for label, proba in rows]
+        else:
+            lines = [json.dumps({"prediction": label, "probability": proba})
+                     for label, proba in rows]
+
+    for entry in report:
+        i = entry["row"] - offset
+        if fmt == "csv":
+            message = "; ".join(f"{e['feature']}: {e['error']}" for e in entry["errors"])
+            lines[i] = "," * (n_classes + 1) + '"' + message.replace('"', "'") + '"'
+        else:
+            lines[i] = json.dumps(entry, ensure_ascii=False)
+    return "\n".join(lines) + "\n"
+
+
+ENCODERS = {
+    COLUMNS_JSON: encode_columns_json,
+    ARROW_STREAM: encode_arrow,
+    RAW_FLOAT32: encode_raw_float32,
+}
+
+
+def available_encodings():
+    """Tipos de respuesta disponibles según las dependencias instaladas."""
+    return [mimetype for mimetype in ENCODERS if mimetype != ARROW_STREAM or pa is not None]
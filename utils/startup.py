@@ -0,0 +1,79 @@
+"""
+===========================================================
+📌 startup.py — Fases del arranque y estado de preparación
+===========================================================
+
+Mide cuánto tarda cada fase del arranque de la API (imports,
+artefactos, carga del modelo, calentamiento) y marca cuándo el
+worker está listo para recibir tráfico. /ready y /metrics lo
+exponen; /health solo dice que el proceso responde.
+===========================================================
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupReport:
+    """Duración por fase desde `started` hasta que el worker queda listo."""
+
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self.phases = {}
+        self.total = None
+        self.error = None
+        self._ready = threading.Event()
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    @contextmanager
+    def phase(self, name):
+        """Cronometra una fase; después de `mark_ready` no registra nada."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if not self.ready:
+                self.phases[name] = round(time.perf_counter() - started, 4)
+
+    def mark(self, name, since=None):
+        """Registra una fase que empezó en `since` (por defecto, el arranque)."""
+        since = self.started if since is None else since
+        self.phases[name] = round(time.perf_counter() - since, 4)
+
+    def mark_ready(self):
+        self.total = round(time.perf_counter() - self.started, 4)
+        self.error = None
+        self._ready.set()
+
+    def fail(self, error):
+        self.error = str(error)
+
+    def wait(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def as_dict(self):
+        return {
+            "ready": self.ready,
+            "phases_s": dict(self.phases),
+            "total_s": self.total,
+            "error": self.error,
+        }
+
+    def metric_samples(self):
+        """
+        Muestras para /metrics: [(nombre, etiquetas, valor)]. Llevan el pid
+        del worker: sumar tiempos de arranque entre procesos no tiene sentido.
+        """
+        worker = {"pid": str(os.getpid())}
+        samples = [("api_ready", worker, int(self.ready))]
+        samples.extend(
+            ("api_startup_seconds", {**worker, "phase": name}, seconds)
+            for name, seconds in self.phases.items()
+        )
+        if self.total is not None:
+            samples.append(("api_startup_seconds", {**worker, "phase": "total"}, self.total))
+        return samples
@@ -0,0 +1,120 @@
+"""
+===========================================================
+📌 static_cache.py — Respuestas estáticas pre-serializadas
+===========================================================
+
+Las respuestas que no cambian entre peticiones (`/`, `/examples`,
+`/model/info` de una versión del modelo, imágenes de
+visualizations/) se serializan una sola vez y se guardan junto
+con sus variantes comprimidas (gzip y, si está instalado
+`brotli`, br) y sus validadores (ETag y Last-Modified).
+
+- Cada entrada lleva una versión: si cambia (modelo nuevo,
+  imagen regenerada) se reconstruye en la siguiente petición.
+- Los formatos ya comprimidos (PNG) no se vuelven a comprimir.
+- El ETag depende del contenido, así que todos los workers
+  responden igual y un cliente con la copia vigente recibe 304.
+===========================================================
+"""
+import gzip
+import hashlib
+import threading
+import time
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Tipos que vale la pena comprimir y tamaño mínimo para hacerlo
+COMPRESSIBLE_TYPES = ("application/json", "text/", "image/svg+xml")
+MIN_COMPRESS_BYTES = 512
+
+# Orden de preferencia cuando el cliente acepta varias con igual calidad
+ENCODING_PREFERENCE = ("br", "gzip", "identity")
+
+
+def available_encodings():
+    return [e for e in ENCODING_PREFERENCE if e != "br" or brotli is not None]
+
+
+def _quality(accept_encodings, name):
+    if name == "identity" and not any(
+        value in ("identity", "*") for value, _ in accept_encodings
+    ):
+        # identity es aceptable salvo que se excluya explícitamente
+        return 0.001
+    return accept_encodings.quality(name)
+
+
+class StaticPayload:
+    """Cuerpo pre-serializado con sus variantes comprimidas y validadores."""
+
+    def __init__(self, body, mimetype, last_modified=None, compress=None):
+        self.mimetype = mimetype
+        self.etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.last_modified = int(last_modified if last_modified is not None else time.time())
+        self.variants = {"identity": body}
+
+        if compress is None:
+            compress = mimetype.startswith(COMPRESSIBLE_TYPES)
+        if compress and len(body) >= MIN_COMPRESS_BYTES:
+            candidates = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                candidates["br"] = brotli.compress(body, quality=11)
+            # Solo se guardan las variantes que de verdad ocupan menos
+            self.variants.update(
+                (name, data) for name, data in candidates.items() if len(data) < len(body)
+            )
+
+    def negotiate(self, accept_encodings):
+        """
+        Variante según `Accept-Encoding` (objeto Accept de Werkzeug):
+        la de mayor calidad y, a igual calidad, br > gzip > identity.
+        Devuelve (codificación, cuerpo, etag de la variante).
+        """
+        best, best_quality = "identity", 0.0
+        for name in ENCODING_PREFERENCE:
+            if name in self.variants:
+                quality = _quality(accept_encodings, name)
+                if quality > best_quality:
+                    best, best_quality = name, quality
+        etag = self.etag if best == "identity" else f"{self.etag}-{best}"
+        return best, self.variants[best], etag
+
+    @property
+    def nbytes(self):
+        return sum(len(data) for data in self.variants.values())
+
+
+class StaticCache:
+    """Respuestas pre-serializadas por clave, reconstruidas al cambiar su versión."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+
+    def get(self, key, version, build):
+        """Entrada de `key` para `version`; `build()` → StaticPayload si falta o es antigua."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+        payload = build()
+        with self._lock:
+            self._entries[key] = (version, payload)
+            self.builds += 1
+        return payload
+
+    def stats(self):
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            "entries": len(entries),
+            "bytes": sum(payload.nbytes for _, payload in entries),
+            "hits": self.hits,
+            "builds": self.builds,
+            "encodings": available_encodings(),
+        }